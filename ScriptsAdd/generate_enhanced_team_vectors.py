@@ -1,121 +1,118 @@
-import pandas as pd
-import numpy as np
-from scipy.stats import entropy
 from catboost import CatBoostClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
 import pickle
 import time
+import pandas as pd
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from item_encoding import SLOT_COLS, load_vocab, update_vocab, item_matrix, item_columns, to_slot_format
+from team_features import Teams, PLAYER_COLS, team_aggregates, team_table
+import champion_features
+import dataset_store
+import schema
+import pool_cache
+import tune_models
+import metrics
 
 # 경로 설정
-INPUT_PATH = "LOLCLUSTER/champion_vectors/champion_with_roles.csv"
-OUTPUT_CSV = "LOLCLUSTER/champion_vectors/team_vectors_v3.csv"
+INPUT_DATASET = "champion_with_roles"
+OUTPUT_DATASET = "team_vectors_v3"
 OUTPUT_PKL = "LOLCLUSTER/models/team_model_v3.pkl"
-
-# 팀 벡터 생성 함수
-def make_team_vector_enhanced(team_df):
-    team_df = team_df.sort_values(by='champion')
-    vector = []
-
-    total_kills = team_df['kills'].sum()
-    total_assists = team_df['assists'].sum()
-    total_deaths = team_df['deaths'].sum()
-    team_kda = (total_kills + total_assists) / max(total_deaths, 1)
-
-    avg_damage = team_df['damage'].mean()
-    avg_taken = team_df['taken'].mean()
-    avg_heal = team_df['heal'].mean()
-
-    role_counts = team_df['role_cluster'].value_counts(normalize=True).sort_index()
-    role_dist = np.zeros(5)
-    for i in range(5):
-        if i in role_counts:
-            role_dist[i] = role_counts[i]
-    role_entropy = entropy(role_dist + 1e-10)
-
-    vector += [avg_damage, avg_taken, avg_heal, team_kda, role_entropy]
-
-    for _, row in team_df.iterrows():
-        vector += [
-            row['champion'],
-            row['kills'], row['deaths'], row['assists'],
-            row['damage'], row['taken'], row['heal'],
-            row['role_cluster']
-        ]
-        vector += row.filter(like='item_').tolist()
-
-    return vector
-
-# CSV 저장용 header 설정
-raw_df = pd.read_csv(INPUT_PATH)
-first_vec = None
-for (_, _), group in raw_df.groupby(['match_id', 'team_id']):
-    if len(group) == 5:
-        first_vec = make_team_vector_enhanced(group)
-        break
-if first_vec is None:
-    raise ValueError("데이터셋에 유효한 팀이 없습니다.")
-
-extra_cols = ['avg_damage', 'avg_taken', 'avg_heal', 'team_kda', 'role_entropy']
-player_cols = ['champion', 'kills', 'deaths', 'assists', 'damage', 'taken', 'heal', 'role_cluster']
-item_cols = [col for col in raw_df.columns if col.startswith("item_")]
-header = extra_cols + player_cols * 5 + item_cols * 5 + ['match_id', 'team_id', 'win']
-
-# Streaming으로 저장
-os.makedirs(os.path.dirname(OUTPUT_CSV), exist_ok=True)
-with open(OUTPUT_CSV, "w", encoding="utf-8") as f:
-    f.write(",".join(map(str, header)) + "\n")
-    for (match_id, team_id), group in raw_df.groupby(['match_id', 'team_id']):
-        if len(group) != 5:
-            continue
-        vec = make_team_vector_enhanced(group)
-        vec += [match_id, team_id, group['win'].iloc[0]]
-        f.write(",".join(map(str, vec)) + "\n")
-print(f"Streaming 방식으로 CSV 저장 완료 → {OUTPUT_CSV}")
-
-# 모델 학습
-team_df = pd.read_csv(OUTPUT_CSV)
-X = team_df.drop(columns=['match_id', 'team_id', 'win'])
-y = team_df['win']
-cat_features = X.select_dtypes(include='object').columns.tolist()
-
-X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
-
-model = CatBoostClassifier(
-    iterations=1000,
-    depth=6,
-    learning_rate=0.05,
-    eval_metric='F1',
-    verbose=100
-)
-
-start = time.time()
-model.fit(
-    X_train, y_train,
-    cat_features=cat_features,
-    eval_set=(X_val, y_val),
-    early_stopping_rounds=50
-)
-elapsed = time.time() - start
-
-# 평가 지표
-y_pred = model.predict(X_val)
-acc = accuracy_score(y_val, y_pred)
-f1 = f1_score(y_val, y_pred)
-prec = precision_score(y_val, y_pred)
-recall = recall_score(y_val, y_pred)
-print(f"acc: {acc:.4f} | f1: {f1:.4f} | precision: {prec:.4f} | recall: {recall:.4f}")
-
-# 로그 저장
-now = time.strftime('%Y-%m-%d %H:%M:%S')
-with open("train_log.txt", "a", encoding="utf-8") as log:
-    log.write(
-        f"[{now}] acc: {acc:.4f}, f1: {f1:.4f}, precision: {prec:.4f}, recall: {recall:.4f}, data: {len(X)}, time: {elapsed:.2f}s\n"
+CHUNK_ROWS = 10000
+
+def build_team_vectors(raw_df, window=None):
+    # champion_with_roles 행(슬롯 형식) → 팀 벡터 표. benchmark_stages도 이 함수를 그대로 잼
+    vocab, _ = update_vocab(load_vocab(), raw_df[SLOT_COLS].to_numpy())
+    items = item_matrix(raw_df, vocab)
+    teams = Teams(raw_df, items)
+    if len(teams) == 0:
+        raise ValueError("데이터셋에 유효한 팀이 없습니다.")
+
+    # 챔피언 승률/조합 시너지/상대 카운터 (특징 저장소를 새 매치만큼 갱신한 뒤 조회, 그 판 자신의 결과는 뺌)
+    features = champion_features.ChampionFeatures(champion_features.run(window=window))
+    matchup = champion_features.teams_features(features, teams)
+
+    # 저장용 header 설정
+    extra_cols = ['avg_damage', 'avg_taken', 'avg_heal', 'team_kda', 'role_entropy', 'champ_win_rate', 'synergy', 'counter']
+    player_cols = PLAYER_COLS
+    item_cols = item_columns(vocab)
+    header = extra_cols + player_cols * 5 + item_cols * 5 + ['match_id', 'team_id', 'win']
+
+    # 중복 컬럼명은 read_csv와 같은 규칙(champion, champion.1, ...)으로 바꿔서 저장
+    seen = {}
+    for i, col in enumerate(header):
+        if col in seen:
+            seen[col] += 1
+            header[i] = f"{col}.{seen[col]}"
+        else:
+            seen[col] = 0
+
+    # 팀 집계(평균 딜/받은 피해/힐, KDA, 역할 엔트로피, 상성) + 선수 5명 블록을 한 번에 만듦
+    return team_table(teams, header, extra=pd.concat([team_aggregates(teams), matchup], axis=1))
+
+@metrics.instrument("generate_enhanced_team_vectors")
+def main():
+    # --patches N / --since YYYY-MM-DD 를 주면 그 기간 파티션만 읽음 (챔피언 특징도 같은 범위로 셈)
+    window = dataset_store.parse_window(sys.argv)
+    raw_df = dataset_store.read(INPUT_DATASET, window=window)
+    print(f"데이터 범위: {dataset_store.describe_window(window)}")
+    if raw_df.empty:
+        print("범위에 해당하는 데이터가 없습니다. 팀 벡터 생성 중단.")
+        return False
+    raw_df = schema.compact(to_slot_format(raw_df))
+    team_df = build_team_vectors(raw_df, window)
+    # CHUNK_ROWS개씩 parquet part로 저장
+    dataset_store.drop(OUTPUT_DATASET)
+    for start in range(0, len(team_df), CHUNK_ROWS):
+        dataset_store.append(OUTPUT_DATASET, team_df.iloc[start:start + CHUNK_ROWS])
+    print(f"분할 저장 완료 → {dataset_store.dataset_path(OUTPUT_DATASET)}")
+    if "--csv" in sys.argv:
+        dataset_store.export_csv(OUTPUT_DATASET)
+    metrics.rows(rows_in=len(raw_df), rows_out=len(team_df))
+    return True
+
+@metrics.instrument("train_team_model_v3")
+def train(train_pool, val_pool, meta):
+    # 모델 학습 (tune_models.py catboost --dataset team_vectors_v3 결과가 있으면 그 설정을 씀)
+    params = tune_models.best_params(OUTPUT_DATASET, {"iterations": 1000, "depth": 6, "learning_rate": 0.05, "l2_leaf_reg": 3.0})
+    print("CatBoost 설정:", params)
+    model = CatBoostClassifier(
+        **params,
+        eval_metric='F1',
+        verbose=100
     )
 
-# 모델 저장
-os.makedirs(os.path.dirname(OUTPUT_PKL), exist_ok=True)
-with open(OUTPUT_PKL, "wb") as f:
-    pickle.dump(model, f)
-print(f"모델 저장 완료: {OUTPUT_PKL}")
+    start = time.time()
+    model.fit(
+        train_pool,
+        eval_set=val_pool,
+        early_stopping_rounds=50
+    )
+    elapsed = time.time() - start
+
+    # 평가 지표
+    acc, f1, prec, recall = pool_cache.evaluate(model, OUTPUT_DATASET)
+    metrics.rows(rows_in=meta["rows"])
+    metrics.note(fit_s=round(elapsed, 4), trees=model.tree_count_, acc=acc, f1=f1, precision=prec, recall=recall)
+    print(f"acc: {acc:.4f} | f1: {f1:.4f} | precision: {prec:.4f} | recall: {recall:.4f}")
+
+    # 로그 저장
+    now = time.strftime('%Y-%m-%d %H:%M:%S')
+    with open("train_log.txt", "a", encoding="utf-8") as log:
+        log.write(
+            f"[{now}] acc: {acc:.4f}, f1: {f1:.4f}, precision: {prec:.4f}, recall: {recall:.4f}, data: {meta['rows']}, time: {elapsed:.2f}s\n"
+        )
+
+    # 모델 저장
+    os.makedirs(os.path.dirname(OUTPUT_PKL), exist_ok=True)
+    with open(OUTPUT_PKL, "wb") as f:
+        pickle.dump(model, f)
+    print(f"모델 저장 완료: {OUTPUT_PKL}")
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(0)
+    # 양자화 Pool을 만들어 두고(경계/범주형 인덱스 고정) 학습·실험은 이 Pool을 읽음
+    pool_cache.build(OUTPUT_DATASET)
+    train(*pool_cache.load(OUTPUT_DATASET))
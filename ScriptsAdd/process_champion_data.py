@@ -1,31 +1,43 @@
-import pandas as pd
+import os
+import sys
 
-df = pd.read_csv("LOLCLUSTER/champion_vectors/champion_with_roles.csv")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from item_encoding import SLOT_COLS, load_vocab, update_vocab, item_matrix, to_slot_format
+from team_features import Teams, PLAYER_COLS, team_table
+import dataset_store
+import schema
+import pool_cache
+import metrics
 
-def make_team_vector(team_df):
-    team_df = team_df.sort_values(by='champion')
-    vector = []
-    for _, row in team_df.iterrows():
-        vector += [
-            row['champion'],
-            row['kills'], row['deaths'], row['assists'],
-            row['damage'], row['taken'], row['heal'],
-            row['role_cluster']
-        ]
-        vector += row.filter(like='item_').tolist()
-    return vector
+def build_team_vectors(df):
+    # champion_with_roles 행(슬롯 형식) → 팀 벡터 표. benchmark_stages도 이 함수를 그대로 잼
+    vocab, _ = update_vocab(load_vocab(), df[SLOT_COLS].to_numpy())
+    # 아이템 원-핫은 희소 행렬로 한 번만 만들고, 팀 벡터를 쓸 때 선수 슬롯별로 꺼냄
+    items = item_matrix(df, vocab)
 
-result = []
+    # 5명 팀마다 챔피언 이름순으로 [챔피언, 스탯, 역할, 아이템...] × 5 + match_id, team_id, win
+    teams = Teams(df, items)
+    header = list(range(5 * (len(PLAYER_COLS) + len(vocab)))) + ['match_id', 'team_id', 'win']
+    return team_table(teams, header)
 
-for (match_id, team_id), group in df.groupby(['match_id', 'team_id']):
-    if len(group) != 5:
-        continue
-    vector = make_team_vector(group)
-    vector = pd.Series(vector) 
-    vector['match_id'] = match_id
-    vector['team_id'] = team_id
-    vector['win'] = group['win'].iloc[0]
-    result.append(vector)
+@metrics.instrument("process_champion_data")
+def main():
+    # --patches N / --since YYYY-MM-DD 를 주면 그 기간 파티션만 읽음
+    window = dataset_store.parse_window(sys.argv)
+    df = dataset_store.read("champion_with_roles", window=window)
+    print(f"데이터 범위: {dataset_store.describe_window(window)}")
+    if df.empty:
+        print("범위에 해당하는 데이터가 없습니다. 팀 벡터 생성 중단.")
+        return
+    df = schema.compact(to_slot_format(df))
+    team_vectors = build_team_vectors(df)
+    metrics.rows(rows_in=len(df), rows_out=len(team_vectors))
 
-team_vectors = pd.DataFrame(result)
-team_vectors.to_csv("LOLCLUSTER/champion_vectors/team_vectors.csv", index=False)
+    dataset_store.write("team_vectors", team_vectors)
+    # 학습 스크립트가 바로 쓸 수 있게 양자화 Pool도 같이 만들어 둠
+    pool_cache.build("team_vectors")
+    if "--csv" in sys.argv:
+        dataset_store.export_csv("team_vectors")
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,56 @@
 from catboost import CatBoostClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
-import pandas as pd
 import time
-import pickle
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+import pool_cache
+import tune_models
+import model_registry
+import metrics
+
+# 팀 벡터 전체(챔피언/스탯/아이템) 모델. 역할 수 모델(team_model)과 섞이지 않게 레지스트리에 따로 등록
+MODEL_NAME = "team_model_wide"
+
+@metrics.instrument("train_catboost_model")
+def main():
+    # 미리 양자화해 둔 Pool을 읽음 (team_vectors가 바뀌었으면 여기서 다시 만듦)
+    train_pool, val_pool, meta = pool_cache.load("team_vectors")
+    print("Categorical features:", [meta["features"][i] for i in meta["cat_features"]])
+
+    # tune_models.py catboost --dataset team_vectors 결과가 있으면 그 설정을 씀
+    params = tune_models.best_params("team_vectors", {"iterations": 1000, "depth": 6, "learning_rate": 0.05, "l2_leaf_reg": 3.0})
+    print("CatBoost 설정:", params)
+    model = CatBoostClassifier(
+        **params,
+        eval_metric='F1',
+        verbose=100
+    )
 
-df = pd.read_csv("LOLCLUSTER/champion_vectors/team_vectors.csv")
-
-X = df.drop(columns=['match_id', 'team_id', 'win'])
-y = df['win']
-
-cat_features = X.select_dtypes(include='object').columns.tolist()
-print("Categorical features:", cat_features)
-
-X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
-
-model = CatBoostClassifier(
-    iterations=1000,
-    depth=6,
-    learning_rate=0.05,
-    eval_metric='F1',
-    verbose=100
-)
-
-start = time.time()
-model.fit(
-    X_train, y_train,
-    cat_features=cat_features,
-    eval_set=(X_val, y_val),
-    early_stopping_rounds=50
-)
-elapsed = time.time() - start
+    start = time.time()
+    model.fit(
+        train_pool,
+        eval_set=val_pool,
+        early_stopping_rounds=50
+    )
+    elapsed = time.time() - start
 
-y_pred = model.predict(X_val)
+    acc, f1, prec, recall = pool_cache.evaluate(model, "team_vectors")
+    metrics.rows(rows_in=meta["rows"])
+    metrics.note(fit_s=round(elapsed, 4), trees=model.tree_count_, acc=acc, f1=f1, precision=prec, recall=recall)
 
-acc = accuracy_score(y_val, y_pred)
-f1 = f1_score(y_val, y_pred)
-prec = precision_score(y_val, y_pred)
-recall = recall_score(y_val, y_pred)
+    print(f"Accuracy: {acc:.4f}, F1: {f1:.4f}, Precision: {prec:.4f}, Recall: {recall:.4f}")
 
-print(f"Accuracy: {acc:.4f}, F1: {f1:.4f}, Precision: {prec:.4f}, Recall: {recall:.4f}")
+    now = time.strftime('%Y-%m-%d %H:%M:%S')
+    with open("train_log.txt", "a", encoding="utf-8") as log:
+        log.write(
+            f"[{now}] acc: {acc:.4f}, f1: {f1:.4f}, precision: {prec:.4f}, recall: {recall:.4f}, data: {meta['rows']}, time: {elapsed:.2f}s\n"
+        )
 
-now = time.strftime('%Y-%m-%d %H:%M:%S')
-with open("train_log.txt", "a", encoding="utf-8") as log:
-    log.write(
-        f"[{now}] acc: {acc:.4f}, f1: {f1:.4f}, precision: {prec:.4f}, recall: {recall:.4f}, data: {len(X)}, time: {elapsed:.2f}s\n"
-    )
+    model_registry.register(MODEL_NAME, model, {
+        "dataset": "team_vectors", "rows": meta["rows"], "fit_s": round(elapsed, 4),
+        "acc": acc, "f1": f1, "precision": prec, "recall": recall,
+    })
 
-os.makedirs("LOLCLUSTER/models", exist_ok=True)
-with open("LOLCLUSTER/models/team_model.pkl", "wb") as f:
-    pickle.dump(model, f)
+if __name__ == "__main__":
+    main()
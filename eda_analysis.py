@@ -1,3 +1,6 @@
+import os
+import sys
+import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use("Agg")
@@ -7,86 +10,73 @@ import seaborn as sns
 matplotlib.rc("font", family="Malgun Gothic")
 matplotlib.rcParams["axes.unicode_minus"] = False
 
-df = pd.read_csv("LOLCLUSTER/champion_vectors/champion_with_roles.csv")
-
-print("전체 컬럼명:")
-print(df.columns.tolist())
-
-if "role_cluster" in df.columns:
-    print("역할 라벨링 클러스터 분포:")
-    print(df["role_cluster"].value_counts())
-else:
-    print("role_cluster 컬럼이 없습니다.")
-
-print("\n결측치 개수:")
-print(df.isnull().sum())
-
-numeric_cols = df.select_dtypes(include="number").columns
-df[numeric_cols] = df[numeric_cols].replace([float("inf"), float("-inf")], float("nan")).fillna(0)
-
-print("\n수치형 컬럼 통계:")
-print(df[numeric_cols].describe())
-
-col_map = {}
-for col in df.columns:
-    name = col.lower()
-    if "kill" in name and "skill" not in name:
-        col_map["kills"] = col
-    elif "death" in name:
-        col_map["deaths"] = col
-    elif "assist" in name:
-        col_map["assists"] = col
-    elif "damage" in name:
-        col_map["damage"] = col
-    elif "taken" in name:
-        col_map["taken"] = col
-    elif "heal" in name:
-        col_map["heal"] = col
-    elif "champ" in name:
-        col_map["champion"] = col
-
-print("col_map:", col_map)
-
-if {"kills", "deaths", "assists"}.issubset(col_map):
-    df["kda"] = (df[col_map["kills"]] + df[col_map["assists"]]) / df[col_map["deaths"]].replace(0, 1)
-    print("\nKDA 통계:")
-    print(df["kda"].describe())
-    print("KDA 예시:", df["kda"].head())
-
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df["kda"], bins=50)
-    plt.title("KDA 분포")
-    plt.xlabel("KDA")
-    plt.savefig("kda_distribution.png")
-    plt.close()
-
-    print("kda_distribution.png 저장 시도 완료")
-else:
-    print("KDA 그래프 생략됨: kills/deaths/assists 컬럼 없음")
-
-if "damage" in col_map:
-    print("Damage 예시:", df[col_map["damage"]].head())
-
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df[col_map["damage"]], bins=50)
-    plt.title("딜량 분포")
-    plt.xlabel("damage")
-    plt.savefig("damage_distribution.png")
-    plt.close()
-
-    print("damage_distribution.png 저장 시도 완료")
-else:
-    print("딜량 그래프 생략됨: damage 컬럼 없음")
-
-if "role_cluster" in df.columns and "champion" in col_map:
-    print("\n클러스터별 평균 스탯:")
-    stat_cols = [col_map.get(k) for k in ["kills", "deaths", "assists", "damage", "taken", "heal"] if col_map.get(k)]
-    print(df.groupby("role_cluster")[stat_cols].mean())
-
-    print("\n클러스터별 대표 챔피언 상위 10개:")
-    for cluster_id in sorted(df["role_cluster"].dropna().unique()):
-        top_champs = df[df["role_cluster"] == cluster_id][col_map["champion"]].value_counts().head(10)
-        print(f"\n클러스터 {int(cluster_id)}:")
-        print(top_champs)
-else:
-    print("\nrole_cluster 또는 champion 컬럼이 누락되어 클러스터별 챔피언 출력 불가.")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+import summary_stats
+import metrics
+
+# 매번 전체 데이터를 읽지 않고 누적 통계 저장소(summary_stats)만 새 행으로 갱신한 뒤 거기서 보고서/그림을 만듦
+@metrics.instrument("eda_analysis")
+def main():
+    store, added = summary_stats.update()
+    metrics.rows(rows_in=added)
+    metrics.note(total_rows=store["rows"])
+    print(f"통계 갱신: 새 행 {added}개 (전체 {store['rows']}행)")
+
+    print("전체 컬럼명:")
+    print(store["columns"])
+
+    if len(store["cluster_counts"]):
+        print("역할 라벨링 클러스터 분포:")
+        print(summary_stats.cluster_counts(store).sort_values(ascending=False))
+    else:
+        print("role_cluster 컬럼이 없습니다.")
+
+    print("\n결측치 개수:")
+    print(pd.Series(store["missing"], dtype="int64").reindex(store["columns"], fill_value=0))
+
+    stats = summary_stats.describe(store)
+    print("\n수치형 컬럼 통계:")
+    print(stats.drop(columns=["kda"], errors="ignore"))
+
+    if "kda" in stats.columns:
+        print("\nKDA 통계:")
+        print(stats["kda"])
+
+        edges, counts = summary_stats.histogram(store, "kda")
+        plt.figure(figsize=(10, 6))
+        sns.histplot(pd.DataFrame({"x": (edges[:-1] + edges[1:]) / 2, "n": counts}), x="x", weights="n", bins=len(counts), binrange=(edges[0], edges[-1]))
+        plt.title("KDA 분포")
+        plt.xlabel("KDA")
+        plt.savefig("kda_distribution.png")
+        plt.close()
+
+        print("kda_distribution.png 저장 시도 완료")
+    else:
+        print("KDA 그래프 생략됨: kills/deaths/assists 컬럼 없음")
+
+    if "damage" in stats.columns:
+        edges, counts = summary_stats.histogram(store, "damage")
+        plt.figure(figsize=(10, 6))
+        sns.histplot(pd.DataFrame({"x": (edges[:-1] + edges[1:]) / 2, "n": counts}), x="x", weights="n", bins=len(counts), binrange=(edges[0], edges[-1]))
+        plt.title("딜량 분포")
+        plt.xlabel("damage")
+        plt.savefig("damage_distribution.png")
+        plt.close()
+
+        print("damage_distribution.png 저장 시도 완료")
+    else:
+        print("딜량 그래프 생략됨: damage 컬럼 없음")
+
+    if len(store["cluster_counts"]) and store["champions"]:
+        print("\n클러스터별 평균 스탯:")
+        print(summary_stats.cluster_means(store))
+
+        print("\n클러스터별 대표 챔피언 상위 10개:")
+        for cluster_id in np.flatnonzero(store["cluster_counts"]):
+            print(f"\n클러스터 {int(cluster_id)}:")
+            print(summary_stats.top_champions(store, cluster_id, 10))
+    else:
+        print("\nrole_cluster 또는 champion 컬럼이 누락되어 클러스터별 챔피언 출력 불가.")
+
+if __name__ == "__main__":
+    main()
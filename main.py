@@ -1,20 +1,88 @@
+import os
+import sys
 import time
-import subprocess
+import asyncio
+import threading
 
-def run_script(path):
-    print(f"실행 중: {path}")
-    try:
-        subprocess.run(["python", path], check=True)
-    except subprocess.CalledProcessError:
-        print(f"실패 무시: {path}")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from pipeline import Stage, Pipeline
+
+import vectorize_champions
+import champion_features
+import cluster_roles
+import train_recommendation
+
+LOOP_INTERVAL = 5
+CRAWL_INTERVAL = 5
+# 학습 범위: DATA_WINDOW_PATCHES=3 (최근 패치 3개), DATA_WINDOW_SINCE=2024-05-01 환경변수를 주면
+# champion_features/train_recommendation 은 그 범위만 읽고, cluster_roles 는 그 범위로 중심점을 정함 (배정은 전체)
+
+# 크롤러는 별도 스레드에서 계속 돌고, 그동안 아래 단계들은 이전까지 모인 매치를 처리함
+def crawler_thread(stop_event):
+    if os.name == 'nt':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    # sqlite 연결 등은 만든 스레드에서만 써야 하므로 import도 이 스레드에서 함
+    import recursive_fetch_matches
+
+    async def crawl_forever():
+        while not stop_event.is_set():
+            try:
+                await recursive_fetch_matches.crawl()
+            except Exception:
+                import traceback
+                traceback.print_exc()
+                print("크롤러 실패: 잠시 후 재시도")
+            await asyncio.sleep(CRAWL_INTERVAL)
 
-while True:
-    print("\n새로운 루프 시작\n")
+    asyncio.run(crawl_forever())
+    recursive_fetch_matches.frontier.close()
 
-    run_script("scripts/recursive_fetch_matches.py")
-    run_script("scripts/vectorize_champions.py")
-    run_script("scripts/cluster_roles.py")
-    run_script("scripts/train_recommendation.py")
+STAGES = [
+    Stage("vectorize_champions", vectorize_champions.run,
+          [("LOLCLUSTER/data", "segment_*.jsonl.gz"), ("LOLCLUSTER/data", "matches_*.json")]),
+    Stage("champion_features", champion_features.run,
+          [("LOLCLUSTER/datasets/champion_vectors", "*.parquet")],
+          deps=["vectorize_champions"]),
+    Stage("cluster_roles", cluster_roles.run,
+          [("LOLCLUSTER/datasets/champion_vectors", "*.parquet"), ("LOLCLUSTER/champion_vectors/champion_vectors.csv", "")],
+          deps=["vectorize_champions"]),
+    Stage("train_recommendation", train_recommendation.run,
+          [("LOLCLUSTER/datasets/champion_with_roles", "*.parquet"), ("LOLCLUSTER/champion_vectors/champion_with_roles.csv", "")],
+          deps=["cluster_roles"]),
+]
 
-    print("5초 대기 후 다음 루프로...\n")
-    time.sleep(5)
+def crawl_once():
+    if os.name == 'nt':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    import recursive_fetch_matches
+    asyncio.run(recursive_fetch_matches.main())
+
+if __name__ == "__main__":
+    # --once: 크롤링 한 번 + 단계 한 번 / --no-crawl: 크롤러 없이 단계만 / --force: 변경 없어도 실행
+    once = "--once" in sys.argv
+    crawl = "--no-crawl" not in sys.argv
+    pipeline = Pipeline(STAGES)
+
+    if once:
+        if crawl:
+            crawl_once()
+        pipeline.run_once(force="--force" in sys.argv)
+        sys.exit(0)
+
+    stop_event = threading.Event()
+    crawler = None
+    if crawl:
+        crawler = threading.Thread(target=crawler_thread, args=(stop_event,), daemon=True)
+        crawler.start()
+
+    try:
+        while True:
+            print("\n새로운 루프 시작\n")
+            pipeline.run_once(force="--force" in sys.argv)
+            print(f"{LOOP_INTERVAL}초 대기 후 다음 루프로...\n")
+            time.sleep(LOOP_INTERVAL)
+    except KeyboardInterrupt:
+        print("종료 요청: 크롤러 정리 중")
+        stop_event.set()
+        if crawler:
+            crawler.join(timeout=30)
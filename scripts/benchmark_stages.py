@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+import metrics
+
+# 단계별 확장성 벤치마크.
+# 매치 수(기본 10k/100k/1M)마다 빈 작업 디렉터리에 가짜 매치를 만들고 단계를 순서대로 돌리면서
+# 걸린 시간, tracemalloc 최대 할당량, 프로세스 최대 RSS를 재서 JSON으로 남김.
+# 매치 수마다 따로 프로세스를 띄워서 RSS가 앞 규모의 영향을 받지 않게 함.
+#   python scripts/benchmark_stages.py --sizes 10000,100000 --out LOLCLUSTER/benchmarks
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_ADD_DIR = os.path.join(SCRIPTS_DIR, "..", "ScriptsAdd")
+DEFAULT_SIZES = [10000, 100000, 1000000]
+OUTPUT_DIR = "LOLCLUSTER/benchmarks"
+
+def measure(results, name, func, trace_memory=True):
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+    results.append({
+        "stage": name,
+        "seconds": round(elapsed, 4),
+        "peak_alloc_mb": round(peak / 2 ** 20, 2) if peak is not None else None,
+        "max_rss_mb": metrics.max_rss_mb(),
+    })
+    print(f"  {name}: {elapsed:.2f}s" + (f", 최대 할당 {peak / 2 ** 20:.1f}MB" if peak is not None else ""))
+    return value
+
+def run_size(results, n_matches, n_champions, n_items, trace_memory):
+    # 지금 작업 디렉터리(빈 임시 디렉터리)에서 한 규모를 실행. 결과는 results에 단계마다 쌓임
+    sys.path.insert(0, SCRIPTS_DIR)
+    sys.path.insert(0, SCRIPTS_ADD_DIR)
+    import synthetic_matches
+    import vectorize_champions
+    import cluster_roles
+    import train_recommendation
+    import schema
+    import process_champion_data
+    import generate_enhanced_team_vectors
+    from match_store import MatchStore
+    from item_encoding import to_slot_format
+
+    measure(results, "generate", lambda: synthetic_matches.write(vectorize_champions.DATA_DIR, n_matches, n_champions, n_items), False)
+    matches = measure(results, "read_segments", lambda: list(MatchStore(vectorize_champions.DATA_DIR).iter_matches()), trace_memory)
+    df = measure(results, "extract_features", lambda: vectorize_champions.extract_features(matches), trace_memory)
+    del matches
+    measure(results, "encode_items", lambda: vectorize_champions.encode_items(df), trace_memory)
+    del df
+    measure(results, "vectorize_champions.run", lambda: vectorize_champions.run(incremental=False), trace_memory)
+    measure(results, "cluster_roles.run", lambda: cluster_roles.run(refit=True), trace_memory)
+
+    roles = schema.read("champion_with_roles", columns=["match_id", "team_id", "role_cluster", "win"])
+    measure(results, "create_team_vectors", lambda: train_recommendation.create_team_vectors(roles), trace_memory)
+    del roles
+
+    # ScriptsAdd 빌더들의 팀 벡터 생성 함수를 그대로 부름 (저장/학습은 빼고)
+    full = schema.compact(to_slot_format(schema.read("champion_with_roles")))
+    measure(results, "process_champion_data", lambda: len(process_champion_data.build_team_vectors(full)), trace_memory)
+    measure(results, "generate_enhanced_team_vectors", lambda: len(generate_enhanced_team_vectors.build_team_vectors(full)), trace_memory)
+    del full
+    measure(results, "train_recommendation.run", lambda: train_recommendation.run(full=True), trace_memory)
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--champions", type=int, default=160)
+    parser.add_argument("--items", type=int, default=250)
+    parser.add_argument("--no-trace-memory", action="store_true", help="tracemalloc 없이 시간만 잼 (더 빠름)")
+    parser.add_argument("--out", default=OUTPUT_DIR)
+    parser.add_argument("--keep", action="store_true", help="작업 디렉터리를 지우지 않음")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--child-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # 중간에 실패하거나 메모리가 모자라 죽어도 끝난 단계까지는 남김
+        results = []
+        try:
+            run_size(results, args.child, args.champions, args.items, not args.no_trace_memory)
+        finally:
+            with open(args.child_out, "w", encoding="utf-8") as f:
+                json.dump(results, f)
+        sys.exit(0)
+
+    report = {
+        "commit": git_commit(),
+        "started_at": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "champions": args.champions,
+        "items": args.items,
+        "trace_memory": not args.no_trace_memory,
+        "runs": [],
+    }
+    for size in [int(s) for s in args.sizes.split(",") if s]:
+        print(f"매치 {size}개")
+        workdir = tempfile.mkdtemp(prefix=f"lol_bench_{size}_")
+        child_out = os.path.join(workdir, "result.json")
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", str(size), "--child-out", child_out,
+               "--champions", str(args.champions), "--items", str(args.items)]
+        if args.no_trace_memory:
+            cmd.append("--no-trace-memory")
+        proc = subprocess.run(cmd, cwd=workdir)
+        run = {"matches": size, "ok": proc.returncode == 0, "workdir": workdir if args.keep else None}
+        if os.path.exists(child_out):
+            with open(child_out, "r", encoding="utf-8") as f:
+                run["stages"] = json.load(f)
+        report["runs"].append(run)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"bench_{time.strftime('%Y%m%d_%H%M%S')}_{report['commit'] or 'nogit'}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"벤치마크 결과 저장 → {path}")
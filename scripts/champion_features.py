@@ -0,0 +1,260 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from scipy import sparse
+import dataset_store
+import schema
+import metrics
+
+# 챔피언/상성 특징 저장소. champion_vectors의 새 part만 읽어서 누적함.
+# 챔피언 번호는 schema 챔피언 사전 순서를 그대로 씀 (행렬 [a, b] = 사전 번호 a, b).
+# - games[c], wins[c]: 챔피언별 판 수/승 수
+# - ally_games[a, b], ally_wins[a, b]: 같은 팀으로 함께 나온 판 수/이긴 판 수 (시너지, 대각선 = games)
+# - vs_games[a, b], vs_wins[a, b]: a가 b를 상대로 나온 판 수/a가 이긴 판 수 (카운터)
+# - match_ids: 위 숫자에 들어간 매치 id. 그 판 자신의 결과를 빼는 건 여기 있는 매치만
+#   (범위 밖이거나 저장소를 다시 만들기 전에 들어온 매치는 숫자에 없으므로 빼면 안 됨)
+# 팀을 (팀 수 × 챔피언 수) 희소 원-핫 행렬 T로 만들고 T.T @ T, A.T @ B 같은 행렬곱으로 한 번에 셈.
+# 조회는 배열 인덱싱이라 한 번에 O(1)
+#   python scripts/champion_features.py [--rebuild] [--patches N] [--since YYYY-MM-DD]
+STORE_PATH = "LOLCLUSTER/features/champion_features.npz"
+DATASET = "champion_vectors"
+ARRAY_KEYS = ["games", "wins", "ally_games", "ally_wins", "vs_games", "vs_wins"]
+# 승률을 0.5 쪽으로 당기는 가상 판 수 (판 수가 적은 조합이 극단값으로 튀지 않게)
+PRIOR_GAMES = 10
+
+def empty_store():
+    store = {"parts": {}, "champions": [], "matches": 0, "match_ids": np.array([], dtype=str)}
+    for key in ARRAY_KEYS:
+        shape = (0,) if key in ("games", "wins") else (0, 0)
+        store[key] = np.zeros(shape, dtype=np.int32)
+    return store
+
+def load_store(path=STORE_PATH):
+    if not os.path.exists(path):
+        return empty_store()
+    data = np.load(path)
+    if "match_ids" not in data:
+        # 셈한 매치 id가 없는 예전 저장소는 어떤 판을 빼야 할지 모르므로 처음부터 다시 셈
+        return empty_store()
+    store = json.loads(str(data["meta"]))
+    for key in ARRAY_KEYS + ["match_ids"]:
+        store[key] = data[key]
+    return store
+
+def save_store(store, path=STORE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    meta = {k: v for k, v in store.items() if k not in ARRAY_KEYS and k != "match_ids"}
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, meta=np.array(json.dumps(meta, ensure_ascii=False)), match_ids=store["match_ids"],
+             **{k: store[k] for k in ARRAY_KEYS})
+    os.replace(tmp_path, path)
+
+def resize(store, n):
+    # 사전이 늘어난 만큼 배열 뒤에 0을 붙임 (기존 번호는 그대로)
+    for key in ARRAY_KEYS:
+        old = store[key]
+        shape = (n,) * old.ndim
+        if old.shape != shape:
+            grown = np.zeros(shape, dtype=np.int32)
+            grown[tuple(slice(0, m) for m in old.shape)] = old
+            store[key] = grown
+
+def team_matrix(team_index, codes, n_teams, n_champions):
+    # (팀 수 × 챔피언 수) 0/1 희소 행렬
+    matrix = sparse.csr_matrix(
+        (np.ones(len(codes), dtype=np.int32), (team_index, codes)), shape=(n_teams, n_champions)
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+def add_matches(store, df):
+    # df: match_id, team_id, champion, win (참가자 한 명당 한 행). 양 팀이 다 있는 매치만 셈
+    # 저장소 번호가 사전 앞부분과 같으면 사전 순서를 그대로 따라감
+    champions = schema.load_champions()
+    if champions[:len(store["champions"])] == store["champions"]:
+        store["champions"] = champions
+    store["champions"], _ = schema.update_champions(store["champions"], df["champion"].astype(object).to_numpy())
+    n = len(store["champions"])
+    resize(store, n)
+
+    match_ids = df["match_id"].astype(str).to_numpy()
+    team_ids = df["team_id"].to_numpy()
+    keys = pd.MultiIndex.from_arrays([match_ids, team_ids])
+    team_index, team_keys = pd.factorize(keys)
+    codes = schema.champion_codes(df["champion"].astype(object).to_numpy(), store["champions"]).astype(np.int64)
+    T = team_matrix(team_index, codes, len(team_keys), n)
+    # 팀 승패는 팀 첫 행 값
+    first = np.unique(team_index, return_index=True)[1]
+    team_win = df["win"].to_numpy().astype(bool)[first]
+
+    team_match = team_keys.get_level_values(0).to_numpy()
+    team_side = team_keys.get_level_values(1).to_numpy()
+    blue = pd.Series(np.flatnonzero(team_side == 100), index=team_match[team_side == 100])
+    red = pd.Series(np.flatnonzero(team_side == 200), index=team_match[team_side == 200])
+    blue = blue[~blue.index.duplicated()]
+    red = red[~red.index.duplicated()]
+    both = blue.index.intersection(red.index)
+    a_rows = blue[both].to_numpy()
+    b_rows = red[both].to_numpy()
+    used = np.concatenate([a_rows, b_rows])
+
+    T_used = T[used]
+    win_used = team_win[used]
+    W = sparse.diags(win_used.astype(np.int32), dtype=np.int32)
+    store["games"] += np.asarray(T_used.sum(axis=0)).ravel().astype(np.int32)
+    store["wins"] += np.asarray(T_used[win_used].sum(axis=0)).ravel().astype(np.int32)
+    store["ally_games"] += (T_used.T @ T_used).toarray().astype(np.int32)
+    store["ally_wins"] += (T_used.T @ W @ T_used).toarray().astype(np.int32)
+
+    A, B = T[a_rows], T[b_rows]
+    a_win = sparse.diags(team_win[a_rows].astype(np.int32), dtype=np.int32)
+    b_win = sparse.diags(team_win[b_rows].astype(np.int32), dtype=np.int32)
+    store["vs_games"] += (A.T @ B + B.T @ A).toarray().astype(np.int32)
+    store["vs_wins"] += (A.T @ a_win @ B + B.T @ b_win @ A).toarray().astype(np.int32)
+    store["matches"] += len(both)
+    store["match_ids"] = np.concatenate([store["match_ids"], both.to_numpy().astype(str)])
+    return len(both)
+
+def smoothed(wins, games):
+    return (wins + 0.5 * PRIOR_GAMES) / (games + PRIOR_GAMES)
+
+@metrics.instrument("champion_features")
+def run(rebuild=False, window=None):
+    # window를 주면 (최근 패치/날짜) 그 파티션만 셈
+    window = dataset_store.parse_window([]) if window is None else window
+    store = empty_store() if rebuild else load_store()
+    stamps = dataset_store.part_stamps(DATASET)
+    if not stamps:
+        print("champion_vectors parquet 데이터셋이 없습니다. 특징 저장소 생략.")
+        return store
+    selected = dataset_store.select_parts(DATASET, window)
+    if selected is not None:
+        stamps = {name: stamps[name] for name in selected}
+        print(f"특징 저장소 범위: {dataset_store.describe_window(window)} (part {len(stamps)}개)")
+    # 처리했던 part가 바뀌었거나(vectorize 전체 재작성, 범위 밖으로 밀려남) 범위가 바뀌었으면 처음부터 다시 셈
+    if store["parts"] and (any(stamps.get(name) != stamp for name, stamp in store["parts"].items()) or store.get("window") != window):
+        print("champion_vectors가 다시 쓰였거나 범위가 바뀌어서 특징 저장소를 처음부터 다시 만듭니다.")
+        store = empty_store()
+    store["window"] = window
+    new_parts = [name for name in stamps if name not in store["parts"]]
+    if not new_parts:
+        print("새로운 champion_vectors가 없습니다. 특징 저장소 갱신 생략.")
+        return store
+
+    # vectorize는 매치 단위로 part를 쓰므로 part 하나 안에 양 팀이 다 들어 있음
+    rows = 0
+    matches = 0
+    for name in new_parts:
+        df = dataset_store.read(DATASET, columns=["match_id", "team_id", "champion", "win"], parts=[name], window=window)
+        rows += len(df)
+        matches += add_matches(store, df)
+        store["parts"][name] = stamps[name]
+    save_store(store)
+    metrics.rows(rows_in=rows)
+    metrics.note(matches=matches)
+    print(f"챔피언 특징 저장소 갱신: 매치 {matches}개 추가 (전체 {store['matches']}개, 챔피언 {len(store['champions'])}개) → {STORE_PATH}")
+    return store
+
+class ChampionFeatures:
+    # 조회용. 이름 → 번호 표를 한 번 만들고, 조회는 배열 인덱싱
+    def __init__(self, store=None):
+        self.store = store if store is not None else load_store()
+        self.index = {name: i for i, name in enumerate(self.store["champions"])}
+        s = self.store
+        self.win_rate = smoothed(s["wins"], s["games"])
+        self.synergy = smoothed(s["ally_wins"], s["ally_games"])
+        self.counter = smoothed(s["vs_wins"], s["vs_games"])
+        self.match_ids = pd.Index(s["match_ids"])
+
+    def counted(self, match_ids):
+        # 저장소 숫자에 들어간 매치인지 (bool 배열)
+        return pd.Index(np.asarray(match_ids).astype(str)).isin(self.match_ids)
+
+    def __len__(self):
+        return len(self.index)
+
+    def codes(self, names):
+        # 모르는 챔피언은 -1
+        return np.array([self.index.get(name, -1) for name in names], dtype=np.int64)
+
+    def champion(self, name):
+        i = self.index.get(name)
+        if i is None:
+            return {"games": 0, "win_rate": 0.5}
+        return {"games": int(self.store["games"][i]), "win_rate": float(self.win_rate[i])}
+
+    def pair(self, a, b):
+        # a와 b가 같은 팀일 때 승률, a가 b를 상대할 때 a의 승률
+        i, j = self.index.get(a), self.index.get(b)
+        if i is None or j is None:
+            return {"synergy": 0.5, "counter": 0.5}
+        return {"synergy": float(self.synergy[i, j]), "counter": float(self.counter[i, j])}
+
+    def candidate_scores(self, candidates, ally=(), enemy=()):
+        # 후보마다 (아군과의 평균 시너지, 적군 상대 평균 카운터 승률). 아군/적군이 없으면 0.5
+        c = self.codes(candidates)
+        known = c >= 0
+        result = np.full((len(candidates), 2), 0.5)
+        for col, (others, table) in enumerate([(ally, self.synergy), (enemy, self.counter)]):
+            o = self.codes(others)
+            o = o[o >= 0]
+            if len(o) and known.any():
+                result[known, col] = table[np.ix_(c[known], o)].mean(axis=1)
+        return result
+
+    def team_features(self, ally, enemy=None, win=None, counted=None):
+        # ally, enemy: (팀 수 × 5) 챔피언 번호. win을 주면 그 판 자신의 결과를 빼고 계산 (학습 데이터 누수 방지).
+        # counted: 팀마다 그 판이 저장소 숫자에 들어갔는지 (안 주면 모두 들어간 것으로 봄). 안 들어간 판은 빼지 않음
+        s = self.store
+        ally = np.asarray(ally, dtype=np.int64)
+        n_teams, size = ally.shape
+        if win is None:
+            seen = np.zeros(n_teams)
+        else:
+            seen = np.ones(n_teams) if counted is None else np.asarray(counted, dtype=float)
+        own = np.zeros(n_teams) if win is None else np.asarray(win, dtype=float) * seen
+        valid = ally >= 0
+        a = np.where(valid, ally, 0)
+
+        wr = smoothed(s["wins"][a] - own[:, None], s["games"][a] - seen[:, None])
+        champ_wr = np.where(valid, wr, np.nan)
+
+        i, j = np.triu_indices(size, 1)
+        pair_valid = valid[:, i] & valid[:, j]
+        syn = smoothed(s["ally_wins"][a[:, i], a[:, j]] - own[:, None], s["ally_games"][a[:, i], a[:, j]] - seen[:, None])
+        synergy = np.where(pair_valid, syn, np.nan)
+
+        features = {
+            "champ_win_rate": np.nanmean(np.where(valid.any(axis=1)[:, None], champ_wr, 0.5), axis=1),
+            "synergy": np.nanmean(np.where(pair_valid.any(axis=1)[:, None], synergy, 0.5), axis=1),
+        }
+        if enemy is not None:
+            enemy = np.asarray(enemy, dtype=np.int64)
+            e_valid = enemy >= 0
+            e = np.where(e_valid, enemy, 0)
+            both = valid[:, :, None] & e_valid[:, None, :]
+            vs = smoothed(
+                s["vs_wins"][a[:, :, None], e[:, None, :]] - own[:, None, None],
+                s["vs_games"][a[:, :, None], e[:, None, :]] - seen[:, None, None],
+            )
+            vs = np.where(both, vs, np.nan).reshape(n_teams, -1)
+            features["counter"] = np.nanmean(np.where(both.reshape(n_teams, -1).any(axis=1)[:, None], vs, 0.5), axis=1)
+        return pd.DataFrame(features)
+
+def teams_features(features, teams):
+    # team_features.Teams 행 순서대로 [champ_win_rate, synergy, counter]. 같은 매치 상대 팀이 없으면 counter = 0.5
+    ally = features.codes(teams.column("champion").astype(str).ravel()).reshape(len(teams), -1)
+    keys = pd.Series(np.arange(len(teams)), index=pd.MultiIndex.from_arrays([teams.match_id, teams.team_id]))
+    keys = keys[~keys.index.duplicated()]
+    other_side = np.where(teams.team_id == 100, 200, 100)
+    opponent = keys.reindex(pd.MultiIndex.from_arrays([teams.match_id, other_side])).to_numpy()
+    has_opponent = ~np.isnan(opponent)
+    enemy = np.full_like(ally, -1)
+    enemy[has_opponent] = ally[opponent[has_opponent].astype(np.int64)]
+    return features.team_features(ally, enemy, win=teams.first_win(), counted=features.counted(teams.match_id))
+
+if __name__ == "__main__":
+    import sys
+    run(rebuild="--rebuild" in sys.argv, window=dataset_store.parse_window(sys.argv))
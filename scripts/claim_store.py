@@ -0,0 +1,93 @@
+import time
+import sqlite3
+
+# 크롤러 프로세스 여러 개가 같이 쓰는 선점 기록 (sqlite, WAL).
+# - players: (puuid, 범위) 확장을 누가 언제 가져갔는지. 범위는 "지역:큐" (같은 플레이어라도 지역/큐가 다르면 따로 확장)
+# - matches: match_id 상세 조회를 누가 가져갔는지, 조회가 끝났는지(done)
+# 선점은 INSERT ... ON CONFLICT DO UPDATE ... WHERE 한 문장으로 해서 두 프로세스가 동시에 같은 항목을 가져갈 수 없음.
+# 매치는 요청 바로 앞에서 가져가고 응답을 받자마자 done으로 바꿈 (큐에서 기다리는 동안은 가져가지 않음).
+# 가져간 뒤 lease초 안에 끝내지 못하면(프로세스가 죽은 경우 등) 다른 프로세스가 다시 가져갈 수 있음
+CLAIMED, DONE = "claimed", "done"
+BUSY_TIMEOUT_MS = 30000
+
+class ClaimStore:
+    def __init__(self, path, lease=600.0):
+        self.path = path
+        self.lease = lease
+        # 트랜잭션은 직접 BEGIN IMMEDIATE로 열어서 쓰기 잠금을 처음부터 잡음
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS players ("
+            "puuid TEXT, scope TEXT, shard TEXT, claimed_at REAL, PRIMARY KEY (puuid, scope))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS matches ("
+            "match_id TEXT PRIMARY KEY, shard TEXT, state TEXT, claimed_at REAL)"
+        )
+
+    def claim_player(self, puuid, scope, shard, ttl):
+        # 아무도 안 가져갔거나, 마지막 확장이 ttl보다 오래됐거나, 원래 이 shard 것이면 가져감
+        cur = self.conn.execute(
+            "INSERT INTO players (puuid, scope, shard, claimed_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(puuid, scope) DO UPDATE SET shard=excluded.shard, claimed_at=excluded.claimed_at "
+            "WHERE players.claimed_at<? OR players.shard=excluded.shard",
+            (puuid, scope, shard, time.time(), time.time() - ttl),
+        )
+        return cur.rowcount == 1
+
+    def unclaimed(self, match_ids):
+        # 큐에 넣기 전 거르기용 (읽기만 함): 조회가 끝났거나 다른 shard가 조회 중인 매치를 뺌
+        if not match_ids:
+            return []
+        taken = set()
+        cutoff = time.time() - self.lease
+        for start in range(0, len(match_ids), 500):
+            chunk = match_ids[start:start + 500]
+            taken.update(row[0] for row in self.conn.execute(
+                f"SELECT match_id FROM matches WHERE match_id IN ({','.join('?' * len(chunk))}) "
+                "AND (state=? OR claimed_at>=?)",
+                (*chunk, DONE, cutoff),
+            ))
+        return [m for m in match_ids if m not in taken]
+
+    def claim_match(self, match_id, shard):
+        # 상세 조회 요청 바로 앞에서 부름. 이 shard가 가져갔으면 True
+        now = time.time()
+        cur = self.conn.execute(
+            "INSERT INTO matches (match_id, shard, state, claimed_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(match_id) DO UPDATE SET shard=excluded.shard, claimed_at=excluded.claimed_at "
+            "WHERE matches.state=? AND matches.claimed_at<?",
+            (match_id, shard, CLAIMED, now, CLAIMED, now - self.lease),
+        )
+        return cur.rowcount == 1
+
+    def finish_match(self, match_id, shard):
+        # 조회 성공 직후. 아직 이 shard 것이면 done으로 바꾸고 True.
+        # 기다리는 동안 lease가 지나 다른 shard가 가져갔으면 False (그쪽이 저장하므로 이쪽은 버림)
+        cur = self.conn.execute(
+            "UPDATE matches SET state=? WHERE match_id=? AND shard=? AND state=?",
+            (DONE, match_id, shard, CLAIMED),
+        )
+        return cur.rowcount == 1
+
+    def release_match(self, match_id, shard):
+        # 상세 조회 실패. 다른 shard(또는 다음 실행)가 바로 다시 가져갈 수 있게 풀어 줌
+        self.conn.execute(
+            "DELETE FROM matches WHERE match_id=? AND shard=? AND state=?",
+            (match_id, shard, CLAIMED),
+        )
+
+    def counts(self):
+        result = dict(self.conn.execute("SELECT state, COUNT(*) FROM matches GROUP BY state").fetchall())
+        result["players"] = self.conn.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+        return result
+
+    def close(self):
+        self.conn.close()
+
+if __name__ == "__main__":
+    import sys
+    # python scripts/claim_store.py [경로]
+    print(ClaimStore(sys.argv[1] if len(sys.argv) > 1 else "LOLCLUSTER/data/claims.db").counts())
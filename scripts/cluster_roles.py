@@ -1,24 +1,148 @@
-import pandas as pd
-from sklearn.cluster import KMeans
 import os
+import json
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import KMeans
+from sklearn.metrics import pairwise_distances, pairwise_distances_argmin
+from item_encoding import SLOT_COLS, load_vocab, update_vocab, item_matrix, to_slot_format
+import dataset_store
+import schema
+import metrics
+
+N_CLUSTERS = 5
+STATE_PATH = "LOLCLUSTER/models/role_centroids.npz"
+# 마지막 전체 재학습 이후 새로 들어온 행이 그때 행 수의 이 비율을 넘으면 전체 재학습
+REFIT_RATIO = 0.5
+
+def build_features(df, vocab):
+    # 수치 스탯은 그대로, 아이템은 희소 원-핫으로 붙여서 밀집 행렬을 만들지 않음 (float32로 KMeans 계산량/메모리 절반)
+    stats = df.drop(columns=["champion", "match_id", "team_id", "win"] + SLOT_COLS + schema.MATCH_COLS, errors="ignore")
+    stats = stats.to_numpy(dtype=np.float32)
+    stats[~np.isfinite(stats)] = 0
+    return sparse.hstack([sparse.csr_matrix(stats), item_matrix(df, vocab)], format="csr", dtype=np.float32)
+
+# 상태: 중심점(centers), 군집별 누적 행 수(counts), 처리한 champion_vectors part 목록 등
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return None
+    data = np.load(STATE_PATH)
+    state = json.loads(str(data["meta"]))
+    state["centers"] = data["centers"]
+    state["counts"] = data["counts"]
+    return state
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    meta = {k: v for k, v in state.items() if k not in ("centers", "counts")}
+    tmp_path = STATE_PATH + ".tmp.npz"
+    np.savez(tmp_path, centers=state["centers"], counts=state["counts"], meta=np.array(json.dumps(meta)))
+    os.replace(tmp_path, STATE_PATH)
+
+def pad_centers(centers, n_features):
+    # 어휘는 뒤에만 늘어나므로 새 아이템 열은 0으로 채우면 됨
+    if centers.shape[1] >= n_features:
+        return centers
+    return np.hstack([centers, np.zeros((centers.shape[0], n_features - centers.shape[1]))])
+
+def match_labels(old_centers, new_centers):
+    # 새 중심점을 가장 가까운 예전 중심점의 번호로 맞춤 (헝가리안 매칭) → 새 번호 → 예전 번호 표
+    old_centers = pad_centers(old_centers, new_centers.shape[1])
+    _, cols = linear_sum_assignment(pairwise_distances(new_centers, old_centers))
+    return cols
+
+def full_refit(df, vocab, state, fit_mask=None):
+    # fit_mask를 주면 그 행(학습 범위)으로만 중심점을 정하고, 배정은 전체 행에 함
+    print("전체 재학습: KMeans")
+    X = build_features(df, vocab)
+    model = KMeans(n_clusters=N_CLUSTERS, random_state=42, n_init=10)
+    if fit_mask is None:
+        labels = model.fit_predict(X)
+    else:
+        model.fit(X[fit_mask])
+        labels = model.predict(X)
+    centers = model.cluster_centers_
+    if state is not None:
+        mapping = match_labels(state["centers"], centers)
+        labels = mapping[labels]
+        centers = centers[np.argsort(mapping)]
+    counts = np.bincount(labels, minlength=N_CLUSTERS)
+    return labels, {"centers": centers, "counts": counts, "rows_at_refit": len(df), "rows_since_refit": 0}
 
-def run():
-    df = pd.read_csv("LOLCLUSTER/champion_vectors/champion_vectors.csv")
+def assign_and_update(X, state):
+    # 새 행만 가장 가까운 중심점에 배정하고, 중심점은 누적 평균으로 갱신 (번호는 그대로 유지)
+    centers = pad_centers(state["centers"], X.shape[1])
+    counts = state["counts"].astype(float)
+    labels = pairwise_distances_argmin(X, centers)
+    for k in range(len(centers)):
+        mask = labels == k
+        n = mask.sum()
+        if n == 0:
+            continue
+        batch_sum = np.asarray(X[mask].sum(axis=0)).ravel()
+        centers[k] = (centers[k] * counts[k] + batch_sum) / (counts[k] + n)
+        counts[k] += n
+    state["centers"] = centers
+    state["counts"] = counts
+    return labels
 
-    X = df.drop(columns=["champion", "match_id", "team_id", "win"], errors="ignore")
-    X = X.replace([float("inf"), float("-inf")], float("nan")).fillna(0)
+@metrics.instrument("cluster_roles")
+def run(refit=False, export_csv=False, window=None):
+    # window: 최근 패치/날짜 범위. 전체 재학습 때 중심점을 그 범위 행으로만 정함.
+    # 배정은 항상 이력 전체에 해서 champion_with_roles는 전체가 남고, 범위는 읽는 단계에서 따로 고름
+    window = dataset_store.parse_window([]) if window is None else window
+    state = load_state()
+    stamps = dataset_store.part_stamps("champion_vectors")
+    done = state.get("parts", {}) if state else {}
+    # 처리했던 part가 바뀌었거나(전체 재작성) 범위 설정이 바뀌었거나 예전 CSV뿐이면 전체 재학습
+    rewritten = any(stamps.get(name) != stamp for name, stamp in done.items()) or (state or {}).get("window") != window
+    incremental = bool(
+        state is not None and not refit and not rewritten and stamps
+        and dataset_store.has_dataset("champion_with_roles")
+    )
 
-    model = KMeans(n_clusters=5, random_state=42, n_init=10)
-    df["role_cluster"] = model.fit_predict(X)
+    if incremental:
+        new_parts = [name for name in stamps if name not in done]
+        if not new_parts:
+            print("새로운 champion_vectors가 없습니다. 클러스터링 생략.")
+            return
+        df = schema.compact(to_slot_format(dataset_store.read("champion_vectors", parts=new_parts)))
+        if state["rows_since_refit"] + len(df) > REFIT_RATIO * state["rows_at_refit"]:
+            incremental = False
 
-    output_path = "LOLCLUSTER/champion_vectors/champion_with_roles.csv"
-    if os.path.exists(output_path):
-        prev = pd.read_csv(output_path)
-        df = pd.concat([prev, df], ignore_index=True)
+    if incremental:
+        vocab, _ = update_vocab(load_vocab(), df[SLOT_COLS].to_numpy())
+        df["role_cluster"] = assign_and_update(build_features(df, vocab), state).astype(np.int8)
+        state["rows_since_refit"] += len(df)
+        dataset_store.append("champion_with_roles", df, partitioned=True)
+        print(f"추가 완료: {len(df)}개 → {dataset_store.dataset_path('champion_with_roles')}")
+    else:
+        # 전체 재학습: 이력 전체를 다시 배정하되 번호는 이전 중심점에 맞춰 유지
+        df = schema.compact(to_slot_format(dataset_store.read("champion_vectors")))
         df.drop_duplicates(subset=["match_id", "team_id", "champion"], inplace=True)
+        vocab, _ = update_vocab(load_vocab(), df[SLOT_COLS].to_numpy())
+        fit_mask = None
+        if window:
+            fit_mask = dataset_store.in_window("champion_vectors", df, window)
+            print(f"중심점 학습 범위: {dataset_store.describe_window(window)} ({fit_mask.sum()}행 / 전체 {len(df)}행)")
+            if fit_mask.sum() < N_CLUSTERS:
+                print("범위 안 행이 너무 적어서 전체 행으로 학습합니다.")
+                fit_mask = None
+        labels, fitted = full_refit(df, vocab, state, fit_mask)
+        df["role_cluster"] = labels.astype(np.int8)
+        state = fitted
+        dataset_store.write("champion_with_roles", df, partitioned=True)
+        print(f"저장 완료: {len(df)}개 → {dataset_store.dataset_path('champion_with_roles')}")
 
-    df.to_csv(output_path, index=False)
-    print(f"저장 완료: {len(df)}개 → {output_path}")
+    metrics.rows(rows_in=len(df), rows_out=len(df))
+    metrics.note(mode="incremental" if incremental else "refit")
+    state["parts"] = stamps
+    state["window"] = window
+    save_state(state)
+    if export_csv:
+        dataset_store.export_csv("champion_with_roles")
 
 if __name__ == "__main__":
-    run()
+    import sys
+    # python scripts/cluster_roles.py [--refit] [--csv] [--patches N] [--since YYYY-MM-DD]
+    run(refit="--refit" in sys.argv, export_csv="--csv" in sys.argv, window=dataset_store.parse_window(sys.argv))
@@ -0,0 +1,100 @@
+import os
+import re
+import sys
+import json
+import time
+import threading
+import subprocess
+from collections import Counter
+from dotenv import load_dotenv
+
+# 크롤러 shard 여러 개를 프로세스 하나씩 띄워서 같이 돌림.
+# shard마다 시작 플레이어/지역 라우팅/큐/API 키가 다르고, 수집 결과는 같은 CRAWLER_DATA_DIR에
+# segment_<shard>_XXXX.jsonl.gz 로 따로 쌓임 (vectorize_champions가 전부 읽음).
+# 플레이어/매치 선점은 DATA_DIR/claims.db 하나를 같이 써서 같은 매치를 두 번 조회하지 않음.
+# 같은 키 + 같은 지역을 쓰는 shard끼리는 그 지역 제한을 나눠 씀 (지역이 다르면 제한도 따로).
+# 설정 (LOLCLUSTER/crawler_shards.json):
+#   [
+#     {"name": "kr1", "region": "asia", "queue": 450, "seeds": ["이름#KR1", "이름2#KR1"]},
+#     {"name": "kr2", "region": "asia", "queue": 420, "seeds": ["이름3#KR1"], "api_key_env": "RIOT_API_KEY_2"},
+#     {"name": "euw", "region": "europe", "queue": 450, "seeds": ["name#EUW"]}
+#   ]
+#   선택: api_key_env (기본 RIOT_API_KEY), app_rate_limit, workers, api_base (stub 서버용)
+#   python scripts/crawl_shards.py [설정 경로]
+SHARDS_PATH = os.getenv("CRAWLER_SHARDS", "LOLCLUSTER/crawler_shards.json")
+CRAWLER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recursive_fetch_matches.py")
+SHARD_NAME = re.compile(r"^[A-Za-z0-9-]+$")
+
+def load_shards(path=SHARDS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        shards = json.load(f)
+    names = [shard.get("name", "") for shard in shards]
+    for name in names:
+        # 파일 이름에 들어가므로 '_'는 안 됨 (segment_<shard>_0001 을 나눌 수 없음)
+        if not SHARD_NAME.match(name):
+            raise ValueError(f"shard 이름은 영문/숫자/-만: {name!r}")
+    duplicated = [name for name, n in Counter(names).items() if n > 1]
+    if duplicated:
+        raise ValueError(f"shard 이름 중복: {duplicated}")
+    return shards
+
+def shard_env(shard, shares, claim_path):
+    env = dict(os.environ)
+    key_env = shard.get("api_key_env", "RIOT_API_KEY")
+    if not os.getenv(key_env):
+        raise ValueError(f"{shard['name']}: API 키 환경변수 {key_env}가 비어 있습니다")
+    env.update({
+        "RIOT_API_KEY": os.environ[key_env],
+        "CRAWLER_SHARD": shard["name"],
+        "CRAWLER_REGION": shard.get("region", "asia"),
+        "CRAWLER_QUEUE_ID": str(shard.get("queue", 450)),
+        "CRAWLER_SEEDS": ",".join(shard.get("seeds", [])),
+        "CRAWLER_CLAIM_STORE": claim_path,
+        "RIOT_RATE_LIMIT_SHARE": str(shares[(key_env, shard.get("region", "asia"))]),
+    })
+    for key, env_name in (("app_rate_limit", "RIOT_APP_RATE_LIMIT"), ("workers", "CRAWLER_WORKERS"), ("api_base", "RIOT_API_BASE")):
+        if key in shard:
+            env[env_name] = str(shard[key])
+    if "api_base" not in shard:
+        # 지역마다 라우팅 주소가 다르므로 공통 RIOT_API_BASE는 넘기지 않음
+        env.pop("RIOT_API_BASE", None)
+    return env
+
+def pipe_output(name, stream):
+    # shard 출력 줄마다 [이름]을 붙여서 섞여도 구분되게
+    for line in stream:
+        print(f"[{name}] {line}", end="", flush=True)
+
+def run(shards):
+    data_dir = os.getenv("CRAWLER_DATA_DIR", "LOLCLUSTER/data")
+    os.makedirs(data_dir, exist_ok=True)
+    claim_path = os.getenv("CRAWLER_CLAIM_STORE", os.path.join(data_dir, "claims.db"))
+    shares = Counter((shard.get("api_key_env", "RIOT_API_KEY"), shard.get("region", "asia")) for shard in shards)
+    envs = [shard_env(shard, shares, claim_path) for shard in shards]
+
+    start = time.time()
+    procs = []
+    for shard, env in zip(shards, envs):
+        proc = subprocess.Popen(
+            [sys.executable, CRAWLER_SCRIPT], env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, encoding="utf-8", errors="replace",
+        )
+        thread = threading.Thread(target=pipe_output, args=(shard["name"], proc.stdout), daemon=True)
+        thread.start()
+        procs.append((shard, proc, thread))
+        print(f"shard 시작: {shard['name']} ({env['CRAWLER_REGION']}, 큐 {env['CRAWLER_QUEUE_ID']}, 제한 1/{env['RIOT_RATE_LIMIT_SHARE']})")
+
+    failed = []
+    for shard, proc, thread in procs:
+        code = proc.wait()
+        thread.join()
+        if code != 0:
+            failed.append(shard["name"])
+            print(f"shard 실패: {shard['name']} (종료 코드 {code})")
+    print(f"shard {len(shards)}개 완료: {time.time() - start:.2f}s, 실패 {failed or '없음'}")
+    return failed
+
+if __name__ == "__main__":
+    load_dotenv()
+    failed = run(load_shards(sys.argv[1] if len(sys.argv) > 1 else SHARDS_PATH))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,287 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 단계 사이에 주고받는 데이터셋 저장소.
+# 데이터셋 하나 = LOLCLUSTER/datasets/<이름>/ 아래의 part-XXXXX.parquet 파일들 (zstd 압축, 컬럼 단위).
+# - read(name, columns=[...]) 로 필요한 컬럼만 읽음
+# - append(name, df) 는 새 part 파일 하나만 씀 (기존 파일은 건드리지 않음)
+# - 예전 CSV만 있으면 CSV를 읽고, export_csv로 CSV도 계속 뽑을 수 있음
+# - partitioned=True로 쓰면 patch 열로 나눠서 patch=14.10/part-XXXXX.parquet 에 씀 (한 번 쓸 때 패치마다 part 하나).
+#   날짜는 디렉터리로 나누지 않고 game_creation 열로 둠 → part 끝의 열 통계(최소/최대)로 거르고, 읽을 때 행도 거름
+#   part 이름은 데이터셋 디렉터리 기준 상대 경로이고, 번호는 디렉터리와 상관없이 데이터셋 전체에서 이어짐 (쓴 순서)
+#   select_parts(name, window)로 "최근 N개 패치"/"이 날짜 이후" part만 고르고, read(..., window=window)로 행까지 거름
+DATASET_DIR = "LOLCLUSTER/datasets"
+LEGACY_CSV = {
+    "champion_vectors": "LOLCLUSTER/champion_vectors/champion_vectors.csv",
+    "champion_with_roles": "LOLCLUSTER/champion_vectors/champion_with_roles.csv",
+    "team_vectors": "LOLCLUSTER/champion_vectors/team_vectors.csv",
+    "team_vectors_v3": "LOLCLUSTER/champion_vectors/team_vectors_v3.csv",
+}
+COMPRESSION = "zstd"
+# 파티션 디렉터리에 값이 없을 때 (gameVersion/gameCreation이 없는 매치)
+UNKNOWN = "unknown"
+
+def dataset_path(name):
+    return os.path.join(DATASET_DIR, name)
+
+def part_name(name, part):
+    return os.path.relpath(part, dataset_path(name)).replace(os.sep, "/")
+
+def part_number(part):
+    return int(os.path.basename(part)[5:10])
+
+def list_parts(name):
+    # 파티션 디렉터리 안의 part까지 전부, 쓴 순서(part 번호)대로
+    path = dataset_path(name)
+    if not os.path.isdir(path):
+        return []
+    parts = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if "=" in d]
+        parts += [os.path.join(root, f) for f in files if f.startswith("part-") and f.endswith(".parquet")]
+    return sorted(parts, key=lambda part: (part_number(part), part))
+
+def has_dataset(name):
+    return bool(list_parts(name))
+
+def exists(name):
+    return has_dataset(name) or os.path.exists(LEGACY_CSV.get(name, ""))
+
+def part_stamps(name):
+    # {part 이름: [바이트 크기, 수정 시각(ns)]} - 어떤 part를 이미 처리했는지 기록할 때 씀.
+    # 크기만 보면 같은 이름으로 다시 쓴 part가 우연히 같은 크기일 때 놓치므로 pipeline처럼 mtime도 같이 봄 (json에 넣으므로 list)
+    stamps = {}
+    for part in list_parts(name):
+        st = os.stat(part)
+        stamps[part_name(name, part)] = [st.st_size, st.st_mtime_ns]
+    return stamps
+
+def partition_values(part):
+    # "patch=14.10/part-00003.parquet" → {"patch": "14.10"}
+    return dict(piece.split("=", 1) for piece in part.replace(os.sep, "/").split("/")[:-1] if "=" in piece)
+
+def patch_key(patch):
+    # "14.9" < "14.10" 이 되게 숫자로 비교
+    try:
+        return tuple(int(x) for x in patch.split("."))
+    except ValueError:
+        return ()
+
+def patches(name):
+    # 데이터셋에 있는 패치, 오래된 것부터
+    found = {partition_values(part).get("patch") for part in part_stamps(name)}
+    return sorted((p for p in found if p and p != UNKNOWN), key=patch_key)
+
+def since_ms(window):
+    # window의 since 날짜(UTC 0시)를 game_creation 단위(ms)로
+    if not window or not window.get("since"):
+        return None
+    return pd.Timestamp(window["since"], tz="UTC").value // 10 ** 6
+
+def max_game_creation(part):
+    # part 끝의 열 통계에서 game_creation 최대값 (열이 없거나 통계가 없으면 None)
+    meta = pq.read_metadata(part)
+    names = meta.schema.to_arrow_schema().names
+    if "game_creation" not in names:
+        return None
+    col = names.index("game_creation")
+    values = []
+    for i in range(meta.num_row_groups):
+        stats = meta.row_group(i).column(col).statistics
+        if stats is None or not stats.has_min_max:
+            return None
+        values.append(stats.max)
+    return max(values) if values else None
+
+def select_parts(name, window):
+    # window: {"patches": 최근 패치 수, "since": "YYYY-MM-DD"} (둘 다 주면 둘 다 만족). 없으면 None = 전체
+    # 파티션 없이 쓴 예전 part나 패치를 모르는 part는 범위에 들어가는지 알 수 없어서 뺌
+    if not window:
+        return None
+    wanted = set(patches(name)[-window["patches"]:]) if window.get("patches") else None
+    since = since_ms(window)
+    selected = []
+    for part in list_parts(name):
+        patch = partition_values(part_name(name, part)).get("patch")
+        if patch is None or patch == UNKNOWN or (wanted is not None and patch not in wanted):
+            continue
+        if since is not None:
+            latest = max_game_creation(part)
+            if latest is None or latest < since:
+                continue
+        selected.append(part_name(name, part))
+    return selected
+
+def in_window(name, df, window):
+    # 이미 읽은 프레임에서 window에 들어가는 행 (select_parts + read(window=...)와 같은 기준)
+    mask = np.ones(len(df), dtype=bool)
+    if not window:
+        return mask
+    if window.get("patches"):
+        patch = df["patch"] if "patch" in df.columns else pd.Series(None, index=df.index)
+        mask &= patch.isin(patches(name)[-window["patches"]:]).to_numpy()
+    since = since_ms(window)
+    if since is not None:
+        created = df["game_creation"] if "game_creation" in df.columns else pd.Series(0, index=df.index)
+        mask &= (pd.to_numeric(created, errors="coerce").fillna(0) >= since).to_numpy()
+    return mask
+
+def parse_window(argv):
+    # --patches N / --since YYYY-MM-DD. 없으면 DATA_WINDOW_PATCHES / DATA_WINDOW_SINCE 환경변수 (main.py 파이프라인용)
+    def arg(flag, env):
+        if flag in argv and argv.index(flag) + 1 < len(argv):
+            return argv[argv.index(flag) + 1]
+        return os.getenv(env) or None
+    patches_arg, since = arg("--patches", "DATA_WINDOW_PATCHES"), arg("--since", "DATA_WINDOW_SINCE")
+    if since:
+        since = pd.Timestamp(since).strftime("%Y-%m-%d")
+    if not patches_arg and not since:
+        return None
+    return {"patches": int(patches_arg) if patches_arg else None, "since": since}
+
+def describe_window(window):
+    if not window:
+        return "전체"
+    text = []
+    if window.get("patches"):
+        text.append(f"최근 패치 {window['patches']}개")
+    if window.get("since"):
+        text.append(f"{window['since']} 이후")
+    return ", ".join(text)
+
+def columns(name):
+    parts = list_parts(name)
+    if parts:
+        names = []
+        for part in parts:
+            names += [col for col in pq.read_schema(part).names if col not in names]
+        return names
+    legacy = LEGACY_CSV.get(name)
+    if legacy and os.path.exists(legacy):
+        return pd.read_csv(legacy, nrows=0).columns.tolist()
+    return []
+
+def _to_table(df):
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    if "match_id" in df.columns:
+        df["match_id"] = df["match_id"].astype(str)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+def read(name, columns=None, parts=None, window=None):
+    # parts를 주면 해당 part 이름만 읽음. window를 주면 (parts가 없으면 select_parts로 고르고) since 이전 행도 뺌
+    if window and parts is None:
+        parts = select_parts(name, window)
+    since = since_ms(window)
+    all_parts = list_parts(name)
+    if parts is not None:
+        wanted_parts = set(parts)
+        parts = [part for part in all_parts if part_name(name, part) in wanted_parts]
+        if not parts:
+            return pd.DataFrame(columns=columns or [])
+    else:
+        parts = all_parts
+    if not parts:
+        legacy = LEGACY_CSV.get(name)
+        if legacy and os.path.exists(legacy):
+            wanted = None if columns is None else set(columns)
+            df = pd.read_csv(legacy, usecols=None if wanted is None else (lambda col: col in wanted))
+            if "match_id" in df.columns:
+                df["match_id"] = df["match_id"].astype(str)
+            return df if columns is None else df.reindex(columns=columns)
+        raise FileNotFoundError(f"데이터셋 없음: {name}")
+
+    frames = []
+    for part in parts:
+        available = pq.read_schema(part).names
+        filters = [("game_creation", ">=", since)] if since is not None and "game_creation" in available else None
+        wanted = None if columns is None else [col for col in columns if col in available]
+        frames.append(pq.read_table(part, columns=wanted, filters=filters).to_pandas())
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    return df
+
+def iter_batches(name, parts=None, batch_size=100000, columns=None):
+    # part 파일을 batch_size행씩 나눠 읽음 (전체를 한 번에 올리지 않음)
+    all_parts = list_parts(name)
+    if parts is not None:
+        wanted_parts = set(parts)
+        all_parts = [part for part in all_parts if part_name(name, part) in wanted_parts]
+    for part in all_parts:
+        for batch in pq.ParquetFile(part).iter_batches(batch_size=batch_size, columns=columns):
+            yield part_name(name, part), batch.to_pandas()
+
+def partition_dirs(df):
+    # 행마다 "patch=..." (패치를 모르면 patch=unknown)
+    patch = df["patch"].astype(object).where(df["patch"].notna(), UNKNOWN).astype(str) if "patch" in df.columns else UNKNOWN
+    return "patch=" + pd.Series(patch, index=df.index)
+
+def _write_parts(path, df, index, partitioned):
+    # part 파일들을 쓰고 다음 번호를 돌려줌
+    groups = df.groupby(partition_dirs(df), sort=True) if partitioned and len(df) else [("", df)]
+    for directory, group in groups:
+        part_dir = os.path.join(path, *directory.split("/")) if directory else path
+        os.makedirs(part_dir, exist_ok=True)
+        part_path = os.path.join(part_dir, f"part-{index:05d}.parquet")
+        tmp_path = part_path + ".tmp"
+        pq.write_table(_to_table(group), tmp_path, compression=COMPRESSION)
+        os.replace(tmp_path, part_path)
+        index += 1
+    return index
+
+def append(name, df, partitioned=False):
+    path = dataset_path(name)
+    os.makedirs(path, exist_ok=True)
+    parts = list_parts(name)
+    index = part_number(parts[-1]) + 1 if parts else 0
+    _write_parts(path, df, index, partitioned)
+    return path
+
+def drop(name):
+    path = dataset_path(name)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+
+def write(name, df, partitioned=False):
+    # 새 디렉터리에 다 쓴 뒤 바꿔치기해서 중간에 끊겨도 이전 데이터가 남음
+    path = dataset_path(name)
+    tmp_path = path + ".tmp"
+    if os.path.isdir(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+    _write_parts(tmp_path, df, 0, partitioned)
+    old_path = path + ".old"
+    if os.path.isdir(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    if os.path.isdir(old_path):
+        shutil.rmtree(old_path)
+
+def export_csv(name, path=None):
+    path = path or LEGACY_CSV.get(name) or os.path.join(DATASET_DIR, f"{name}.csv")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    names = columns(name)
+    first = True
+    for part in list_parts(name):
+        df = pq.read_table(part).to_pandas().reindex(columns=names)
+        df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+        first = False
+    print(f"CSV 내보내기 완료: {name} → {path}")
+    return path
+
+if __name__ == "__main__":
+    import sys
+    # python scripts/dataset_store.py export champion_with_roles [경로]
+    if len(sys.argv) > 2 and sys.argv[1] == "export":
+        export_csv(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    else:
+        for name in sorted(os.listdir(DATASET_DIR)) if os.path.isdir(DATASET_DIR) else []:
+            parts = list_parts(name)
+            rows = sum(pq.read_metadata(part).num_rows for part in parts)
+            found = patches(name)
+            print(f"{name}: {rows}행, part {len(parts)}개, 컬럼 {len(columns(name))}개" + (f", 패치 {found[0]}~{found[-1]}" if found else ""))
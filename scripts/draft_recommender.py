@@ -0,0 +1,160 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import schema
+from team_features import N_ROLES, TEAM_SIZE
+from win_predictor import Predictor, load_model
+from champion_features import ChampionFeatures
+
+# 밴픽 추천기. 아군/적군 일부 픽을 받아서 team_model(레지스트리 CURRENT) 승률 기준으로 다음 픽 top-k, 또는 5명 완성 조합을 돌려줌.
+# - 모델 입력은 양 팀 역할 수뿐이라, 후보 챔피언은 역할로 묶어서 점수를 매기고 같은 역할 안에서는 챔피언 승률로 순서를 정함
+# - 역할이 확실하지 않은 챔피언(가장 많이 배정된 역할 비율이 MIN_ROLE_FIT 미만)과 판 수가 적은 챔피언은 후보에서 뺌
+# - 아직 비어 있는 자리는 전체 역할 분포의 기댓값으로 채워서 모델에 넣음
+# - 모델 승률이 같은 후보(같은 역할)끼리는 챔피언 특징 저장소의 아군 시너지/적군 상대 승률 평균으로 순서를 정함
+#   python scripts/draft_recommender.py Ahri,Garen --enemy Lux,Ashe,Leona -k 5
+#   python scripts/draft_recommender.py Ahri,Garen --enemy Lux --complete --beam 8
+MIN_ROLE_FIT = 0.3
+MIN_GAMES = 5
+BEAM_WIDTH = 8
+
+def champion_table():
+    # 챔피언 → 대표 역할, 판 수, 승률, 대표 역할 비율(role_fit)
+    df = schema.read("champion_with_roles", columns=["champion", "role_cluster", "win"])
+    df["win"] = df["win"].astype(float)
+    by_role = df.groupby(["champion", "role_cluster"], observed=True).size().unstack(fill_value=0)
+    games = by_role.sum(axis=1)
+    table = pd.DataFrame({
+        "role_cluster": by_role.idxmax(axis=1).astype(int),
+        "games": games,
+        "win_rate": df.groupby("champion", observed=True)["win"].mean(),
+        "role_fit": by_role.max(axis=1) / games,
+    })
+    table.index = table.index.astype(str)
+    prior = np.bincount(df["role_cluster"].astype(int), minlength=N_ROLES)[:N_ROLES] / max(len(df), 1)
+    return table, prior
+
+class Recommender:
+    def __init__(self, model=None, table=None, prior=None, min_role_fit=MIN_ROLE_FIT, min_games=MIN_GAMES, features=None):
+        if table is None:
+            table, prior = champion_table()
+        self.table = table
+        self.prior = prior
+        # model을 안 주면 Predictor가 레지스트리 CURRENT를 따라감
+        self.predictor = Predictor(model, roles=table["role_cluster"].to_dict())
+        # 저장소가 아직 없으면 모든 조합이 0.5라 순서에 영향 없음
+        self.features = features if features is not None else ChampionFeatures()
+        # 후보 풀: 역할별로 챔피언 승률 내림차순
+        pool = table[(table["role_fit"] >= min_role_fit) & (table["games"] >= min_games)]
+        pool = pool.sort_values(["role_cluster", "win_rate", "games"], ascending=[True, False, False])
+        self.candidates = pool.index.to_numpy()
+        self.candidate_roles = pool["role_cluster"].to_numpy()
+
+    def counts(self, team):
+        roles = [self.predictor.roles.get(c) for c in team]
+        unknown = [c for c, r in zip(team, roles) if r is None]
+        if unknown:
+            raise KeyError(f"모르는 챔피언: {', '.join(unknown)}")
+        if len(team) > TEAM_SIZE:
+            raise ValueError(f"팀은 {TEAM_SIZE}명을 넘을 수 없습니다: {team}")
+        return np.bincount(np.array(roles, dtype=np.int64), minlength=N_ROLES).astype(float)
+
+    def score(self, ally_rows, enemy_row, side):
+        # ally_rows: (n × 역할 수) 아군 역할 수 (빈자리 기댓값 포함), enemy_row: 적군 역할 수 → 아군 승률 n개
+        enemy_rows = np.broadcast_to(enemy_row, ally_rows.shape)
+        X = np.hstack([ally_rows, enemy_rows] if side == 100 else [enemy_rows, ally_rows])
+        # 같은 역할 구성은 한 번만 계산 (모델 호출은 한 번)
+        unique, inverse = np.unique(X, axis=0, return_inverse=True)
+        p = self.predictor.model.predict_proba(unique)[:, 1][inverse.ravel()]
+        return p if side == 100 else 1 - p
+
+    def fill(self, counts, picked):
+        # 남은 자리를 전체 역할 분포 기댓값으로 채움
+        return counts + self.prior * (TEAM_SIZE - picked)
+
+    def available(self, taken):
+        mask = ~np.isin(self.candidates, list(taken))
+        return self.candidates[mask], self.candidate_roles[mask]
+
+    def recommend(self, ally, enemy=(), k=5, bans=(), side=100):
+        if len(ally) >= TEAM_SIZE:
+            raise ValueError("아군 5명이 이미 다 골랐습니다.")
+        enemy_row = self.fill(self.counts(enemy), len(enemy))
+        # 후보마다 [아군 + 후보 역할 + 남은 자리 기댓값] 을 한 배치로 만들어 한 번에 점수 매김
+        base = self.fill(self.counts(ally), len(ally) + 1)
+        names, roles = self.available(set(ally) | set(enemy) | set(bans))
+        if len(names) == 0:
+            return []
+        rows = base + np.eye(N_ROLES)[roles]
+        probs = self.score(rows, enemy_row, side)
+        matchup = self.features.candidate_scores(names, ally, enemy)
+        # 승률 내림차순, 같으면 시너지/카운터 평균, 그다음 후보 풀 순서(역할 안에서 챔피언 승률순)
+        order = np.lexsort([np.arange(len(names)), -matchup.mean(axis=1), -probs])[:k]
+        return [
+            {"champion": names[i], "role_cluster": int(roles[i]), "win_prob": float(probs[i]),
+             "champion_win_rate": float(self.table.at[names[i], "win_rate"]),
+             "synergy": float(matchup[i, 0]), "counter": float(matchup[i, 1])}
+            for i in order
+        ]
+
+    def complete(self, ally, enemy=(), k=3, bans=(), side=100, beam_width=BEAM_WIDTH):
+        # 빔 서치로 아군 5명을 채움. 상태는 (추가한 챔피언 목록, 역할 수), 단계마다 모든 확장을 한 번에 점수 매김
+        if len(ally) >= TEAM_SIZE:
+            raise ValueError("아군 5명이 이미 다 골랐습니다.")
+        enemy_row = self.fill(self.counts(enemy), len(enemy))
+        beams = [((), self.counts(ally))]
+        names, roles = self.available(set(ally) | set(enemy) | set(bans))
+        scores = []
+        for step in range(TEAM_SIZE - len(ally)):
+            picked = len(ally) + step + 1
+            expansions = []
+            seen = set()
+            for added, counts in beams:
+                used = set(added)
+                # 모델은 역할 수만 보므로 역할마다 아직 안 쓴 가장 좋은 챔피언 하나만 확장
+                for role in range(N_ROLES):
+                    choice = next((n for n, r in zip(names, roles) if r == role and n not in used), None)
+                    if choice is None:
+                        continue
+                    new_added = tuple(sorted(added + (choice,)))
+                    if new_added in seen:
+                        continue
+                    seen.add(new_added)
+                    expansions.append((new_added, counts + np.eye(N_ROLES)[role]))
+            if not expansions:
+                return []
+            rows = np.array([self.fill(counts, picked) for _, counts in expansions])
+            probs = self.score(rows, enemy_row, side)
+            order = np.argsort(-probs, kind="stable")[:beam_width]
+            beams = [expansions[i] for i in order]
+            scores = probs[order]
+        return [
+            {"picks": list(added), "team": list(ally) + list(added), "win_prob": float(p)}
+            for (added, _), p in list(zip(beams, scores))[:k]
+        ]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("ally", nargs="?", default="", help="쉼표로 구분한 아군 픽")
+    parser.add_argument("--enemy", default="", help="쉼표로 구분한 적군 픽")
+    parser.add_argument("--bans", default="")
+    parser.add_argument("--side", type=int, default=100, choices=[100, 200])
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--complete", action="store_true", help="아군 5명까지 빔 서치로 채움")
+    parser.add_argument("--beam", type=int, default=BEAM_WIDTH)
+    parser.add_argument("--min-role-fit", type=float, default=MIN_ROLE_FIT)
+    parser.add_argument("--min-games", type=int, default=MIN_GAMES)
+    parser.add_argument("--model", default=None, help="레지스트리 버전(v000003) 또는 .cbm/.pkl 경로 (기본: CURRENT)")
+    args = parser.parse_args()
+
+    split = lambda text: [name for name in text.split(",") if name]
+    recommender = Recommender(load_model(args.model) if args.model else None, min_role_fit=args.min_role_fit, min_games=args.min_games)
+    start = time.perf_counter()
+    if args.complete:
+        result = recommender.complete(split(args.ally), split(args.enemy), args.k, split(args.bans), args.side, args.beam)
+    else:
+        result = recommender.recommend(split(args.ally), split(args.enemy), args.k, split(args.bans), args.side)
+    elapsed = (time.perf_counter() - start) * 1000
+    for row in result:
+        print(row)
+    print(f"({elapsed:.1f}ms)")
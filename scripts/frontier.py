@@ -0,0 +1,75 @@
+import time
+import sqlite3
+
+# 디스크에 남는 BFS 프론티어 (sqlite).
+# - puuid가 기본키라 같은 플레이어가 여러 번 큐에 들어가지 않음
+# - 최근에 게임한 플레이어(last_active가 큰 순)부터, 같으면 얕은 depth부터 꺼냄
+# - 확장이 끝난 플레이어도 ttl이 지나면 다시 큐에 넣을 수 있음 (depth 제한)
+QUEUED, ACTIVE, DONE = "queued", "active", "done"
+
+class Frontier:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            "puuid TEXT PRIMARY KEY, depth INTEGER, last_active INTEGER, "
+            "state TEXT, expanded_at REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS frontier_queue ON frontier(state, last_active DESC, depth)")
+        # 이전 실행이 확장 도중에 끊긴 플레이어는 다시 큐로
+        self.conn.execute("UPDATE frontier SET state=? WHERE state=?", (QUEUED, ACTIVE))
+        self.conn.commit()
+
+    def push(self, puuid, depth, last_active=0):
+        # 처음 보면 추가, 이미 있으면 depth는 작은 값, last_active는 큰 값으로만 갱신
+        self.conn.execute(
+            "INSERT INTO frontier (puuid, depth, last_active, state, expanded_at) VALUES (?, ?, ?, ?, NULL) "
+            "ON CONFLICT(puuid) DO UPDATE SET depth=MIN(depth, excluded.depth), "
+            "last_active=MAX(last_active, excluded.last_active)",
+            (puuid, depth, last_active, QUEUED),
+        )
+
+    def pop(self, max_depth):
+        row = self.conn.execute(
+            "SELECT puuid, depth FROM frontier WHERE state=? AND depth<=? "
+            "ORDER BY last_active DESC, depth LIMIT 1",
+            (QUEUED, max_depth),
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE frontier SET state=? WHERE puuid=?", (ACTIVE, row[0]))
+        return row
+
+    def done(self, puuid):
+        self.conn.execute(
+            "UPDATE frontier SET state=?, expanded_at=? WHERE puuid=?",
+            (DONE, time.time(), puuid),
+        )
+
+    def import_done(self, puuids):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO frontier (puuid, depth, last_active, state, expanded_at) VALUES (?, 0, 0, ?, ?)",
+            ((puuid, DONE, now) for puuid in puuids),
+        )
+        self.conn.commit()
+
+    def requeue_expired(self, ttl, max_depth):
+        cur = self.conn.execute(
+            "UPDATE frontier SET state=? WHERE state=? AND expanded_at<? AND depth<=?",
+            (QUEUED, DONE, time.time() - ttl, max_depth),
+        )
+        self.conn.commit()
+        return cur.rowcount
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state").fetchall())
+
+    def flush(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,76 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# 아이템은 item0~item5 (슬롯별 아이템 id) 6개 컬럼으로만 저장하고,
+# 원-핫이 필요할 때 고정된 어휘(item_vocab.json) 순서로 희소 CSR 행렬을 만듦.
+# 어휘는 새 아이템을 뒤에 붙이기만 하므로 열 번호가 바뀌지 않음
+SLOT_COLS = [f"item{i}" for i in range(6)]
+VOCAB_PATH = "LOLCLUSTER/champion_vectors/item_vocab.json"
+
+def load_vocab(path=VOCAB_PATH):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return []
+
+def save_vocab(vocab, path=VOCAB_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(vocab, f)
+    os.replace(tmp_path, path)
+
+def update_vocab(vocab, slots):
+    known = set(vocab)
+    new_items = sorted(set(np.unique(slots).tolist()) - known)
+    return vocab + new_items, new_items
+
+def item_columns(vocab):
+    return [f"item_{item}" for item in vocab]
+
+def is_legacy(df):
+    return not set(SLOT_COLS).issubset(df.columns) and any(col.startswith("item_") for col in df.columns)
+
+def to_slot_format(df):
+    # 예전 형식(item_XXXX 원-핫 컬럼)을 item0~item5 슬롯 형식으로 바꿈 (아이템 순서는 id 순)
+    if not is_legacy(df):
+        return df
+    item_cols = [col for col in df.columns if col.startswith("item_")]
+    ids = np.array([int(col[len("item_"):]) for col in item_cols])
+    dense = df[item_cols].fillna(0).to_numpy() > 0
+    rows, cols = np.nonzero(dense)
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    slots = np.zeros((len(df), 6), dtype=np.int64)
+    keep = rank < 6
+    slots[rows[keep], rank[keep]] = ids[cols[keep]]
+    df = df.drop(columns=item_cols)
+    for i, col in enumerate(SLOT_COLS):
+        df[col] = slots[:, i]
+    return df
+
+def item_matrix(df, vocab):
+    # (행 수 × 어휘 크기) 0/1 CSR 행렬. 어휘에 없는 아이템은 무시
+    slots = df[SLOT_COLS].to_numpy(dtype=np.int64)
+    n = len(slots)
+    vocab_ids = np.asarray(vocab, dtype=np.int64)
+    if n == 0 or len(vocab_ids) == 0:
+        return sparse.csr_matrix((n, len(vocab_ids)), dtype=np.int8)
+
+    order = np.argsort(vocab_ids)
+    sorted_ids = vocab_ids[order]
+    pos = np.searchsorted(sorted_ids, slots).clip(max=len(sorted_ids) - 1)
+    valid = (sorted_ids[pos] == slots).ravel()
+
+    rows = np.repeat(np.arange(n), 6)[valid]
+    cols = order[pos].ravel()[valid]
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, len(vocab_ids)))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+def item_frame(df, vocab):
+    # 예전처럼 item_XXXX 컬럼이 필요한 곳(CSV 내보내기 등)용. 희소 컬럼이라 밀집 행렬을 만들지 않음
+    return pd.DataFrame.sparse.from_spmatrix(item_matrix(df, vocab), index=df.index, columns=item_columns(vocab))
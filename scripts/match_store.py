@@ -0,0 +1,206 @@
+import os
+import json
+import zlib
+import gzip
+
+# 세그먼트: 매치 하나를 gzip 멤버 하나로 압축해서 이어 붙인 파일 (gzip.open으로 통째로 읽을 수 있음)
+# 인덱스: match_id \t 세그먼트 파일명 \t 오프셋 \t 길이 (한 줄씩 추가만 함)
+# 크롤러 shard는 같은 디렉터리에 segment_<shard>_0001.jsonl.gz, match_index_<shard>.tsv 를 따로 씀
+# (파일을 같이 쓰지 않으므로 잠금이 필요 없고, list_segments는 모든 shard 세그먼트를 돌려줌)
+SEGMENT_PREFIX = "segment_"
+SEGMENT_SUFFIX = ".jsonl.gz"
+INDEX_NAME = "match_index.tsv"
+SEGMENT_SIZE = 1000
+
+def segment_name(index, shard=""):
+    return f"{SEGMENT_PREFIX}{shard + '_' if shard else ''}{index:04d}{SEGMENT_SUFFIX}"
+
+def index_name(shard=""):
+    return f"match_index_{shard}.tsv" if shard else INDEX_NAME
+
+def list_segments(data_dir):
+    if not os.path.isdir(data_dir):
+        return []
+    return sorted(f for f in os.listdir(data_dir) if f.startswith(SEGMENT_PREFIX) and f.endswith(SEGMENT_SUFFIX))
+
+def shard_segments(data_dir, shard=""):
+    # 해당 shard가 쓴 세그먼트만 (shard 없으면 segment_0001 처럼 번호만 있는 것)
+    prefix = SEGMENT_PREFIX + (shard + "_" if shard else "")
+    return [f for f in list_segments(data_dir) if f.startswith(prefix) and f[len(prefix):-len(SEGMENT_SUFFIX)].isdigit()]
+
+def compress_match(match):
+    line = (json.dumps(match, separators=(",", ":")) + "\n").encode("utf-8")
+    return gzip.compress(line)
+
+def decompress_match(blob):
+    return json.loads(zlib.decompress(blob, wbits=31))
+
+def iter_segment(path, offset=0, chunk_size=1 << 16):
+    # offset부터 gzip 멤버를 하나씩 풀면서 (다음 오프셋, 매치)를 돌려줌
+    with open(path, "rb") as f:
+        f.seek(offset)
+        pos = offset
+        pending = b""
+        while True:
+            d = zlib.decompressobj(wbits=31)
+            out = []
+            used = 0
+            while not d.eof:
+                chunk = pending or f.read(chunk_size)
+                pending = b""
+                if not chunk:
+                    # 파일 끝 또는 쓰는 도중에 끊긴 마지막 멤버
+                    return
+                try:
+                    out.append(d.decompress(chunk))
+                except zlib.error:
+                    print(f"경고: {path} 오프셋 {pos} 손상. 이후 무시.")
+                    return
+                used += len(chunk) - len(d.unused_data)
+            pending = d.unused_data
+            pos += used
+            yield pos, json.loads(b"".join(out))
+
+class MatchStore:
+    def __init__(self, data_dir, segment_size=SEGMENT_SIZE, shard=""):
+        self.data_dir = data_dir
+        self.segment_size = segment_size
+        self.shard = shard
+        self.index_path = os.path.join(data_dir, index_name(shard))
+        self._index = None
+        os.makedirs(data_dir, exist_ok=True)
+
+        self._recovered = False
+        segments = shard_segments(data_dir, shard)
+        self.segment_index = int(segments[-1][-len(SEGMENT_SUFFIX) - 4:-len(SEGMENT_SUFFIX)]) if segments else 0
+        self.segment_count = sum(1 for entry in self.index.values() if entry[0] == segment_name(self.segment_index, shard))
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        parts = line.rstrip("\n").split("\t")
+                        if len(parts) != 4:
+                            continue
+                        self._index[parts[0]] = (parts[1], int(parts[2]), int(parts[3]))
+        return self._index
+
+    def recover(self):
+        # 세그먼트를 쓴 뒤 인덱스를 쓰기 전에 죽으면 인덱스에 없는 매치가 세그먼트 끝에 남음.
+        # 그대로 두면 다시 받은 같은 매치가 또 붙어서 세그먼트에 두 번 들어가므로, 처음 쓰기 전에 인덱스에 다시 넣고
+        # 쓰다 끊긴 마지막 멤버는 잘라냄 (그 뒤에 이어 쓰면 읽을 때 거기서 멈추므로).
+        # 쓰는 쪽(append, 크롤러 시작)에서만 부름: 읽기만 하는 쪽이 부르면 쓰는 중인 멤버를 잘라낼 수 있음
+        self._recovered = True
+        ends = {}
+        for name, offset, length in self.index.values():
+            ends[name] = max(ends.get(name, 0), offset + length)
+        index_lines = []
+        for name in shard_segments(self.data_dir, self.shard):
+            path = os.path.join(self.data_dir, name)
+            end = ends.get(name, 0)
+            if os.path.getsize(path) <= end:
+                continue
+            pos = end
+            recovered = len(index_lines)
+            for next_pos, match in iter_segment(path, offset=end):
+                match_id = str(match.get("metadata", {}).get("matchId", ""))
+                if match_id and match_id not in self.index:
+                    self.index[match_id] = (name, pos, next_pos - pos)
+                    index_lines.append(f"{match_id}\t{name}\t{pos}\t{next_pos - pos}\n")
+                pos = next_pos
+            if os.path.getsize(path) > pos:
+                with open(path, "r+b") as f:
+                    f.truncate(pos)
+            print(f"복구: {name} 인덱스에 없던 매치 {len(index_lines) - recovered}개")
+        if index_lines:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.writelines(index_lines)
+            self.segment_count = sum(1 for entry in self.index.values() if entry[0] == segment_name(self.segment_index, self.shard))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, match_id):
+        return match_id in self.index
+
+    def append(self, matches):
+        if not matches:
+            return 0
+        if not self._recovered:
+            self.recover()
+        written = 0
+        index_lines = []
+        seg_file = None
+        try:
+            for match in matches:
+                match_id = str(match.get("metadata", {}).get("matchId", ""))
+                if not match_id or match_id in self.index:
+                    continue
+                if self.segment_count >= self.segment_size:
+                    if seg_file:
+                        seg_file.close()
+                        seg_file = None
+                    self.segment_index += 1
+                    self.segment_count = 0
+                if seg_file is None:
+                    name = segment_name(self.segment_index, self.shard)
+                    seg_file = open(os.path.join(self.data_dir, name), "ab")
+                blob = compress_match(match)
+                offset = seg_file.tell()
+                seg_file.write(blob)
+                self.index[match_id] = (name, offset, len(blob))
+                index_lines.append(f"{match_id}\t{name}\t{offset}\t{len(blob)}\n")
+                self.segment_count += 1
+                written += 1
+        finally:
+            if seg_file:
+                seg_file.close()
+        # 세그먼트를 먼저 쓰고 인덱스를 나중에 써야 인덱스가 없는 데이터를 가리키지 않음
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.writelines(index_lines)
+        return written
+
+    def get(self, match_id):
+        entry = self.index.get(match_id)
+        if entry is None:
+            return None
+        name, offset, length = entry
+        with open(os.path.join(self.data_dir, name), "rb") as f:
+            f.seek(offset)
+            return decompress_match(f.read(length))
+
+    def iter_matches(self):
+        for name in list_segments(self.data_dir):
+            for _, match in iter_segment(os.path.join(self.data_dir, name)):
+                yield match
+
+def migrate_legacy(data_dir):
+    # 예전 matches_XXXX.json 파일을 세그먼트로 옮기고 원본은 .bak으로 바꿔 둠
+    store = MatchStore(data_dir)
+    total = 0
+    for filename in sorted(os.listdir(data_dir)):
+        if not (filename.endswith(".json") and filename.startswith("matches_")):
+            continue
+        with open(os.path.join(data_dir, filename), "r", encoding="utf-8") as f:
+            try:
+                content = json.load(f)
+            except json.JSONDecodeError:
+                print(f"무시: {filename} - JSON 파싱 실패")
+                continue
+        if isinstance(content, list):
+            total += store.append(content)
+        os.replace(os.path.join(data_dir, filename), os.path.join(data_dir, filename + ".bak"))
+    print(f"변환 완료: {total}개 → {data_dir}/{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")
+    print("champion_vectors를 다시 만들려면: python scripts/vectorize_champions.py --full")
+    return total
+
+if __name__ == "__main__":
+    import sys
+    data_dir = sys.argv[2] if len(sys.argv) > 2 else "LOLCLUSTER/data"
+    if len(sys.argv) > 1 and sys.argv[1] == "migrate":
+        migrate_legacy(data_dir)
+    else:
+        print(f"{data_dir}: 매치 {len(MatchStore(data_dir))}개, 세그먼트 {len(list_segments(data_dir))}개")
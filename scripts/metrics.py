@@ -0,0 +1,182 @@
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Windows에는 resource 모듈이 없어서 최대 RSS는 기록하지 않음
+    resource = None
+
+# 단계별 측정값 기록기. 모든 스크립트가 같은 형식으로 한 줄짜리 JSON을 METRICS_PATH에 추가함.
+#   with metrics.stage("cluster_roles") as m:
+#       ...
+#       m.rows(rows_in=len(df), rows_out=len(result))
+# - 벽시계 시간, CPU 시간, 최대 RSS, 입력/출력 행 수, 초당 행 수, 성공/실패를 자동으로 남김
+#   (rows_in/rows_out은 항상 표의 행 수. 매치 수처럼 단위가 다른 값은 matches 등 따로 남김)
+# - METRICS_PROM_PATH를 주면 Prometheus textfile 형식으로 단계별 마지막 값도 씀 (node_exporter textfile collector용)
+# - PROFILE_STAGES=cluster_roles,train_recommendation (또는 all) 이면 해당 단계를 cProfile로 돌리고
+#   LOLCLUSTER/metrics/profiles/ 아래에 .prof 파일과 상위 함수 목록을 남김
+METRICS_PATH = os.getenv("METRICS_PATH", "LOLCLUSTER/metrics/metrics.jsonl")
+PROM_PATH = os.getenv("METRICS_PROM_PATH", "")
+PROFILE_STAGES = set(filter(None, os.getenv("PROFILE_STAGES", "").split(",")))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "LOLCLUSTER/metrics/profiles")
+PROFILE_TOP = 25
+
+_lock = threading.Lock()
+_local = threading.local()
+# Prometheus 파일에 쓸 단계별 마지막 값
+_latest = {}
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    # 리눅스는 KB 단위
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+
+def record(name, **fields):
+    # 한 줄 기록. stage() 밖에서 주기적으로 값을 남길 때도 씀 (크롤러 처리량 등)
+    entry = {"time": time.strftime('%Y-%m-%d %H:%M:%S'), "ts": round(time.time(), 3), "stage": name, **fields}
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    with _lock:
+        directory = os.path.dirname(METRICS_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(METRICS_PATH, "a", encoding="utf-8") as f:
+            f.write(line)
+        _latest[name] = {k: v for k, v in entry.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+        if PROM_PATH:
+            write_prometheus()
+    return entry
+
+def write_prometheus():
+    # 단계/항목마다 lolcluster_<항목>{stage="..."} 값 한 줄.
+    # 스크립트마다 프로세스가 다르므로 기존 파일의 다른 단계 값은 그대로 두고 이 프로세스가 기록한 단계만 바꿈
+    values = {}
+    if os.path.exists(PROM_PATH):
+        with open(PROM_PATH, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("#") or '{stage="' not in line:
+                    continue
+                key, value = line.rsplit(" ", 1)
+                metric, stage_name = key[:-2].split('{stage="')
+                if stage_name not in _latest:
+                    values[(metric, stage_name)] = value.strip()
+    for stage_name, fields in _latest.items():
+        for key, value in fields.items():
+            metric = "lolcluster_last_run_timestamp_seconds" if key == "ts" else f"lolcluster_{key}"
+            values[(metric, stage_name)] = value
+
+    lines = []
+    for metric in sorted({metric for metric, _ in values}):
+        lines.append(f"# TYPE {metric} gauge\n")
+        for (name, stage_name), value in sorted(values.items()):
+            if name == metric:
+                lines.append(f'{metric}{{stage="{stage_name}"}} {value}\n')
+    directory = os.path.dirname(PROM_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = PROM_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    os.replace(tmp_path, PROM_PATH)
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.fields = {}
+
+    def rows(self, rows_in=None, rows_out=None):
+        if rows_in is not None:
+            self.fields["rows_in"] = int(rows_in)
+        if rows_out is not None:
+            self.fields["rows_out"] = int(rows_out)
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+def current():
+    # 지금 스레드에서 실행 중인 가장 안쪽 단계 (없으면 None)
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+def rows(rows_in=None, rows_out=None):
+    # 단계 함수 안에서 현재 단계에 행 수를 남길 때 (단계 밖에서 부르면 무시)
+    m = current()
+    if m is not None:
+        m.rows(rows_in, rows_out)
+
+def note(**fields):
+    # 단계 함수 안에서 현재 단계에 추가 항목을 남길 때 (단계 밖에서 부르면 무시)
+    m = current()
+    if m is not None:
+        m.set(**fields)
+
+def profile_enabled(name):
+    return "all" in PROFILE_STAGES or name in PROFILE_STAGES
+
+@contextmanager
+def stage(name, **fields):
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    # 같은 이름의 단계 안에서 다시 부르면 (파이프라인 → run()) 바깥 것 하나로만 잼
+    if any(m.name == name for m in stack):
+        yield next(m for m in stack if m.name == name)
+        return
+
+    m = Stage(name)
+    m.fields.update(fields)
+    stack.append(m)
+    profiler = cProfile.Profile() if profile_enabled(name) else None
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    status = "ok"
+    if profiler:
+        profiler.enable()
+    try:
+        yield m
+    except BaseException as e:
+        status = "failed"
+        m.fields["error"] = f"{type(e).__name__}: {e}"[:500]
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        wall = time.perf_counter() - start_wall
+        cpu = time.process_time() - start_cpu
+        stack.pop()
+        result = {"status": status, "wall_s": round(wall, 4), "cpu_s": round(cpu, 4), "max_rss_mb": max_rss_mb()}
+        rows_done = m.fields.get("rows_out", m.fields.get("rows_in"))
+        if rows_done is not None:
+            result["rows_per_s"] = round(rows_done / max(wall, 1e-9), 2)
+        if profiler:
+            result["profile"] = save_profile(name, profiler)
+        record(name, **result, **m.fields)
+
+def save_profile(name, profiler):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    with open(path[:-len(".prof")] + ".txt", "w", encoding="utf-8") as f:
+        f.write(out.getvalue())
+    print(f"프로파일 저장: {path} (python -m pstats {path})")
+    return path
+
+def instrument(name):
+    # 함수 전체를 단계로 재는 데코레이터
+    def wrap(func):
+        def inner(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        inner.__name__ = func.__name__
+        inner.__doc__ = func.__doc__
+        return inner
+    return wrap
@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import shutil
+import threading
+
+# 버전별 모델 저장소.
+# LOLCLUSTER/models/registry/<이름>/
+#   v000001/model.cbm   CatBoost 기본 바이너리 형식 (pickle과 달리 파이썬 객체 복원 없이 바로 읽음)
+#   v000001/meta.json   입력 특징 목록, 학습 데이터 지문, 평가 지표, 학습 시간 등
+#   CURRENT             지금 쓰는 버전 이름 한 줄 (임시 파일을 쓴 뒤 os.replace로 바꿔서 반쯤 쓴 상태가 없음)
+# - 버전 디렉터리도 임시 이름으로 다 쓴 뒤 rename 하므로 읽는 쪽은 완성된 버전만 봄
+# - 최근 KEEP_VERSIONS개 + CURRENT 버전만 남기고 오래된 버전은 지움
+#   python scripts/model_registry.py list team_model
+#   python scripts/model_registry.py promote team_model v000003
+#   python scripts/model_registry.py rollback team_model
+REGISTRY_DIR = "LOLCLUSTER/models/registry"
+KEEP_VERSIONS = int(os.getenv("MODEL_KEEP_VERSIONS", "5"))
+MODEL_FILE = "model.cbm"
+META_FILE = "meta.json"
+
+def model_dir(name):
+    return os.path.join(REGISTRY_DIR, name)
+
+def list_versions(name):
+    path = model_dir(name)
+    if not os.path.isdir(path):
+        return []
+    return sorted(v for v in os.listdir(path) if v.startswith("v") and v[1:].isdigit())
+
+def current_version(name):
+    path = os.path.join(model_dir(name), "CURRENT")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        version = f.read().strip()
+    return version or None
+
+def version_path(name, version):
+    return os.path.join(model_dir(name), version)
+
+def load_meta(name, version=None):
+    version = version or current_version(name)
+    if version is None:
+        return None
+    with open(os.path.join(version_path(name, version), META_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def promote(name, version):
+    if version not in list_versions(name):
+        raise FileNotFoundError(f"없는 버전: {name}/{version}")
+    path = os.path.join(model_dir(name), "CURRENT")
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, path)
+    print(f"모델 승격: {name} → {version}")
+
+def rollback(name):
+    # CURRENT 바로 앞 버전으로 되돌림
+    versions = list_versions(name)
+    current = current_version(name)
+    older = [v for v in versions if current is None or v < current]
+    if not older:
+        raise FileNotFoundError(f"되돌릴 이전 버전이 없습니다: {name}")
+    promote(name, older[-1])
+    return older[-1]
+
+def prune(name, keep=KEEP_VERSIONS):
+    versions = list_versions(name)
+    current = current_version(name)
+    removed = [v for v in versions[:-keep] if v != current] if keep > 0 else []
+    for version in removed:
+        shutil.rmtree(version_path(name, version), ignore_errors=True)
+    return removed
+
+def register(name, model, meta=None, promote_to_current=True):
+    # 새 버전으로 저장하고 (기본) CURRENT로 승격. 버전 이름을 돌려줌
+    path = model_dir(name)
+    os.makedirs(path, exist_ok=True)
+    tmp_path = os.path.join(path, f".tmp{os.getpid()}_{time.time_ns()}")
+    os.makedirs(tmp_path)
+    model.save_model(os.path.join(tmp_path, MODEL_FILE), format="cbm")
+    info = {
+        "name": name,
+        "created_at": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "features": list(getattr(model, "feature_names_", None) or []),
+        "trees": model.tree_count_,
+        "params": {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str, bool))},
+        **(meta or {}),
+    }
+    with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+
+    # 다른 프로세스가 같은 번호를 먼저 가져가면 다음 번호로 다시 시도
+    while True:
+        versions = list_versions(name)
+        number = int(versions[-1][1:]) + 1 if versions else 1
+        version = f"v{number:06d}"
+        try:
+            os.rename(tmp_path, version_path(name, version))
+            break
+        except OSError:
+            if not os.path.isdir(version_path(name, version)):
+                raise
+    print(f"모델 등록: {name}/{version}")
+    if promote_to_current:
+        promote(name, version)
+    prune(name)
+    return version
+
+def load(name, version=None):
+    # (모델, meta). 버전을 안 주면 CURRENT
+    from catboost import CatBoostClassifier
+    version = version or current_version(name)
+    if version is None:
+        raise FileNotFoundError(f"등록된 모델 없음: {name}")
+    model = CatBoostClassifier()
+    model.load_model(os.path.join(version_path(name, version), MODEL_FILE), format="cbm")
+    return model, load_meta(name, version)
+
+class CurrentModel:
+    # 처음 쓸 때 읽고, CURRENT가 바뀌면(승격/롤백) 다음 접근 때 다시 읽음.
+    # 서비스는 이 객체 하나를 들고 있으면 재시작 없이 새 버전을 씀
+    def __init__(self, name, check_interval=5.0):
+        self.name = name
+        self.check_interval = check_interval
+        self.version = None
+        self.meta = None
+        self._model = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        now = time.monotonic()
+        if self._model is not None and now - self._checked < self.check_interval:
+            return self._model
+        with self._lock:
+            self._checked = now
+            version = current_version(self.name)
+            if version is None:
+                raise FileNotFoundError(f"등록된 모델 없음: {self.name}")
+            if version != self.version:
+                self._model, self.meta = load(self.name, version)
+                self.version = version
+            return self._model
+
+if __name__ == "__main__":
+    import sys
+    command, name = sys.argv[1], sys.argv[2]
+    if command == "list":
+        current = current_version(name)
+        for version in list_versions(name):
+            meta = load_meta(name, version)
+            scores = {k: meta[k] for k in ("acc", "f1", "rows", "mode") if k in meta}
+            print(f"{'*' if version == current else ' '} {version}  {meta['created_at']}  {scores}")
+    elif command == "promote":
+        promote(name, sys.argv[3])
+    elif command == "rollback":
+        rollback(name)
@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import fnmatch
+import hashlib
+import traceback
+import metrics
+
+# main.py 가 쓰는 파이프라인 실행기.
+# 단계마다 입력 경로(파일/디렉터리 + 패턴)를 정해 두고, 입력의 (경로, 크기, 수정 시각) 지문이
+# 지난번 성공했을 때와 같으면 건너뜀. 실패한 단계는 traceback을 출력하고 그 뒤 단계도 이번 루프에서는 건너뜀
+STATE_PATH = "LOLCLUSTER/pipeline_state.json"
+
+class Stage:
+    def __init__(self, name, func, inputs, deps=()):
+        # inputs: [(경로, 파일명 패턴)] - 경로가 파일이면 패턴은 무시
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.deps = list(deps)
+
+def fingerprint(inputs):
+    h = hashlib.sha1()
+    for path, pattern in inputs:
+        if os.path.isfile(path):
+            files = [path]
+        elif os.path.isdir(path):
+            files = []
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, n) for n in names if fnmatch.fnmatch(n, pattern)]
+        else:
+            files = []
+        for f in sorted(files):
+            try:
+                st = os.stat(f)
+            except FileNotFoundError:
+                continue
+            h.update(f"{f}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+class Pipeline:
+    def __init__(self, stages, state_path=STATE_PATH):
+        self.stages = stages
+        self.state_path = state_path
+        self.state = {}
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                try:
+                    self.state = json.load(f)
+                except json.JSONDecodeError:
+                    print(f"경고: {state_path} 손상됨. 모든 단계 다시 실행.")
+
+    def save_state(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def run_once(self, force=False):
+        results = {}
+        for stage in self.stages:
+            if any(results.get(dep) == "failed" for dep in stage.deps):
+                print(f"건너뜀 (앞 단계 실패): {stage.name}")
+                results[stage.name] = "failed"
+                continue
+            fp = fingerprint(stage.inputs)
+            if not force and self.state.get(stage.name, {}).get("fingerprint") == fp:
+                print(f"변경 없음: {stage.name}")
+                results[stage.name] = "skipped"
+                continue
+
+            print(f"실행 중: {stage.name}")
+            start = time.time()
+            try:
+                # 단계 함수 안에서 같은 이름으로 다시 재지 않고, 실패도 여기서 기록됨
+                with metrics.stage(stage.name):
+                    stage.func()
+            except Exception:
+                traceback.print_exc()
+                print(f"실패: {stage.name}")
+                results[stage.name] = "failed"
+                self.state[stage.name] = {**self.state.get(stage.name, {}), "last_error": time.strftime('%Y-%m-%d %H:%M:%S')}
+                continue
+            elapsed = time.time() - start
+            print(f"완료: {stage.name} ({elapsed:.2f}s)")
+            results[stage.name] = "ran"
+            # 실행 전 지문을 기록해서, 실행 도중 들어온 입력은 다음 루프에서 처리되게 함
+            self.state[stage.name] = {"fingerprint": fp, "elapsed": elapsed, "finished_at": time.strftime('%Y-%m-%d %H:%M:%S')}
+        self.save_state()
+        # 모두 건너뛴 루프는 남기지 않음
+        if any(r != "skipped" for r in results.values()):
+            metrics.record("pipeline_loop", **{status: sum(1 for r in results.values() if r == status) for status in ("ran", "skipped", "failed")})
+        return results
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import pandas as pd
+from catboost import Pool
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+import dataset_store
+import schema
+import metrics
+
+# 팀 벡터 데이터셋을 미리 양자화한 CatBoost Pool로 저장해 두는 캐시.
+# LOLCLUSTER/pools/<데이터셋>/ 아래에 train.qbin, val.qbin, borders.tsv, val.parquet, meta.json 을 둠.
+# - 경계(borders)는 train에서 한 번 정하고 val도 같은 경계로 양자화함
+# - 범주형 열이 있는 양자화 Pool로는 predict를 할 수 없어서 평가용 val 원본(val.parquet)도 같이 둠
+# - meta.json 의 key(형식 버전 + 데이터셋 part 크기 + 설정)가 지금 데이터셋과 다르면 다시 만듦
+POOL_DIR = "LOLCLUSTER/pools"
+POOL_VERSION = 2
+BORDER_COUNT = 254
+VAL_SIZE = 0.2
+RANDOM_STATE = 42
+DROP_COLS = ['match_id', 'team_id', 'win']
+LABEL_COL = 'win'
+
+def pool_path(name):
+    return os.path.join(POOL_DIR, name)
+
+def version_key(name, border_count=BORDER_COUNT):
+    h = hashlib.sha1()
+    h.update(json.dumps({
+        "version": POOL_VERSION,
+        "parts": dataset_store.part_stamps(name),
+        "border_count": border_count,
+        "val_size": VAL_SIZE,
+        "random_state": RANDOM_STATE,
+    }, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+def load_meta(name):
+    path = os.path.join(pool_path(name), "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@metrics.instrument("pool_cache.build")
+def build(name, border_count=BORDER_COUNT):
+    if not dataset_store.has_dataset(name):
+        raise FileNotFoundError(f"parquet 데이터셋 없음: {name}")
+    key = version_key(name, border_count)
+    df = schema.read(name)
+    X = df.drop(columns=DROP_COLS)
+    X.columns = [str(col) for col in X.columns]
+    y = df[LABEL_COL].astype(int)
+    # 범주형 열(챔피언 이름 등)은 여기서 한 번만 찾아서 인덱스로 기록
+    cat_features = [i for i, dtype in enumerate(X.dtypes) if not pd.api.types.is_numeric_dtype(dtype)]
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=VAL_SIZE, random_state=RANDOM_STATE)
+
+    path = pool_path(name)
+    tmp_path = path + ".tmp"
+    if os.path.isdir(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+    borders_path = os.path.join(tmp_path, "borders.tsv")
+
+    start = time.time()
+    train = Pool(X_train, y_train, cat_features=cat_features)
+    train.quantize(border_count=border_count)
+    train.save_quantization_borders(borders_path)
+    val = Pool(X_val, y_val, cat_features=cat_features)
+    val.quantize(input_borders=borders_path)
+    train.save(os.path.join(tmp_path, "train.qbin"))
+    val.save(os.path.join(tmp_path, "val.qbin"))
+    X_val.assign(**{LABEL_COL: y_val}).to_parquet(os.path.join(tmp_path, "val.parquet"), index=False)
+
+    metrics.rows(rows_in=len(df), rows_out=len(df))
+    meta = {
+        "key": key,
+        "dataset": name,
+        "rows": len(df),
+        "train_rows": len(X_train),
+        "val_rows": len(X_val),
+        "features": X.columns.tolist(),
+        "cat_features": cat_features,
+        "border_count": border_count,
+        "created_at": time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    old_path = path + ".old"
+    if os.path.isdir(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    if os.path.isdir(old_path):
+        shutil.rmtree(old_path)
+    print(f"양자화 Pool 저장 완료: {name} (train {len(X_train)}, val {len(X_val)}, {time.time() - start:.2f}s) → {path}")
+    return meta
+
+def load(name, border_count=BORDER_COUNT, rebuild=True):
+    # (train Pool, val Pool, meta). 데이터셋이 바뀌었으면 rebuild=True일 때 다시 만듦
+    meta = load_meta(name)
+    if meta is None or meta["key"] != version_key(name, border_count):
+        if not rebuild:
+            raise FileNotFoundError(f"최신 Pool 없음: {name}")
+        print(f"Pool 캐시 없음/오래됨: {name} → 다시 만듦")
+        meta = build(name, border_count)
+    path = pool_path(name)
+    train = Pool("quantized://" + os.path.join(path, "train.qbin"))
+    val = Pool("quantized://" + os.path.join(path, "val.qbin"))
+    return train, val, meta
+
+def evaluate(model, name):
+    # val 원본으로 (acc, f1, precision, recall)
+    val = pd.read_parquet(os.path.join(pool_path(name), "val.parquet"))
+    y_val = val.pop(LABEL_COL)
+    y_pred = model.predict(val)
+    return (
+        accuracy_score(y_val, y_pred),
+        f1_score(y_val, y_pred, zero_division=0),
+        precision_score(y_val, y_pred, zero_division=0),
+        recall_score(y_val, y_pred, zero_division=0),
+    )
+
+if __name__ == "__main__":
+    import sys
+    # python scripts/pool_cache.py team_vectors_v3 [team_vectors ...]
+    for name in sys.argv[1:] or ["team_vectors", "team_vectors_v3"]:
+        if dataset_store.has_dataset(name):
+            build(name)
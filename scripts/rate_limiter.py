@@ -0,0 +1,142 @@
+import time
+import asyncio
+from collections import deque
+
+# Riot API 제한: 앱 전체(X-App-Rate-Limit)와 엔드포인트별(X-Method-Rate-Limit)에 각각
+# "20:1,100:120" 처럼 여러 개의 (요청 수:초) 창이 걸려 있음.
+# 창마다 최근 요청 시각을 기록해 두고, 모든 창에 여유가 있을 때만 요청을 보냄 (429가 나기 전에 기다림)
+DEFAULT_APP_LIMIT = "20:1,100:120"
+# 같은 API 키 + 같은 지역을 프로세스 share개가 나눠 쓰면 (crawl_shards.py) 제한과 서버가 센 요청 수를 share로 나눠서
+# 각자 1/share 만큼만 씀. 지역이 다르면 Riot 제한도 따로라서 나누지 않음
+# 서버는 요청을 받은 시각 기준으로 창을 세므로, 보낸 시각 기준인 여기서는 조금 더 기다림
+SAFETY_MARGIN = 0.1
+
+def parse_limits(header):
+    limits = []
+    for part in (header or "").split(","):
+        if ":" not in part:
+            continue
+        count, seconds = part.split(":", 1)
+        try:
+            limits.append((int(count), float(seconds)))
+        except ValueError:
+            continue
+    return limits
+
+class Window:
+    def __init__(self, limit, seconds):
+        self.limit = limit
+        self.seconds = seconds
+        self.stamps = deque()
+
+    def _trim(self, now):
+        while self.stamps and self.stamps[0] <= now - self.seconds:
+            self.stamps.popleft()
+
+    def wait_time(self, now):
+        self._trim(now)
+        if len(self.stamps) < self.limit:
+            return 0.0
+        return self.stamps[0] + self.seconds - now + SAFETY_MARGIN
+
+    def record(self, now):
+        self.stamps.append(now)
+
+    def sync(self, server_count, now):
+        # 서버가 센 요청 수가 더 많으면 (다른 프로세스가 같은 키를 쓰는 경우 등) 그만큼 채워 둠
+        self._trim(now)
+        while len(self.stamps) < min(server_count, self.limit):
+            self.stamps.append(now)
+
+class Bucket:
+    def __init__(self, limits):
+        self.windows = [Window(limit, seconds) for limit, seconds in limits]
+        self.blocked_until = 0.0
+
+    def set_limits(self, limits):
+        if limits == [(w.limit, w.seconds) for w in self.windows]:
+            return
+        old = {w.seconds: w.stamps for w in self.windows}
+        self.windows = [Window(limit, seconds) for limit, seconds in limits]
+        for w in self.windows:
+            w.stamps = old.get(w.seconds, deque())
+
+    def wait_time(self, now):
+        wait = self.blocked_until - now
+        for w in self.windows:
+            wait = max(wait, w.wait_time(now))
+        return max(wait, 0.0)
+
+    def record(self, now):
+        for w in self.windows:
+            w.record(now)
+
+    def sync(self, counts, now):
+        for count, seconds in counts:
+            for w in self.windows:
+                if w.seconds == seconds:
+                    w.sync(count, now)
+
+def share_limits(limits, share):
+    if share <= 1:
+        return limits
+    return [(max(count // share, 1), seconds) for count, seconds in limits]
+
+def share_counts(counts, share):
+    if share <= 1:
+        return counts
+    return [(-(-count // share), seconds) for count, seconds in counts]
+
+class RateLimiter:
+    def __init__(self, app_limit=DEFAULT_APP_LIMIT, share=1):
+        self.share = share
+        self.app = Bucket(share_limits(parse_limits(app_limit), share))
+        self.methods = {}
+        self.method_locks = {}
+        self.lock = None
+        self.throttled = 0
+
+    def _method(self, method):
+        if method not in self.methods:
+            self.methods[method] = Bucket([])
+        return self.methods[method]
+
+    async def acquire(self, method):
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        if method not in self.method_locks:
+            self.method_locks[method] = asyncio.Lock()
+        bucket = self._method(method)
+        # 엔드포인트 락 안에서 기다려서 같은 엔드포인트는 먼저 온 요청부터 나감.
+        # 앱 락은 확인/기록하는 동안만 잡음 (한 엔드포인트가 막혀 기다리는 동안 다른 엔드포인트는 계속 나감)
+        async with self.method_locks[method]:
+            while True:
+                async with self.lock:
+                    now = time.monotonic()
+                    wait = max(self.app.wait_time(now), bucket.wait_time(now))
+                    if wait <= 0:
+                        self.app.record(now)
+                        bucket.record(now)
+                        return
+                await asyncio.sleep(wait)
+
+    def update(self, method, headers):
+        now = time.monotonic()
+        bucket = self._method(method)
+        app_limits = share_limits(parse_limits(headers.get("X-App-Rate-Limit")), self.share)
+        if app_limits:
+            self.app.set_limits(app_limits)
+            self.app.sync(share_counts(parse_limits(headers.get("X-App-Rate-Limit-Count")), self.share), now)
+        method_limits = share_limits(parse_limits(headers.get("X-Method-Rate-Limit")), self.share)
+        if method_limits:
+            bucket.set_limits(method_limits)
+            bucket.sync(share_counts(parse_limits(headers.get("X-Method-Rate-Limit-Count")), self.share), now)
+
+    def penalize(self, method, retry_after, limit_type=None):
+        self.throttled += 1
+        until = time.monotonic() + retry_after
+        if limit_type == "method":
+            bucket = self._method(method)
+            bucket.blocked_until = max(bucket.blocked_until, until)
+        else:
+            self.app.blocked_until = max(self.app.blocked_until, until)
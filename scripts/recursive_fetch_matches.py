@@ -1,152 +1,311 @@
-import os, json, asyncio, aiohttp
+import os, json, time, asyncio, aiohttp
 from dotenv import load_dotenv
-from collections import deque
+from match_store import MatchStore
+from seen_store import SeenSet
+from rate_limiter import RateLimiter, DEFAULT_APP_LIMIT
+from frontier import Frontier
+from response_cache import ResponseCache
+from claim_store import ClaimStore
+import metrics
 
 load_dotenv()
 API_KEY = os.getenv("RIOT_API_KEY")
 GAME_NAME = os.getenv("SEED_GAME_NAME")
 TAG_LINE = os.getenv("SEED_TAG_LINE")
 HEADERS = {"X-Riot-Token": API_KEY}
-REGION = "asia"
-QUEUE_ID = 450
+# shard 이름/지역 라우팅/큐/시작 플레이어는 환경변수로 (scripts/crawl_shards.py가 shard마다 넣어 줌)
+SHARD = os.getenv("CRAWLER_SHARD", "")
+REGION = os.getenv("CRAWLER_REGION", "asia")
+QUEUE_ID = int(os.getenv("CRAWLER_QUEUE_ID", "450"))
+# "이름#태그,이름#태그" 형식. 없으면 SEED_GAME_NAME/SEED_TAG_LINE 한 명
+SEEDS = [tuple(seed.strip().split("#", 1)) for seed in os.getenv("CRAWLER_SEEDS", "").split(",") if "#" in seed] or [(GAME_NAME, TAG_LINE)]
+# 로컬 stub 서버(scripts/riot_stub_server.py)로 돌릴 때는 RIOT_API_BASE=http://localhost:8080
+API_BASE = os.getenv("RIOT_API_BASE", f"https://{REGION}.api.riotgames.com")
 
 SAVE_INTERVAL = 100
 FILE_INTERVAL = 1000
 MAX_DEPTH = 4
-semaphore = asyncio.Semaphore(10)
+# 확장이 끝난 플레이어를 다시 조회하기까지의 시간(초)과 재조회할 최대 depth
+REEXPAND_TTL = float(os.getenv("REEXPAND_TTL", str(24 * 3600)))
+REEXPAND_MAX_DEPTH = int(os.getenv("REEXPAND_MAX_DEPTH", "2"))
+# exact / hashed / bloom (bloom은 메모리 고정, 드물게 새 항목을 이미 본 것으로 판단할 수 있음)
+DEDUPE_MODE = os.getenv("DEDUPE_MODE", "exact")
+BLOOM_CAPACITY = int(os.getenv("DEDUPE_BLOOM_CAPACITY", "10000000"))
+WORKERS = int(os.getenv("CRAWLER_WORKERS", "10"))
+# off / cache / record / replay (replay는 녹화된 응답만으로 오프라인 실행)
+CACHE_MODE = os.getenv("CACHE_MODE", "cache")
+# 크롤링 중 처리량/429/큐 길이를 metrics에 남기는 간격(초)
+METRICS_INTERVAL = float(os.getenv("CRAWLER_METRICS_INTERVAL", "30"))
+# 같은 키 + 같은 지역을 같이 쓰는 shard 수 (crawl_shards.py가 넣어 줌)
+rate_limiter = RateLimiter(os.getenv("RIOT_APP_RATE_LIMIT", DEFAULT_APP_LIMIT), share=int(os.getenv("RIOT_RATE_LIMIT_SHARE", "1")))
 
-DATA_DIR = "LOLCLUSTER/data"
+DATA_DIR = os.getenv("CRAWLER_DATA_DIR", "LOLCLUSTER/data")
+# 리플레이 벤치마크는 빈 CRAWLER_DATA_DIR + 녹화해 둔 RESPONSE_CACHE_PATH 로 돌리면 됨
 os.makedirs(DATA_DIR, exist_ok=True)
 
-def load_set(path):
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-                return set(data)
-            except json.JSONDecodeError:
-                print(f"경고: {path} 파일이 비어 있거나 손상됨. 빈 set으로 처리.")
-                return set()
-    return set()
-
-def save_set(data, path):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(list(data), f)
-
-def get_file_index_and_total():
-    files = [f for f in os.listdir(DATA_DIR) if f.startswith("matches_") and f.endswith(".json")]
-    if not files:
-        return 0, 0
-    files.sort()
-    latest = files[-1]
-    index = int(latest.split("_")[1].split(".")[0])
-    with open(os.path.join(DATA_DIR, latest), "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return index, len(data)
-
-collected_matches = load_set(os.path.join(DATA_DIR, "collected_matches.json"))
-visited_puuids = load_set(os.path.join(DATA_DIR, "visited_puuids.json"))
+def shard_file(name):
+    # shard마다 따로 쓰는 파일 이름 (frontier_kr.db 처럼). shard가 없으면 예전 이름 그대로
+    base, ext = os.path.splitext(name)
+    return f"{base}_{SHARD}{ext}" if SHARD else name
+
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(DATA_DIR, shard_file("response_cache.db")))
+# 여러 shard가 같이 쓰는 선점 기록. shard를 쓰면 기본으로 DATA_DIR/claims.db, 혼자 돌 때는 설정한 경우만
+CLAIM_STORE_PATH = os.getenv("CRAWLER_CLAIM_STORE", os.path.join(DATA_DIR, "claims.db") if SHARD else "")
+# 상세 조회를 가져간 뒤 이 시간(초) 안에 저장하지 못하면 다른 shard가 다시 가져감
+CLAIM_LEASE = float(os.getenv("CRAWLER_CLAIM_LEASE", "600"))
+
+def load_set(name):
+    return SeenSet(
+        os.path.join(DATA_DIR, f"{name}.log"),
+        legacy_path=os.path.join(DATA_DIR, f"{name}.json"),
+        mode=DEDUPE_MODE,
+        bloom_capacity=BLOOM_CAPACITY,
+    )
+
+def load_frontier():
+    path = os.path.join(DATA_DIR, shard_file("frontier.db"))
+    is_new = not os.path.exists(path)
+    frontier = Frontier(path)
+    if is_new:
+        # 예전 visited_puuids 기록은 이미 확장한 플레이어로 옮김
+        for legacy in ("visited_puuids.log", "visited_puuids.json"):
+            legacy_path = os.path.join(DATA_DIR, legacy)
+            if not os.path.exists(legacy_path):
+                continue
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                if legacy.endswith(".json"):
+                    try:
+                        puuids = json.load(f)
+                    except json.JSONDecodeError:
+                        puuids = []
+                else:
+                    puuids = f.read().split()
+            frontier.import_done(puuids)
+            os.replace(legacy_path, legacy_path + ".bak")
+            print(f"변환 완료: {legacy_path} → {path} ({len(puuids)}개)")
+    return frontier
+
+collected_matches = load_set(shard_file("collected_matches"))
+frontier = load_frontier()
 match_data = []
-file_index, file_total = get_file_index_and_total()
+pending_matches = set()
+# 실제로 보낸 요청 수 / 받은 429 수 (캐시 적중은 세지 않음)
+request_stats = {"requests": 0, "429": 0}
+response_cache = None if CACHE_MODE == "off" else ResponseCache(RESPONSE_CACHE_PATH, CACHE_MODE)
+match_store = MatchStore(DATA_DIR, segment_size=FILE_INTERVAL, shard=SHARD)
+# 지난 실행이 인덱스를 쓰기 전에 죽었으면 세그먼트에만 있는 매치를 인덱스로 되살림 (다시 받아서 두 번 저장하지 않게)
+match_store.recover()
+claims = ClaimStore(CLAIM_STORE_PATH, lease=CLAIM_LEASE) if CLAIM_STORE_PATH else None
 
 def save_batch():
-    global match_data, file_index, file_total
+    written = match_store.append(match_data)
+    print(f"저장 완료 {written}개 → {DATA_DIR} (총: {len(match_store)})")
+
+    match_data.clear()
 
-    path = os.path.join(DATA_DIR, f"matches_{file_index:04d}.json")
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            existing = json.load(f)
-    else:
-        existing = []
+    collected_matches.flush()
+    frontier.flush()
+    if response_cache:
+        response_cache.flush()
 
-    existing += match_data
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(existing, f, indent=2)
-    print(f"저장 완료 {len(match_data)}개 → {path} (총: {len(existing)})")
+async def safe_get(session, url, method):
+    if response_cache:
+        body = response_cache.get(url, method)
+        if body is not None:
+            return json.loads(body)
+        if response_cache.offline:
+            return None
 
-    match_data.clear()
-    file_total = len(existing)
-
-    save_set(collected_matches, os.path.join(DATA_DIR, "collected_matches.json"))
-    save_set(visited_puuids, os.path.join(DATA_DIR, "visited_puuids.json"))
-
-    if file_total >= FILE_INTERVAL:
-        file_index += 1
-        file_total = 0
-
-async def safe_get(session, url):
-    async with semaphore:
-        for _ in range(3):
-            try:
-                async with session.get(url, headers=HEADERS) as res:
-                    if res.status == 200:
-                        return await res.json()
-                    elif res.status == 429:
-                        retry = float(res.headers.get("Retry-After", 1.5))
-                        print(f"Rate Limit 발생. {retry}초 대기")
-                        await asyncio.sleep(retry)
-                    else:
-                        print(f"요청 실패: {url} | 상태코드: {res.status}")
-                        return None
-            except Exception as e:
-                print(f"예외 발생: {e}")
-                await asyncio.sleep(1)
+    for _ in range(3):
+        await rate_limiter.acquire(method)
+        try:
+            request_stats["requests"] += 1
+            async with session.get(url, headers=HEADERS) as res:
+                rate_limiter.update(method, res.headers)
+                if res.status == 200:
+                    body = await res.read()
+                    if response_cache:
+                        response_cache.put(url, method, body)
+                    return json.loads(body)
+                elif res.status == 429:
+                    request_stats["429"] += 1
+                    retry = float(res.headers.get("Retry-After", 1.5))
+                    print(f"Rate Limit 발생. {retry}초 대기")
+                    rate_limiter.penalize(method, retry, res.headers.get("X-Rate-Limit-Type"))
+                else:
+                    print(f"요청 실패: {url} | 상태코드: {res.status}")
+                    return None
+        except Exception as e:
+            print(f"예외 발생: {e}")
+            await asyncio.sleep(1)
     return None
 
 async def get_puuid(session, game_name, tag_line):
-    url = f"https://{REGION}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
+    url = f"{API_BASE}/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
     print(f"PUUID 요청: {game_name}#{tag_line}")
-    data = await safe_get(session, url)
+    data = await safe_get(session, url, "account")
     if data and 'puuid' in data:
         print(f"PUUID 성공: {data['puuid']}")
         return data['puuid']
     print("PUUID 실패: 확인 필요")
     return None
 
-async def fetch_matches_bfs(session, root_puuid):
-    queue = deque([(root_puuid, 0)])
+async def expand_player(session, puuid, depth, detail_queue):
+    print(f"{depth}단계 매치 조회 중: {puuid}")
+    url = f"{API_BASE}/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count=100&queue={QUEUE_ID}"
+    match_ids = await safe_get(session, url, "match-ids") or []
 
-    while queue:
-        puuid, depth = queue.popleft()
-        if puuid in visited_puuids or depth > MAX_DEPTH:
-            continue
-        visited_puuids.add(puuid)
+    new_ids = [m for m in match_ids if m not in collected_matches and m not in pending_matches and m not in match_store]
+    if claims:
+        # 다른 shard가 이미 조회했거나 조회 중인 매치는 빠짐 (실제 선점은 fetch_detail에서 요청 직전에)
+        new_ids = claims.unclaimed(new_ids)
+    for match_id in new_ids:
+        pending_matches.add(match_id)
+        detail_queue.put_nowait((match_id, depth))
 
-        print(f"{depth}단계 매치 조회 중: {puuid}")
-        url = f"https://{REGION}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count=100&queue={QUEUE_ID}"
-        match_ids = await safe_get(session, url) or []
+async def fetch_detail(session, match_id, depth):
+    # 큐에서 기다리는 동안 다른 shard가 가져갔을 수 있으므로 요청 바로 앞에서 선점
+    if claims and not claims.claim_match(match_id, SHARD):
+        pending_matches.discard(match_id)
+        return
+    print(f"→ 매치 수집: {match_id}")
+    detail_url = f"{API_BASE}/lol/match/v5/matches/{match_id}"
+    match = await safe_get(session, detail_url, "match-detail")
+    pending_matches.discard(match_id)
+    if not match:
+        if claims:
+            claims.release_match(match_id, SHARD)
+        return
+    if claims and not claims.finish_match(match_id, SHARD):
+        # 요청이 lease보다 오래 걸려서 다른 shard가 가져간 경우. 그쪽 것을 남기고 이건 버림
+        return
+    # 상세 조회에 성공한 매치만 수집 완료로 기록 (실패하면 다음에 다시 시도)
+    collected_matches.add(match_id)
+    match_data.append(match)
 
-        for match_id in match_ids:
-            if match_id in collected_matches:
-                continue
-            collected_matches.add(match_id)
+    last_active = match.get('info', {}).get('gameCreation', 0)
+    for p_puuid in match.get('metadata', {}).get('participants', []):
+        frontier.push(p_puuid, depth + 1, last_active)
+
+    if len(match_data) >= SAVE_INTERVAL:
+        save_batch()
+
+async def fetch_matches_bfs(session, root_puuids, workers=WORKERS):
+    # 작업자 여러 개가 디스크 프론티어와 상세 조회 큐를 같이 소비함.
+    # 상세 조회를 먼저 처리해서 큐가 한없이 커지지 않게 하고, 모든 큐가 비고 아무도 일하지 않으면 종료
+    detail_queue = asyncio.Queue()
+    for root_puuid in root_puuids:
+        frontier.push(root_puuid, 0, int(time.time() * 1000))
+    requeued = frontier.requeue_expired(REEXPAND_TTL, REEXPAND_MAX_DEPTH)
+    print(f"프론티어: {frontier.counts()} (재조회 대상 {requeued}명)")
+    busy = 0
 
-            print(f"→ 매치 수집: {match_id}")
-            detail_url = f"https://{REGION}.api.riotgames.com/lol/match/v5/matches/{match_id}"
-            match = await safe_get(session, detail_url)
-            if not match:
+    async def worker():
+        nonlocal busy
+        while True:
+            if not detail_queue.empty():
+                match_id, depth = detail_queue.get_nowait()
+                busy += 1
+                try:
+                    await fetch_detail(session, match_id, depth)
+                finally:
+                    busy -= 1
                 continue
-            match_data.append(match)
+            item = frontier.pop(MAX_DEPTH)
+            if item is not None:
+                puuid, depth = item
+                if claims and not claims.claim_player(puuid, f"{REGION}:{QUEUE_ID}", SHARD, REEXPAND_TTL):
+                    # 다른 shard가 같은 지역/큐로 이미 확장한 플레이어
+                    frontier.done(puuid)
+                    continue
+                busy += 1
+                try:
+                    await expand_player(session, puuid, depth, detail_queue)
+                    frontier.done(puuid)
+                finally:
+                    busy -= 1
+            elif busy == 0:
+                return
+            else:
+                await asyncio.sleep(0.05)
 
-            if len(match_data) >= SAVE_INTERVAL:
-                save_batch()
-                continue 
+    async def report():
+        # METRICS_INTERVAL마다 그 사이 요청 처리량과 큐 길이를 남김
+        last_requests, last_time = request_stats["requests"], time.monotonic()
+        while True:
+            await asyncio.sleep(METRICS_INTERVAL)
+            now = time.monotonic()
+            counts = frontier.counts()
+            metrics.record(
+                f"crawler_progress.{SHARD}" if SHARD else "crawler_progress",
+                requests_per_s=round((request_stats["requests"] - last_requests) / (now - last_time), 2),
+                http_429=request_stats["429"],
+                detail_queue=detail_queue.qsize(),
+                frontier_queued=counts.get("queued", 0),
+                busy_workers=busy,
+                collected=len(collected_matches),
+            )
+            last_requests, last_time = request_stats["requests"], now
 
-            for p_puuid in match.get('metadata', {}).get('participants', []):
-                if p_puuid not in visited_puuids:
-                    queue.append((p_puuid, depth + 1))
+    reporter = asyncio.create_task(report())
+    try:
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    finally:
+        reporter.cancel()
 
-async def main():
+async def crawl():
+    # 한 번 크롤링하고 저장까지 함 (main.py 파이프라인은 이 함수를 반복 호출)
+    # 카운터는 프로세스 전체 누적이라 이번 실행분만 차이로 남김
+    before = (request_stats["requests"], request_stats["429"], rate_limiter.throttled)
+    cache_before = (response_cache.hits, response_cache.misses) if response_cache else None
+    with metrics.stage(f"crawler.{SHARD}" if SHARD else "crawler") as m:
+        new_matches = await crawl_once()
+        m.set(
+            matches=new_matches,
+            requests=request_stats["requests"] - before[0],
+            http_429=request_stats["429"] - before[1],
+            throttled=rate_limiter.throttled - before[2],
+            frontier=frontier.counts(),
+        )
+        if SHARD:
+            m.set(shard=SHARD, region=REGION, queue=QUEUE_ID)
+        if cache_before:
+            m.set(cache_hits=response_cache.hits - cache_before[0], cache_misses=response_cache.misses - cache_before[1])
+    return new_matches
+
+async def crawl_once():
+    start = time.time()
+    collected_before = len(collected_matches)
+    requests_before = request_stats["requests"]
     async with aiohttp.ClientSession() as session:
-        puuid = await get_puuid(session, GAME_NAME, TAG_LINE)
-        if not puuid:
+        puuids = [puuid for puuid in [await get_puuid(session, name, tag) for name, tag in SEEDS] if puuid]
+        if not puuids:
             print("PUUID 가져오기 실패")
-            return
-        await fetch_matches_bfs(session, puuid)
+            return 0
+        await fetch_matches_bfs(session, puuids)
 
     if match_data:
         save_batch()
+    collected_matches.flush()
+    frontier.flush()
+    if response_cache:
+        response_cache.flush()
+        print(f"응답 캐시: hit {response_cache.hits}, miss {response_cache.misses}")
+    elapsed = time.time() - start
+    new_matches = len(collected_matches) - collected_before
+    requests = request_stats["requests"] - requests_before
+    metrics.note(requests_per_s=round(requests / max(elapsed, 1e-9), 2))
+    print(f"이번 실행: {new_matches}개, {elapsed:.2f}s ({new_matches / max(elapsed, 1e-9):.1f} match/s, {requests / max(elapsed, 1e-9):.1f} req/s)")
     print(f"총 수집된 match 수: {len(collected_matches)}")
+    return new_matches
+
+async def main():
+    await crawl()
+    frontier.close()
+    if claims:
+        claims.close()
+    if response_cache:
+        response_cache.close()
 
 if __name__ == "__main__":
     if os.name == 'nt':
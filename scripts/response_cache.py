@@ -0,0 +1,79 @@
+import time
+import zlib
+import sqlite3
+
+# safe_get 응답 캐시 (sqlite, URL 기준).
+# mode
+#   off    : 캐시 안 씀
+#   cache  : TTL 안이면 캐시에서, 아니면 요청 후 저장
+#   record : 항상 요청하고 응답을 저장 (리플레이용 녹화)
+#   replay : 네트워크 없이 녹화된 응답만 돌려줌 (TTL 무시, 없으면 None)
+MODES = ("off", "cache", "record", "replay")
+
+# 엔드포인트 종류별 TTL(초). None이면 만료 없음 (매치 상세는 바뀌지 않음)
+DEFAULT_TTLS = {
+    "account": 7 * 24 * 3600,
+    "match-ids": 10 * 60,
+    "match-detail": None,
+}
+# cache 모드에서는 저장하지 않는 엔드포인트 (record/replay에서만 씀).
+# 매치 상세는 세그먼트 저장소에 이미 있고 collected_matches가 다시 조회하지 않게 막으므로 여기 쌓으면 중복만 늘어남
+RECORD_ONLY = {"match-detail"}
+
+class ResponseCache:
+    def __init__(self, path, mode="cache", ttls=None):
+        if mode not in MODES:
+            raise ValueError(f"지원하지 않는 mode: {mode} (가능: {MODES})")
+        self.mode = mode
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, method TEXT, fetched_at REAL, body BLOB)"
+        )
+        if mode == "cache":
+            self.prune()
+        self.conn.commit()
+
+    def prune(self):
+        # TTL이 지난 응답은 다시 쓸 일이 없으므로 지움 (크기가 한없이 늘지 않게)
+        now = time.time()
+        for method, ttl in self.ttls.items():
+            if ttl is not None:
+                self.conn.execute("DELETE FROM responses WHERE method=? AND fetched_at<?", (method, now - ttl))
+
+    @property
+    def offline(self):
+        return self.mode == "replay"
+
+    def get(self, url, method):
+        if self.mode in ("off", "record") or (self.mode == "cache" and method in RECORD_ONLY):
+            return None
+        row = self.conn.execute("SELECT fetched_at, body FROM responses WHERE url=?", (url,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        ttl = self.ttls.get(method)
+        if self.mode == "cache" and ttl is not None and time.time() - row[0] > ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return zlib.decompress(row[1])
+
+    def put(self, url, method, body):
+        if self.mode in ("off", "replay") or (self.mode == "cache" and method in RECORD_ONLY):
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (url, method, fetched_at, body) VALUES (?, ?, ?, ?)",
+            (url, method, time.time(), zlib.compress(body)),
+        )
+
+    def flush(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
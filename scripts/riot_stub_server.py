@@ -0,0 +1,133 @@
+import time
+import random
+import asyncio
+import argparse
+from aiohttp import web
+
+# 크롤러 처리량/제한 동작 확인용 로컬 Riot API 흉내 서버.
+# 앱 제한과 메소드 제한을 고정 창으로 세고, 넘으면 Riot처럼 429 + Retry-After를 돌려줌.
+#   python scripts/riot_stub_server.py --port 8080 --app-limit 20:1,100:120
+#   RIOT_API_BASE=http://localhost:8080 python scripts/recursive_fetch_matches.py
+CHAMPIONS = ["Ahri", "Lux", "Garen", "Jinx", "Thresh", "LeeSin", "Zed", "Annie", "Ashe", "Leona",
+             "Darius", "Sona", "Yasuo", "Ezreal", "Morgana", "Malphite", "Vayne", "Teemo", "Katarina", "Nami"]
+ITEMS = [0, 1001, 1055, 3006, 3020, 3031, 3047, 3089, 3157, 6672, 6653, 3071]
+
+class FixedWindows:
+    def __init__(self, limits):
+        self.limits = limits
+        self.state = {seconds: [0.0, 0] for _, seconds in limits}
+
+    def hit(self, now):
+        retry = 0.0
+        for limit, seconds in self.limits:
+            start, count = self.state[seconds]
+            if now - start >= seconds:
+                self.state[seconds] = [now, 0]
+            elif count >= limit:
+                retry = max(retry, start + seconds - now)
+        if retry > 0:
+            return retry
+        for _, seconds in self.limits:
+            self.state[seconds][1] += 1
+        return 0.0
+
+    def header(self):
+        return ",".join(f"{limit}:{int(seconds)}" for limit, seconds in self.limits)
+
+    def count_header(self):
+        return ",".join(f"{self.state[seconds][1]}:{int(seconds)}" for _, seconds in self.limits)
+
+def parse(text):
+    return [(int(c), float(s)) for c, s in (part.split(":") for part in text.split(","))]
+
+def make_match(match_id, players):
+    rng = random.Random(match_id)
+    participants = []
+    puuids = rng.sample(players, 10)
+    champs = rng.sample(CHAMPIONS, 10)
+    winner = rng.choice([100, 200])
+    for i, (puuid, champ) in enumerate(zip(puuids, champs)):
+        team_id = 100 if i < 5 else 200
+        p = {
+            "puuid": puuid, "teamId": team_id, "championName": champ, "win": team_id == winner,
+            "kills": rng.randint(0, 20), "deaths": rng.randint(0, 15), "assists": rng.randint(0, 30),
+            "totalDamageDealtToChampions": rng.randint(3000, 60000),
+            "totalDamageTaken": rng.randint(5000, 60000), "totalHeal": rng.randint(0, 25000),
+        }
+        for slot in range(6):
+            p[f"item{slot}"] = rng.choice(ITEMS)
+        participants.append(p)
+    return {
+        "metadata": {"matchId": match_id, "participants": puuids},
+        "info": {"gameCreation": 1700000000000 + int(match_id.split("_")[1]) * 1000,
+                 "gameVersion": "14.10.1", "queueId": 450, "participants": participants},
+    }
+
+def create_app(app_limit, method_limit, players=2000, matches_per_player=20, latency=0.0):
+    app_windows = FixedWindows(parse(app_limit))
+    method_windows = {}
+    player_ids = [f"stub-puuid-{i}" for i in range(players)]
+    stats = {"ok": 0, "429": 0, "duplicate_details": 0, "start": time.monotonic()}
+    # 상세 조회에 성공한 match_id (같은 매치를 두 번 받아 가면 duplicate_details가 늘어남)
+    served = set()
+
+    async def limited(request, method, payload):
+        now = time.monotonic()
+        windows = method_windows.setdefault(method, FixedWindows(parse(method_limit)))
+        retry_app = app_windows.hit(now)
+        retry_method = windows.hit(now) if not retry_app else 0.0
+        headers = {
+            "X-App-Rate-Limit": app_windows.header(),
+            "X-App-Rate-Limit-Count": app_windows.count_header(),
+            "X-Method-Rate-Limit": windows.header(),
+            "X-Method-Rate-Limit-Count": windows.count_header(),
+        }
+        if retry_app or retry_method:
+            stats["429"] += 1
+            headers["Retry-After"] = str(max(1, int(retry_app or retry_method) + 1))
+            headers["X-Rate-Limit-Type"] = "application" if retry_app else "method"
+            return web.json_response({"status": {"status_code": 429}}, status=429, headers=headers)
+        if latency:
+            await asyncio.sleep(latency)
+        stats["ok"] += 1
+        return web.json_response(payload, headers=headers)
+
+    async def account(request):
+        # 시작 플레이어마다 다른 puuid (shard 여러 개를 돌려 볼 때 시작점이 겹치지 않게)
+        riot_id = f"{request.match_info['name']}#{request.match_info['tag']}"
+        return await limited(request, "account", {"puuid": player_ids[random.Random(riot_id).randrange(players)]})
+
+    async def match_ids(request):
+        puuid = request.match_info["puuid"]
+        rng = random.Random(puuid)
+        ids = [f"STUB_{rng.randrange(players * matches_per_player // 10)}" for _ in range(matches_per_player)]
+        return await limited(request, "match-ids", ids)
+
+    async def match_detail(request):
+        match_id = request.match_info["match_id"]
+        res = await limited(request, "match-detail", make_match(match_id, player_ids))
+        if res.status == 200:
+            stats["duplicate_details"] += match_id in served
+            served.add(match_id)
+        return res
+
+    async def status(request):
+        elapsed = time.monotonic() - stats["start"]
+        return web.json_response({**stats, "elapsed": elapsed, "rps": stats["ok"] / max(elapsed, 1e-9)})
+
+    app = web.Application()
+    app.router.add_get("/riot/account/v1/accounts/by-riot-id/{name}/{tag}", account)
+    app.router.add_get("/lol/match/v5/matches/by-puuid/{puuid}/ids", match_ids)
+    app.router.add_get("/lol/match/v5/matches/{match_id}", match_detail)
+    app.router.add_get("/stub/status", status)
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--app-limit", default="20:1,100:120")
+    parser.add_argument("--method-limit", default="2000:10")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    web.run_app(create_app(args.app_limit, args.method_limit, args.players, latency=args.latency), port=args.port)
@@ -0,0 +1,142 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from item_encoding import SLOT_COLS, load_vocab
+import dataset_store
+
+# 단계들이 같이 쓰는 컬럼 타입 정의와 챔피언 사전.
+# - 챔피언 이름은 champion_dict.json 의 순서(뒤에만 추가)로 작은 정수 번호를 받음.
+#   프레임에서는 이 사전을 범주로 쓰는 pandas Categorical 이라 번호(codes)가 실행마다 바뀌지 않음
+# - 수치 컬럼은 값 범위에 맞는 작은 타입으로 내림 (KDA int16, 딜량 int32, 실수 float32 등)
+#   python scripts/schema.py  → 데이터셋별 원래/압축 메모리 비교
+CHAMPION_DICT_PATH = "LOLCLUSTER/champion_vectors/champion_dict.json"
+DTYPES = {
+    "team_id": np.int16,
+    "win": bool,
+    "kills": np.int16,
+    "deaths": np.int16,
+    "assists": np.int16,
+    "damage": np.int32,
+    "taken": np.int32,
+    "heal": np.int32,
+    "role_cluster": np.int8,
+    "label": np.int8,
+    **{col: np.int32 for col in SLOT_COLS},
+    **{f"t{side}_role_{i}": np.int8 for side in (1, 2) for i in range(5)},
+    "game_creation": np.int64,
+}
+CHAMPION_COLS = {"champion"}
+# 매치 정보 열 (패치 "14.10", 게임 생성 시각 ms). 파티션 나누기에만 쓰고 특징으로는 쓰지 않음
+MATCH_COLS = ["patch", "game_creation"]
+
+def load_champions(path=CHAMPION_DICT_PATH):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return []
+
+def save_champions(champions, path=CHAMPION_DICT_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(champions, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def update_champions(champions, names):
+    # 처음 보는 챔피언은 이름순으로 뒤에 붙임 (기존 번호는 그대로)
+    known = set(champions)
+    new_names = sorted({str(name) for name in pd.unique(np.asarray(names, dtype=object)) if pd.notna(name)} - known)
+    return champions + new_names, new_names
+
+def base_name(col):
+    # team_vectors_v3 의 champion.1 같은 중복 이름의 원래 이름
+    col = str(col)
+    head, _, tail = col.rpartition(".")
+    return head if head and tail.isdigit() else col
+
+def champion_categorical(values, champions):
+    return pd.Categorical(np.asarray(values, dtype=object), categories=champions)
+
+def champion_codes(values, champions):
+    # 이름 → 사전 번호 (int16, 사전에 없으면 -1)
+    return champion_categorical(values, champions).codes.astype(np.int16)
+
+def is_champion_col(df, col):
+    # 이름만 보면 team_vectors_v3 처럼 열 이름과 내용이 어긋난 표에서 숫자 열을 잘못 바꿀 수 있어서 문자열 열만 봄
+    return base_name(col) in CHAMPION_COLS and not pd.api.types.is_numeric_dtype(df[col].dtype)
+
+def compact(df, champions=None):
+    # 제자리가 아니라 새 프레임을 돌려줌. 사전에 없는 챔피언은 메모리 안에서만 사전 뒤에 붙여서 번호를 줌
+    # 정해진 타입(DTYPES)은 정확히 같은 이름에만 쓰고, 나머지 숫자 열은 값 범위에 맞게 내림
+    champion_cols = [col for col in df.columns if is_champion_col(df, col)]
+    if champion_cols:
+        if champions is None:
+            champions = load_champions()
+        for col in champion_cols:
+            champions, _ = update_champions(champions, df[col].astype(object).to_numpy())
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if col in champion_cols:
+            out[col] = pd.Series(champion_categorical(series.astype(object).to_numpy(), champions), index=df.index)
+        elif col in DTYPES:
+            target = DTYPES[col]
+            if series.isna().any() and target is not bool:
+                # 빈 값이 있는 정수 컬럼(예전 CSV 등)은 실수로 둠 (ms 시각처럼 큰 int64는 float32로 자리가 모자라서 float64)
+                out[col] = series.astype(np.float64 if target is np.int64 else np.float32)
+            else:
+                out[col] = series.astype(target)
+        elif pd.api.types.is_float_dtype(series.dtype):
+            out[col] = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series.dtype) and series.dtype.itemsize > 1 and len(series):
+            out[col] = pd.to_numeric(series, downcast="integer")
+        else:
+            out[col] = series
+    return pd.DataFrame(out, index=df.index)
+
+def read(name, columns=None, parts=None, window=None):
+    # dataset_store.read 와 같지만 압축 타입으로 돌려줌
+    return compact(dataset_store.read(name, columns=columns, parts=parts, window=window))
+
+def arrays(name, columns, champions=None):
+    # 컬럼 → NumPy 배열. 챔피언 컬럼은 사전 번호(int16)로 바꿔 줌
+    df = read(name, columns=columns)
+    result = {}
+    for col in columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype) and base_name(col) in CHAMPION_COLS:
+            result[col] = values.cat.codes.to_numpy().astype(np.int16)
+        else:
+            result[col] = values.to_numpy()
+    return result
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+def widen(df):
+    # 비교용: 압축 전 기본 타입 (문자열 object, int64, float64)
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(series.dtype):
+            out[col] = series.astype(object)
+        elif pd.api.types.is_bool_dtype(series.dtype):
+            out[col] = series.astype(object)
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            out[col] = series.astype(np.int64)
+        elif pd.api.types.is_float_dtype(series.dtype):
+            out[col] = series.astype(np.float64)
+        else:
+            out[col] = series
+    return pd.DataFrame(out, index=df.index)
+
+if __name__ == "__main__":
+    champions = load_champions()
+    print(f"챔피언 사전 {len(champions)}개, 아이템 어휘 {len(load_vocab())}개")
+    for name in sorted(os.listdir(dataset_store.DATASET_DIR)) if os.path.isdir(dataset_store.DATASET_DIR) else []:
+        if not dataset_store.has_dataset(name):
+            continue
+        raw = widen(dataset_store.read(name))
+        small = compact(raw, champions)
+        print(f"{name}: {len(raw)}행, {memory_mb(raw):.1f}MB → {memory_mb(small):.1f}MB")
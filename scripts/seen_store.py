@@ -0,0 +1,102 @@
+import os
+import json
+import math
+import hashlib
+
+# collected_matches / visited_puuids 용 영속 set
+# - 디스크: 키를 한 줄씩 추가만 하는 로그 파일 (flush 때 새 키만 append)
+# - 메모리: "exact"는 문자열 set, "hashed"는 64비트 해시 set, "bloom"은 고정 크기 Bloom filter
+MODES = ("exact", "hashed", "bloom")
+
+def hash64(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+class SeenSet:
+    def __init__(self, path, legacy_path=None, mode="exact", bloom_capacity=10_000_000, error_rate=0.001):
+        if mode not in MODES:
+            raise ValueError(f"지원하지 않는 mode: {mode} (가능: {MODES})")
+        self.path = path
+        self.mode = mode
+        self.count = 0
+        self.pending = []
+        if mode == "bloom":
+            self.members = BloomFilter(bloom_capacity, error_rate)
+        else:
+            self.members = set()
+
+        if os.path.exists(path):
+            self._load_log()
+        if legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+
+    def _key(self, key):
+        return hash64(key) if self.mode == "hashed" else key
+
+    def _load_log(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            if self.mode == "exact":
+                self.members.update(f.read().split())
+                self.count = len(self.members)
+                return
+            for line in f:
+                key = line.strip()
+                if not key:
+                    continue
+                k = self._key(key)
+                if k not in self.members:
+                    self.members.add(k)
+                    self.count += 1
+
+    def _import_legacy(self, legacy_path):
+        # 예전 JSON 목록을 로그로 옮기고 원본은 .bak으로 바꿔 둠
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                print(f"경고: {legacy_path} 파일이 비어 있거나 손상됨. 무시.")
+                data = []
+        for key in data:
+            self.add(key)
+        self.flush()
+        os.replace(legacy_path, legacy_path + ".bak")
+        print(f"변환 완료: {legacy_path} → {self.path} ({len(data)}개)")
+
+    def add(self, key):
+        k = self._key(key)
+        if k in self.members:
+            return
+        self.members.add(k)
+        self.pending.append(key)
+        self.count += 1
+
+    def __contains__(self, key):
+        return self._key(key) in self.members
+
+    def __len__(self):
+        return self.count
+
+    def flush(self):
+        if not self.pending:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self.pending) + "\n")
+        self.pending.clear()
@@ -0,0 +1,206 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+import dataset_store
+import schema
+
+# eda_analysis용 누적 통계 저장소. champion_with_roles에서 새 part만 읽어서 갱신함.
+# - 수치 컬럼마다 개수/평균/분산(M2)/최소/최대 (배치끼리 합칠 수 있는 방식)
+# - 스탯과 KDA는 고정 구간 세밀 히스토그램 (FINE_BINS칸) → 그림과 근사 사분위수를 여기서 계산
+# - 역할 군집별 행 수/스탯 합, 군집 × 챔피언 판 수
+# 예전 part가 바뀌었으면(cluster_roles 전체 재학습으로 다시 씀) 처음부터 다시 쌓음.
+# 보고서와 그림은 저장소만 보므로 데이터 크기와 상관없이 같은 시간에 나옴
+STATS_PATH = "LOLCLUSTER/stats/eda_stats.npz"
+DATASET = "champion_with_roles"
+STAT_COLS = ["kills", "deaths", "assists", "damage", "taken", "heal"]
+# 히스토그램 열 → (최소, 최대). 범위를 벗어난 값은 양 끝 칸에 넣음
+HIST_RANGES = {
+    "kills": (0, 40),
+    "deaths": (0, 40),
+    "assists": (0, 60),
+    "damage": (0, 150000),
+    "taken": (0, 150000),
+    "heal": (0, 100000),
+    "kda": (0, 40),
+}
+FINE_BINS = 2000
+BATCH_ROWS = 200000
+ARRAY_KEYS = ["hist", "cluster_counts", "cluster_sums", "champion_counts"]
+
+def empty_store():
+    return {
+        "parts": {},
+        "rows": 0,
+        "columns": [],
+        "missing": {},
+        "moments": {},
+        "champions": [],
+        "hist": np.zeros((len(HIST_RANGES), FINE_BINS), dtype=np.int64),
+        "cluster_counts": np.zeros(0, dtype=np.int64),
+        "cluster_sums": np.zeros((0, len(STAT_COLS))),
+        "champion_counts": np.zeros((0, 0), dtype=np.int64),
+    }
+
+def load_store():
+    if not os.path.exists(STATS_PATH):
+        return empty_store()
+    data = np.load(STATS_PATH)
+    store = json.loads(str(data["meta"]))
+    for key in ARRAY_KEYS:
+        store[key] = data[key]
+    if store["hist"].shape != (len(HIST_RANGES), FINE_BINS):
+        # 히스토그램 설정이 바뀌었으면 다시 쌓음
+        return empty_store()
+    return store
+
+def save_store(store):
+    os.makedirs(os.path.dirname(STATS_PATH), exist_ok=True)
+    meta = {k: v for k, v in store.items() if k not in ARRAY_KEYS}
+    tmp_path = STATS_PATH + ".tmp.npz"
+    np.savez(tmp_path, meta=np.array(json.dumps(meta, ensure_ascii=False)), **{k: store[k] for k in ARRAY_KEYS})
+    os.replace(tmp_path, STATS_PATH)
+
+def merge_moments(old, values):
+    # old: [개수, 평균, M2, 최소, 최대] (없으면 None). 배치 값과 합친 결과를 돌려줌 (Chan 병렬 분산 공식)
+    n_b = len(values)
+    if n_b == 0:
+        return old
+    mean_b = float(values.mean())
+    m2_b = float(((values - mean_b) ** 2).sum())
+    min_b, max_b = float(values.min()), float(values.max())
+    if old is None or old[0] == 0:
+        return [n_b, mean_b, m2_b, min_b, max_b]
+    n_a, mean_a, m2_a, min_a, max_a = old
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    return [n, mean_a + delta * n_b / n, m2_a + m2_b + delta ** 2 * n_a * n_b / n, min(min_a, min_b), max(max_a, max_b)]
+
+def grow(array, shape):
+    if array.shape == tuple(shape):
+        return array
+    grown = np.zeros(shape, dtype=array.dtype)
+    grown[tuple(slice(0, n) for n in array.shape)] = array
+    return grown
+
+def kda(df):
+    return (df["kills"].astype(float) + df["assists"].astype(float)) / df["deaths"].astype(float).replace(0, 1)
+
+def add_batch(store, df):
+    store["rows"] += len(df)
+    store["columns"] += [str(col) for col in df.columns if str(col) not in store["columns"]]
+    for col, n in df.isnull().sum().items():
+        store["missing"][str(col)] = store["missing"].get(str(col), 0) + int(n)
+
+    # eda 예전 방식처럼 inf/NaN은 0으로 보고 셈
+    # 매치 정보 열(생성 시각 등)은 통계에서 뺌
+    numeric = {str(col): df[col].to_numpy(dtype=float) for col in df.select_dtypes(include="number").columns if col not in schema.MATCH_COLS}
+    if set(["kills", "deaths", "assists"]).issubset(df.columns):
+        numeric["kda"] = kda(df).to_numpy()
+    for col, values in numeric.items():
+        values = np.where(np.isfinite(values), values, 0)
+        numeric[col] = values
+        store["moments"][col] = merge_moments(store["moments"].get(col), values)
+
+    for i, (col, (lo, hi)) in enumerate(HIST_RANGES.items()):
+        if col not in numeric:
+            continue
+        index = ((numeric[col] - lo) / (hi - lo) * FINE_BINS).astype(np.int64).clip(0, FINE_BINS - 1)
+        store["hist"][i] += np.bincount(index, minlength=FINE_BINS)
+
+    if "role_cluster" not in df.columns:
+        return
+    clusters = df["role_cluster"].fillna(-1).to_numpy(dtype=np.int64)
+    valid = clusters >= 0
+    clusters = clusters[valid]
+    n_clusters = max(len(store["cluster_counts"]), int(clusters.max()) + 1 if len(clusters) else 0)
+    store["cluster_counts"] = grow(store["cluster_counts"], (n_clusters,))
+    store["cluster_counts"] += np.bincount(clusters, minlength=n_clusters)
+    store["cluster_sums"] = grow(store["cluster_sums"], (n_clusters, len(STAT_COLS)))
+    for j, col in enumerate(STAT_COLS):
+        if col in numeric:
+            store["cluster_sums"][:, j] += np.bincount(clusters, weights=numeric[col][valid], minlength=n_clusters)
+
+    if "champion" in df.columns:
+        names = df["champion"].astype(object).to_numpy()[valid]
+        store["champions"], _ = schema.update_champions(store["champions"], names)
+        n_champions = len(store["champions"])
+        codes = schema.champion_codes(names, store["champions"]).astype(np.int64)
+        store["champion_counts"] = grow(store["champion_counts"], (n_clusters, n_champions))
+        store["champion_counts"] += np.bincount(clusters * n_champions + codes, minlength=n_clusters * n_champions).reshape(n_clusters, n_champions)
+
+def update(store=None):
+    # 새 part만 읽어서 저장소를 갱신. (저장소, 이번에 더한 행 수)
+    store = load_store() if store is None else store
+    stamps = dataset_store.part_stamps(DATASET)
+    if not stamps:
+        # 예전 CSV뿐이면 part 단위로 나눌 수 없어서 매번 전체를 다시 셈
+        store = empty_store()
+        add_batch(store, schema.read(DATASET))
+        return store, store["rows"]
+
+    if any(stamps.get(name) != stamp for name, stamp in store["parts"].items()):
+        print("champion_with_roles가 다시 쓰여서 통계를 처음부터 다시 쌓습니다.")
+        store = empty_store()
+    new_parts = [name for name in stamps if name not in store["parts"]]
+    added = 0
+    for _, batch in dataset_store.iter_batches(DATASET, parts=new_parts, batch_size=BATCH_ROWS):
+        add_batch(store, schema.compact(batch))
+        added += len(batch)
+    if new_parts:
+        for name in new_parts:
+            store["parts"][name] = stamps[name]
+        save_store(store)
+    return store, added
+
+def describe(store):
+    # DataFrame.describe()와 같은 모양. 사분위수는 히스토그램이 있는 열만 (칸 안에서 선형 보간한 근사값)
+    table = {}
+    for col, (n, mean, m2, lo, hi) in store["moments"].items():
+        std = np.sqrt(m2 / (n - 1)) if n > 1 else float("nan")
+        table[col] = [n, mean, std, lo] + [quantile(store, col, q) for q in (0.25, 0.5, 0.75)] + [hi]
+    return pd.DataFrame(table, index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"])
+
+def quantile(store, col, q):
+    if col not in HIST_RANGES:
+        return float("nan")
+    counts = store["hist"][list(HIST_RANGES).index(col)]
+    total = counts.sum()
+    if total == 0:
+        return float("nan")
+    lo, hi = HIST_RANGES[col]
+    width = (hi - lo) / FINE_BINS
+    cum = np.cumsum(counts)
+    target = q * total
+    i = int(np.searchsorted(cum, target))
+    before = cum[i - 1] if i > 0 else 0
+    value = lo + width * (i + (target - before) / max(counts[i], 1))
+    # 양 끝 칸에는 범위 밖 값도 들어 있으므로 실제 최소/최대 안으로 자름
+    _, _, _, vmin, vmax = store["moments"][col]
+    return float(min(max(value, vmin), vmax))
+
+def histogram(store, col, bins=50):
+    # 그림용: 세밀 히스토그램을 bins칸으로 묶은 (경계, 개수)
+    lo, hi = HIST_RANGES[col]
+    counts = store["hist"][list(HIST_RANGES).index(col)]
+    group = FINE_BINS // bins
+    return np.linspace(lo, hi, bins + 1), counts[:group * bins].reshape(bins, group).sum(axis=1)
+
+def cluster_counts(store):
+    return pd.Series(store["cluster_counts"], name="count").rename_axis("role_cluster")
+
+def cluster_means(store):
+    counts = store["cluster_counts"][:, None]
+    return pd.DataFrame(store["cluster_sums"] / np.maximum(counts, 1), columns=STAT_COLS).rename_axis("role_cluster")
+
+def top_champions(store, cluster_id, k=10):
+    counts = store["champion_counts"][cluster_id]
+    order = np.lexsort([np.arange(len(counts)), -counts])[:k]
+    order = order[counts[order] > 0]
+    return pd.Series(counts[order], index=[store["champions"][i] for i in order], name="count")
+
+if __name__ == "__main__":
+    import sys
+    # python scripts/summary_stats.py [--rebuild]
+    store, added = update(empty_store() if "--rebuild" in sys.argv else None)
+    print(f"통계 갱신: 새 행 {added}개, 전체 {store['rows']}행 → {STATS_PATH}")
@@ -0,0 +1,119 @@
+import argparse
+import numpy as np
+from match_store import MatchStore
+
+# 벤치마크/부하 확인용 가짜 match-v5 JSON 생성기.
+# 챔피언마다 숨은 역할(챔피언 번호 % 5)이 있고 역할별로 스탯 분포와 자주 사는 아이템이 달라서
+# 역할 군집/팀 벡터 단계가 실제 데이터와 비슷한 모양의 입력을 받음.
+#   python scripts/synthetic_matches.py --matches 100000 --champions 160 --items 250 --out LOLCLUSTER/data
+N_ROLES = 5
+# 역할별 (킬, 데스, 어시스트, 가한 피해, 받은 피해, 힐) 평균
+ROLE_STATS = np.array([
+    [4, 5, 6, 18000, 28000, 6000],
+    [6, 5, 7, 16000, 24000, 4000],
+    [7, 5, 6, 24000, 16000, 2500],
+    [8, 6, 6, 26000, 15000, 3000],
+    [1, 5, 16, 8000, 14000, 9000],
+], dtype=float)
+FIRST_ITEM_ID = 1001
+START_MATCH_ID = 7000000000
+START_TIME = 1700000000000
+PATCHES = ["14.1.1", "14.2.1", "14.3.1", "14.4.1", "14.5.1"]
+
+def champion_names(n):
+    return [f"Champ{i:03d}" for i in range(n)]
+
+def generate(n_matches, n_champions=160, n_items=250, seed=0, start=0, batch=10000):
+    # match-v5 형식 dict를 batch개씩 만들어서 하나씩 돌려줌 (전체를 메모리에 올리지 않음)
+    rng = np.random.default_rng(seed + start)
+    names = champion_names(n_champions)
+    champ_roles = np.arange(n_champions) % N_ROLES
+    by_role = [np.flatnonzero(champ_roles == r) for r in range(N_ROLES)]
+    # 역할마다 어휘의 일부 구간을 주로 삼
+    item_ids = FIRST_ITEM_ID + np.arange(n_items)
+    role_items = np.array_split(item_ids, N_ROLES)
+
+    for offset in range(start, start + n_matches, batch):
+        n = min(batch, start + n_matches - offset)
+        # 팀마다 역할 하나씩 (가끔 역할이 겹치는 팀도 섞음)
+        roles = np.tile(np.arange(N_ROLES), (n, 2))
+        swap = rng.random((n, 2 * N_ROLES)) < 0.1
+        roles[swap] = rng.integers(0, N_ROLES, swap.sum())
+        champs = np.empty((n, 2 * N_ROLES), dtype=np.int64)
+        for r in range(N_ROLES):
+            mask = roles == r
+            champs[mask] = rng.choice(by_role[r], mask.sum())
+        # 한 팀에 같은 챔피언이 두 번 나온 팀은 역할을 겹치지 않게 다시 뽑음 (역할이 다르면 챔피언도 다름)
+        teams = champs.reshape(n * 2, N_ROLES)
+        ordered = np.sort(teams, axis=1)
+        dup = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+        if dup.any():
+            team_roles = roles.reshape(n * 2, N_ROLES)
+            team_roles[dup] = np.arange(N_ROLES)
+            for r in range(N_ROLES):
+                teams[dup, r] = rng.choice(by_role[r], dup.sum())
+        stats = np.maximum(rng.normal(ROLE_STATS[roles], ROLE_STATS[roles] * 0.4), 0).round().astype(np.int64)
+        own = rng.random((n, 2 * N_ROLES, 6)) < 0.7
+        items = np.where(
+            own,
+            np.stack([rng.choice(role_items[r], (n, 2 * N_ROLES, 6)) for r in range(N_ROLES)])[roles, np.arange(n)[:, None], np.arange(2 * N_ROLES)],
+            rng.choice(item_ids, (n, 2 * N_ROLES, 6)),
+        )
+        items[rng.random(items.shape) < 0.08] = 0
+        # 100팀 승률은 팀 딜량 차이에 약하게 따라감
+        damage = stats[:, :, 3]
+        edge = (damage[:, :N_ROLES].sum(axis=1) - damage[:, N_ROLES:].sum(axis=1)) / 40000
+        blue_win = rng.random(n) < 1 / (1 + np.exp(-edge))
+
+        for i in range(n):
+            number = START_MATCH_ID + offset + i
+            participants = []
+            for j in range(2 * N_ROLES):
+                team_id = 100 if j < N_ROLES else 200
+                s = stats[i, j]
+                p = {
+                    "puuid": f"synthetic-puuid-{rng.integers(0, 1 << 30)}",
+                    "teamId": team_id,
+                    "championName": names[champs[i, j]],
+                    "win": bool(blue_win[i]) == (team_id == 100),
+                    "kills": int(s[0]), "deaths": int(s[1]), "assists": int(s[2]),
+                    "totalDamageDealtToChampions": int(s[3]),
+                    "totalDamageTaken": int(s[4]), "totalHeal": int(s[5]),
+                }
+                for slot in range(6):
+                    p[f"item{slot}"] = int(items[i, j, slot])
+                participants.append(p)
+            yield {
+                "metadata": {"matchId": f"KR_{number}", "participants": [p["puuid"] for p in participants]},
+                "info": {
+                    "gameCreation": START_TIME + (offset + i) * 60000,
+                    "gameVersion": PATCHES[min((offset + i) * len(PATCHES) // max(start + n_matches, 1), len(PATCHES) - 1)],
+                    "queueId": 420,
+                    "participants": participants,
+                },
+            }
+
+def write(data_dir, n_matches, n_champions=160, n_items=250, seed=0, start=0, chunk=5000):
+    # 크롤러와 같은 세그먼트 저장소에 씀
+    store = MatchStore(data_dir)
+    buffer = []
+    written = 0
+    for match in generate(n_matches, n_champions, n_items, seed, start):
+        buffer.append(match)
+        if len(buffer) >= chunk:
+            written += store.append(buffer)
+            buffer = []
+    written += store.append(buffer)
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--matches", type=int, default=10000)
+    parser.add_argument("--champions", type=int, default=160)
+    parser.add_argument("--items", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", type=int, default=0, help="매치 번호 시작 위치 (이어서 더 만들 때)")
+    parser.add_argument("--out", default="LOLCLUSTER/data")
+    args = parser.parse_args()
+    written = write(args.out, args.matches, args.champions, args.items, args.seed, args.start)
+    print(f"가짜 매치 {written}개 저장 → {args.out}")
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# 팀 벡터 공용 엔진.
+# (match_id, team_id, champion) 순으로 한 번만 정렬하고, 키가 바뀌는 지점으로 팀 경계를 찾은 뒤
+# 5명짜리 팀만 골라 (팀 수 × 5) 행 번호 표를 만듦. 역할 수/집계/선수별 블록은 모두 이 표로 한 번에 계산함
+N_ROLES = 5
+TEAM_SIZE = 5
+PLAYER_COLS = ['champion', 'kills', 'deaths', 'assists', 'damage', 'taken', 'heal', 'role_cluster']
+
+class Teams:
+    def __init__(self, df, items=None):
+        keys = [df['team_id'].to_numpy(), df['match_id'].astype(str).to_numpy()]
+        if 'champion' in df.columns:
+            keys.insert(0, df['champion'].astype(str).to_numpy())
+        order = np.lexsort(keys)
+        self.players = df.iloc[order].reset_index(drop=True)
+        # 정렬 전 원래 순서 (팀의 win은 원래 순서 첫 번째 선수 값을 씀)
+        self.source_order = order
+        self.items = items[order] if items is not None else None
+
+        match_ids = self.players['match_id'].astype(str).to_numpy()
+        team_ids = self.players['team_id'].to_numpy()
+        n = len(self.players)
+        if n == 0:
+            self.starts = np.zeros(0, dtype=np.int64)
+            self.sizes = np.zeros(0, dtype=np.int64)
+        else:
+            change = np.ones(n, dtype=bool)
+            change[1:] = (match_ids[1:] != match_ids[:-1]) | (team_ids[1:] != team_ids[:-1])
+            self.starts = np.flatnonzero(change)
+            self.sizes = np.diff(np.append(self.starts, n))
+
+        valid = self.sizes == TEAM_SIZE
+        # idx[t, j] = t번째 유효 팀의 j번째 선수(챔피언 이름순) 행 번호
+        self.idx = self.starts[valid][:, None] + np.arange(TEAM_SIZE)
+        self.match_id = match_ids[self.starts[valid]] if n else np.array([], dtype=str)
+        self.team_id = team_ids[self.starts[valid]] if n else np.array([], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.idx)
+
+    def column(self, col):
+        # (팀 수 × 5) 배열
+        return self.players[col].to_numpy()[self.idx]
+
+    def first_win(self):
+        # 원래 행 순서에서 팀의 첫 번째 선수 win (groupby 후 group['win'].iloc[0] 과 같음)
+        first = self.source_order[self.idx].argmin(axis=1)
+        return self.column('win')[np.arange(len(self)), first]
+
+def role_counts(teams, n_roles=N_ROLES):
+    roles = teams.column('role_cluster').astype(np.int64)
+    team_index = np.repeat(np.arange(len(teams)), TEAM_SIZE)
+    valid = (roles.ravel() >= 0) & (roles.ravel() < n_roles)
+    counts = np.bincount(team_index[valid] * n_roles + roles.ravel()[valid], minlength=len(teams) * n_roles)
+    return counts.reshape(len(teams), n_roles)
+
+def team_aggregates(teams):
+    kills = teams.column('kills').astype(float).sum(axis=1)
+    assists = teams.column('assists').astype(float).sum(axis=1)
+    deaths = teams.column('deaths').astype(float).sum(axis=1)
+    dist = role_counts(teams) / TEAM_SIZE + 1e-10
+    p = dist / dist.sum(axis=1, keepdims=True)
+    return pd.DataFrame({
+        'avg_damage': teams.column('damage').astype(float).mean(axis=1),
+        'avg_taken': teams.column('taken').astype(float).mean(axis=1),
+        'avg_heal': teams.column('heal').astype(float).mean(axis=1),
+        'team_kda': (kills + assists) / np.maximum(deaths, 1),
+        'role_entropy': -(p * np.log(p)).sum(axis=1),
+    })
+
+def player_blocks(teams, cols=PLAYER_COLS, with_items=True):
+    # 선수(챔피언 이름순) 5명 각각에 대해 cols 값, 그 다음 아이템 원-핫 열을 차례로 붙인 블록 목록.
+    # 아이템은 출력 형식이 밀집이라 여기서만 선수 슬롯 단위로 int8 밀집화함
+    blocks = []
+    for j in range(TEAM_SIZE):
+        rows = teams.idx[:, j]
+        blocks.append(teams.players[cols].iloc[rows].reset_index(drop=True))
+        if with_items and teams.items is not None:
+            dense = teams.items[rows].toarray().astype(np.int8)
+            blocks.append(pd.DataFrame(dense))
+    return blocks
+
+def team_table(teams, header, extra=None):
+    # 블록들을 옆으로 붙이고 열 이름은 header 로 위치대로 지정 (중복 이름 허용)
+    parts = ([extra] if extra is not None else []) + player_blocks(teams)
+    parts.append(pd.DataFrame({
+        'match_id': teams.match_id,
+        'team_id': teams.team_id,
+        'win': teams.first_win(),
+    }))
+    table = pd.concat(parts, axis=1, ignore_index=True)
+    table.columns = header
+    return table
+
+def match_role_counts(df, n_roles=N_ROLES):
+    # 10명 매치에서 100팀/200팀 각 5명인 경우만 [match_id, t1 역할 수, t2 역할 수, t1 승률 > t2 승률]
+    teams = Teams(df)
+    counts = role_counts(teams, n_roles)
+    win_mean = teams.column('win').astype(float).mean(axis=1)
+
+    match_size = df.groupby(df['match_id'].astype(str)).size()
+    full = match_size.reindex(teams.match_id).to_numpy() == 2 * TEAM_SIZE
+    t1 = full & (teams.team_id == 100)
+    t2 = full & (teams.team_id == 200)
+
+    left = pd.DataFrame(counts[t1], columns=[f"t1_role_{i}" for i in range(n_roles)])
+    left['match_id'] = teams.match_id[t1]
+    left['_win1'] = win_mean[t1]
+    right = pd.DataFrame(counts[t2], columns=[f"t2_role_{i}" for i in range(n_roles)])
+    right['match_id'] = teams.match_id[t2]
+    right['_win2'] = win_mean[t2]
+
+    merged = left.merge(right, on='match_id', how='inner')
+    merged['label'] = (merged['_win1'] > merged['_win2']).astype(int)
+    columns = ["match_id"] + [f"t1_role_{i}" for i in range(n_roles)] + [f"t2_role_{i}" for i in range(n_roles)] + ["label"]
+    return merged[columns]
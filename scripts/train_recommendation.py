@@ -1,74 +1,173 @@
 import pandas as pd
+import numpy as np
 from catboost import CatBoostClassifier
 from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
-import pickle
+import hashlib
+import json
 import os
 import time
+import dataset_store
+import schema
+import metrics
+import model_registry
+from team_features import match_role_counts
+
+MODEL_NAME = "team_model"
+STATE_PATH = "LOLCLUSTER/models/train_state.npz"
+# 시간순으로 정렬한 매치 중 가장 최근 이 비율은 평가용으로만 씀 (학습에 넣지 않음)
+HOLDOUT_RATIO = 0.2
+# 이어 학습할 때 새 행에 대해 추가할 트리 수
+CONTINUE_ITERATIONS = 200
+# 마지막 전체 학습 이후 이어 학습이 이 횟수를 넘거나, 새 행이 그때 행 수의 이 비율을 넘으면 전체 재학습
+FULL_RETRAIN_EVERY = 10
+FULL_RETRAIN_RATIO = 0.5
 
 def create_team_vectors(df):
-    data = []
-    grouped = df.groupby("match_id")
-    for _, group in grouped:
-        if len(group) != 10:
-            continue
-        t1 = group[group["team_id"] == 100]
-        t2 = group[group["team_id"] == 200]
-        if len(t1) != 5 or len(t2) != 5:
-            continue
-
-        def role_count(team):
-            counts = team['role_cluster'].value_counts().to_dict()
-            return [counts.get(i, 0) for i in range(5)]
-
-        features = role_count(t1) + role_count(t2)
-        win_label = int(t1["win"].mean() > t2["win"].mean())
-        data.append(features + [win_label])
-
-    columns = [f"t1_role_{i}" for i in range(5)] + [f"t2_role_{i}" for i in range(5)] + ["label"]
-    return pd.DataFrame(data, columns=columns)
-
-def run():
-    df = pd.read_csv("LOLCLUSTER/champion_vectors/champion_with_roles.csv")
-    team_df = create_team_vectors(df)
-
+    return schema.compact(match_role_counts(df))
+
+def time_order(match_ids, created=None):
+    # 매치 생성 시각(game_creation, ms) 순. 지역이 섞이면 match_id 숫자는 시간 순서가 아니므로
+    # 생성 시각이 없는 예전 행만 match_id(예: KR_7123456789)의 숫자 부분으로 대신하고 맨 앞에 둠
+    numbers = pd.to_numeric(pd.Series(match_ids).str.extract(r"(\d+)$")[0], errors="coerce").fillna(-1).to_numpy()
+    created = np.zeros(len(match_ids)) if created is None else np.nan_to_num(np.asarray(created, dtype=float))
+    return np.lexsort([np.asarray(match_ids, dtype=str), numbers, created])
+
+def row_hashes(team_df):
+    # 행 단위 해시 (match_id + 역할 수 + label). 군집 번호가 바뀐 매치는 다른 행으로 취급됨
+    return pd.util.hash_pandas_object(team_df, index=False).to_numpy(dtype=np.uint64)
+
+# 상태: 지금 모델이 학습한 행 해시(trained), 학습 데이터 전체 지문/행 수, 전체 학습 이후 이어 학습 횟수,
+# 그 모델의 등록 버전 등. 레지스트리 CURRENT가 다른 버전이면(롤백 등) 상태를 버리고 전체 학습
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return None
+    data = np.load(STATE_PATH)
+    state = json.loads(str(data["meta"]))
+    state["trained"] = data["trained"]
+    if state.get("version") is None or state["version"] != model_registry.current_version(MODEL_NAME):
+        return None
+    return state
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    meta = {k: v for k, v in state.items() if k != "trained"}
+    tmp_path = STATE_PATH + ".tmp.npz"
+    np.savez(tmp_path, trained=state["trained"], meta=np.array(json.dumps(meta)))
+    os.replace(tmp_path, STATE_PATH)
+
+
+@metrics.instrument("train_recommendation")
+def run(full=False, window=None):
+    # window를 주면 (최근 패치/날짜) champion_with_roles에서 그 파티션만 읽어서 학습
+    window = dataset_store.parse_window([]) if window is None else window
+    parts = dataset_store.select_parts("champion_with_roles", window)
+    if parts is not None:
+        print(f"학습 범위: {dataset_store.describe_window(window)} (part {len(parts)}개)")
+        if not parts:
+            print("범위에 해당하는 데이터가 없습니다. 학습 중단.")
+            return
+    df = schema.read("champion_with_roles", columns=["match_id", "team_id", "role_cluster", "win", "game_creation"], parts=parts, window=window)
+    team_df = create_team_vectors(df.drop(columns=["game_creation"]))
+
+    metrics.rows(rows_in=len(df), rows_out=len(team_df))
     if team_df.empty:
         print("유효한 팀 데이터가 없습니다. 학습 중단.")
         return
 
-    X = team_df.drop(columns=["label"])
-    y = team_df["label"]
-
-    print("학습 데이터 분포:", y.value_counts().to_dict())
-
-    model = CatBoostClassifier(verbose=0)
-    start_time = time.time()
-    model.fit(X, y)
-    elapsed = time.time() - start_time
+    created = df.groupby(df["match_id"].astype(str))["game_creation"].max()
+    match_ids = team_df["match_id"].astype(str).to_numpy()
+    team_df = team_df.iloc[time_order(match_ids, created.reindex(match_ids).to_numpy())].reset_index(drop=True)
+    hashes = row_hashes(team_df)
+    fingerprint = hashlib.sha1(np.sort(hashes).tobytes()).hexdigest()
 
-    os.makedirs("LOLCLUSTER/models", exist_ok=True)
-    model_path = "LOLCLUSTER/models/team_model.pkl"
+    state = load_state()
+    if not full and state is not None and state["fingerprint"] == fingerprint and state["rows"] == len(team_df):
+        print("학습 데이터 변경 없음. 학습 생략.")
+        metrics.note(mode="skip")
+        return
 
-    if os.path.exists(model_path):
-        os.replace(model_path, model_path.replace(".pkl", "_backup.pkl"))
+    # 가장 최근 구간은 평가용. 새 매치가 들어오면 예전 평가 구간은 학습 구간으로 밀려남
+    n_holdout = int(len(team_df) * HOLDOUT_RATIO) if len(team_df) >= 10 else 0
+    n_train = len(team_df) - n_holdout
+    train_hashes = hashes[:n_train]
+
+    mode = "full"
+    if not full and state is not None:
+        trained = state["trained"]
+        new_rows = ~np.isin(train_hashes, trained)
+        # 예전에 학습한 행이 사라졌거나(군집 재학습 등으로 바뀜) 이어 학습이 쌓였으면 전체 재학습
+        changed = not np.isin(trained, hashes).all()
+        due = (
+            state["continued"] + 1 > FULL_RETRAIN_EVERY
+            or state["rows_since_full"] + new_rows.sum() > FULL_RETRAIN_RATIO * state["rows_at_full"]
+        )
+        if not changed and not due:
+            mode = "continue"
 
-    with open(model_path, "wb") as f:
-        pickle.dump(model, f)
+    X = team_df.drop(columns=["match_id", "label"])
+    y = team_df["label"]
+    X_train, y_train = X.iloc[:n_train], y.iloc[:n_train]
+    X_test, y_test = X.iloc[n_train:], y.iloc[n_train:]
 
-    preds = model.predict(X)
-    acc = accuracy_score(y, preds)
-    f1 = f1_score(y, preds)
-    prec = precision_score(y, preds)
-    rec = recall_score(y, preds)
+    start_time = time.time()
+    if mode == "continue":
+        if not new_rows.any():
+            # 평가 구간만 바뀐 경우: 모델은 그대로 두고 평가만 다시 함
+            model, _ = model_registry.load(MODEL_NAME, state["version"])
+            mode = "eval"
+        else:
+            X_new, y_new = X_train[new_rows], y_train[new_rows]
+            print(f"이어 학습: 새 행 {len(X_new)}개 (분포: {y_new.value_counts().to_dict()})")
+            base, _ = model_registry.load(MODEL_NAME, state["version"])
+            model = CatBoostClassifier(iterations=CONTINUE_ITERATIONS, verbose=0)
+            model.fit(X_new, y_new, init_model=base)
+            state["trained"] = np.concatenate([state["trained"], train_hashes[new_rows]])
+            state["continued"] += 1
+            state["rows_since_full"] += int(new_rows.sum())
+    else:
+        print("전체 학습: 학습 데이터 분포:", y_train.value_counts().to_dict())
+        model = CatBoostClassifier(verbose=0)
+        model.fit(X_train, y_train)
+        state = {"trained": train_hashes, "continued": 0, "rows_at_full": n_train, "rows_since_full": 0}
+    elapsed = time.time() - start_time
+    metrics.note(mode=mode, train_rows=n_train, holdout_rows=n_holdout, fit_s=round(elapsed, 4))
+
+    scores = {}
+    if len(X_test) > 0:
+        preds = model.predict(X_test)
+        scores = {
+            "acc": accuracy_score(y_test, preds),
+            "f1": f1_score(y_test, preds, zero_division=0),
+            "precision": precision_score(y_test, preds, zero_division=0),
+            "recall": recall_score(y_test, preds, zero_division=0),
+        }
+        metrics.note(**scores)
+
+    if mode != "eval":
+        state["version"] = model_registry.register(MODEL_NAME, model, {
+            "fingerprint": fingerprint, "rows": len(team_df), "train_rows": n_train, "holdout_rows": n_holdout,
+            "mode": mode, "fit_s": round(elapsed, 4), "window": window, **scores,
+        })
+    state["fingerprint"] = fingerprint
+    state["rows"] = len(team_df)
+    save_state(state)
+
+    if not scores:
+        print(f"모델 저장 완료 ({mode}, {n_train}개, {elapsed:.2f}s) - 평가 구간 없음")
+        return
 
+    acc, f1, prec, rec = scores["acc"], scores["f1"], scores["precision"], scores["recall"]
     now = time.strftime('%Y-%m-%d %H:%M:%S')
     with open("train_log.txt", "a", encoding="utf-8") as log:
         log.write(
             f"[{now}] acc: {acc:.4f}, f1: {f1:.4f}, precision: {prec:.4f}, recall: {rec:.4f}, "
-            f"data: {len(X)}, time: {elapsed:.2f}s\n"
+            f"data: {n_train}, holdout: {len(X_test)}, mode: {mode}, time: {elapsed:.2f}s\n"
         )
 
-    print(f"모델 학습 및 저장 완료 ({len(X)}개, {elapsed:.2f}s)")
-    print(f"acc: {acc:.4f} | f1: {f1:.4f} | precision: {prec:.4f} | recall: {rec:.4f}")
+    print(f"모델 학습 및 저장 완료 ({mode}, {n_train}개, {elapsed:.2f}s)")
+    print(f"holdout {len(X_test)}개 - acc: {acc:.4f} | f1: {f1:.4f} | precision: {prec:.4f} | recall: {rec:.4f}")
 
 if __name__ == "__main__":
-    run()
+    import sys
+    # python scripts/train_recommendation.py [--full] [--patches N] [--since YYYY-MM-DD]
+    run(full="--full" in sys.argv, window=dataset_store.parse_window(sys.argv))
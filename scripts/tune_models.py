@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import shutil
+import pickle
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy import sparse
+import metrics
+import model_registry
+
+# 하이퍼파라미터 탐색. 시도(trial)들을 프로세스 풀에서 돌리고 전체 시간 예산 안에서 successive halving으로 거름.
+# - 1단계는 학습 데이터의 1/9로 모든 후보를, 다음 단계는 3배 데이터로 상위 1/3만 … 마지막 단계는 전체 데이터
+# - CatBoost는 pool_cache의 양자화 Pool(team_vectors, team_vectors_v3)을 그대로 읽고, 시도마다 early stopping,
+#   예산이 끝나면 학습 중인 시도도 콜백으로 멈춤
+# - KMeans는 cluster_roles와 같은 특징 행렬로 n_clusters 후보를 실루엣 점수로 비교함
+# - 결과표는 LOLCLUSTER/models/tuning/run_<종류>_<이름>_<pid>/results.json, 가장 좋은 설정은 tuning/best_<이름>.json.
+#   가장 좋은 CatBoost 모델은 모델 레지스트리에 .cbm으로 등록함 (team_vectors → team_model_wide 등,
+#   CURRENT가 이미 있으면 승격하지 않으므로 model_registry.py promote로 골라서 올림).
+#   KMeans는 CatBoost가 아니라서 LOLCLUSTER/models/champion_vectors_tuned.pkl 로 남김
+#   python scripts/tune_models.py catboost --dataset team_vectors --budget 600 --trials 27
+#   python scripts/tune_models.py kmeans --budget 300 --min-k 3 --max-k 10
+MODEL_DIR = "LOLCLUSTER/models"
+TUNING_DIR = os.path.join(MODEL_DIR, "tuning")
+BUDGET = 600
+N_TRIALS = 27
+ETA = 3
+MIN_FRACTION = 1 / 9
+EARLY_STOPPING = 50
+MAX_ITERATIONS = 1000
+SILHOUETTE_SAMPLE = 5000
+RANDOM_STATE = 42
+WORKERS = int(os.getenv("TUNE_WORKERS", str(os.cpu_count() or 1)))
+# 탐색한 데이터셋 → 레지스트리 모델 이름 (그 데이터셋으로 학습하는 스크립트가 쓰는 이름과 같게)
+TUNED_MODEL_NAMES = {"team_vectors": "team_model_wide", "team_vectors_v3": "team_model_v3"}
+
+def sample_catboost(rng):
+    return {
+        "depth": int(rng.integers(4, 9)),
+        "learning_rate": round(float(10 ** rng.uniform(np.log10(0.02), np.log10(0.2))), 4),
+        "l2_leaf_reg": round(float(10 ** rng.uniform(0, 1)), 3),
+    }
+
+def rungs():
+    # 데이터 비율 단계: 1/9, 1/3, 1
+    fractions = []
+    fraction = MIN_FRACTION
+    while fraction < 1 - 1e-9:
+        fractions.append(fraction)
+        fraction *= ETA
+    return fractions + [1.0]
+
+def subsample(n, fraction, seed=RANDOM_STATE):
+    # 같은 단계의 시도들은 같은 부분 데이터로 비교해야 하므로 seed를 시도마다 바꾸지 않음
+    if fraction >= 1:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n, max(1, int(n * fraction)), replace=False))
+
+class Deadline:
+    # CatBoost 콜백: 예산 시각을 넘으면 학습을 멈춤 (그때까지의 최선 반복은 남음)
+    def __init__(self, deadline):
+        self.deadline = deadline
+
+    def after_iteration(self, info):
+        return time.time() < self.deadline
+
+def catboost_trial(task):
+    trial_id, params, dataset, fraction, deadline, threads, model_path = task
+    from catboost import CatBoostClassifier
+    import pool_cache
+    if time.time() >= deadline:
+        return {"trial": trial_id, "status": "skipped"}
+    start = time.time()
+    train, val, _ = pool_cache.load(dataset, rebuild=False)
+    if fraction < 1:
+        train = train.slice(subsample(train.num_row(), fraction))
+    model = CatBoostClassifier(
+        iterations=MAX_ITERATIONS, eval_metric="Logloss", random_seed=RANDOM_STATE,
+        thread_count=threads, verbose=0, allow_writing_files=False, **params,
+    )
+    model.fit(train, eval_set=val, early_stopping_rounds=EARLY_STOPPING, callbacks=[Deadline(deadline)])
+    model.save_model(model_path, format="cbm")
+    return {
+        "trial": trial_id,
+        "status": "ok" if time.time() < deadline else "stopped",
+        "rows": train.num_row(),
+        "score": model.get_best_score()["validation"]["Logloss"],
+        # early stopping으로 고른 최선 반복 수 (best_params가 학습 스크립트의 iterations로 넘김)
+        "iterations": model.get_best_iteration() + 1,
+        "seconds": round(time.time() - start, 2),
+    }
+
+def kmeans_trial(task):
+    trial_id, params, features_path, fraction, deadline, threads, model_path = task
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score
+    from threadpoolctl import threadpool_limits
+    if time.time() >= deadline:
+        return {"trial": trial_id, "status": "skipped"}
+    start = time.time()
+    X = sparse.load_npz(features_path)
+    X = X[subsample(X.shape[0], fraction)]
+    with threadpool_limits(threads):
+        model = KMeans(n_clusters=params["n_clusters"], random_state=RANDOM_STATE, n_init=10)
+        labels = model.fit_predict(X)
+        # 실루엣은 높을수록 좋으므로 부호를 바꿔서 다른 탐색과 같이 낮을수록 좋게 함
+        score = -silhouette_score(X, labels, sample_size=min(SILHOUETTE_SAMPLE, X.shape[0]), random_state=RANDOM_STATE)
+    with open(model_path, "wb") as f:
+        pickle.dump(model, f)
+    return {
+        "trial": trial_id,
+        "status": "ok",
+        "rows": X.shape[0],
+        "score": float(score),
+        "inertia": float(model.inertia_),
+        "seconds": round(time.time() - start, 2),
+    }
+
+def successive_halving(trial_fn, configs, data, run_dir, budget, workers, model_ext=".pkl"):
+    # configs: 후보 설정 목록. 단계마다 살아남은 후보를 프로세스 풀에 한꺼번에 넣고 상위 1/ETA만 다음 단계로
+    deadline = time.time() + budget
+    threads = max(1, (os.cpu_count() or 1) // max(workers, 1))
+    survivors = list(range(len(configs)))
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max(workers, 1), mp_context=ctx) as pool:
+        for rung, fraction in enumerate(rungs()):
+            if not survivors or time.time() >= deadline:
+                break
+            tasks = [
+                (i, configs[i], data, fraction, deadline, threads, os.path.join(run_dir, f"trial{i:03d}_rung{rung}{model_ext}"))
+                for i in survivors
+            ]
+            done = []
+            for task, result in zip(tasks, pool.map(trial_fn, tasks)):
+                row = {"rung": rung, "fraction": round(fraction, 4), **configs[task[0]], **result}
+                if result["status"] != "skipped":
+                    row["model_path"] = task[-1]
+                    done.append(row)
+                results.append(row)
+            print(f"단계 {rung} (데이터 {fraction:.0%}): {len(done)}/{len(tasks)}개 완료, "
+                  f"최고 {min((r['score'] for r in done), default=float('nan')):.4f}")
+            ranked = sorted(done, key=lambda r: r["score"])
+            survivors = [r["trial"] for r in ranked[:max(1, len(ranked) // ETA)]]
+    return results
+
+def best_result(results):
+    # 가장 많은 데이터로 끝난 단계에서 점수가 가장 낮은 시도
+    done = [r for r in results if r["status"] != "skipped"]
+    if not done:
+        return None
+    top_rung = max(r["rung"] for r in done)
+    return min((r for r in done if r["rung"] == top_rung), key=lambda r: r["score"])
+
+def register_best(name, best, params):
+    # 최고 CatBoost 시도를 레지스트리에 새 버전으로 등록. 이미 CURRENT가 있으면 승격은 직접 함
+    from catboost import CatBoostClassifier
+    model = CatBoostClassifier()
+    model.load_model(best["model_path"], format="cbm")
+    model_name = TUNED_MODEL_NAMES.get(name, f"{name}_tuned")
+    promote = model_registry.current_version(model_name) is None
+    version = model_registry.register(model_name, model, {
+        "dataset": name, "tuned": True, "params": params, "logloss": best["score"],
+        "rows": best.get("rows"), "fraction": best["fraction"], "iterations": best.get("iterations"),
+    }, promote_to_current=promote)
+    if not promote:
+        print(f"승격하려면: python scripts/model_registry.py promote {model_name} {version}")
+    return f"{model_name}/{version}"
+
+def save_results(kind, name, results, best, run_dir, params=None):
+    stamp = time.strftime('%Y%m%d_%H%M%S')
+    if best is not None:
+        if kind == "catboost":
+            model_ref = register_best(name, best, params or {})
+        else:
+            model_ref = os.path.join(MODEL_DIR, f"{name}_tuned.pkl")
+            shutil.copyfile(best["model_path"], model_ref + ".tmp")
+            os.replace(model_ref + ".tmp", model_ref)
+            print(f"최고 모델 저장 → {model_ref}")
+
+    # 시도별 모델(과 KMeans 특징 행렬)은 지우고 run_dir에는 결과표만 남김
+    for filename in os.listdir(run_dir):
+        os.remove(os.path.join(run_dir, filename))
+    table_path = os.path.join(run_dir, "results.json")
+    with open(table_path, "w", encoding="utf-8") as f:
+        json.dump([{k: v for k, v in row.items() if k != "model_path"} for row in results], f, ensure_ascii=False, indent=2)
+    print(f"결과표 저장 → {table_path}")
+
+    if best is not None:
+        summary = {k: v for k, v in best.items() if k != "model_path"}
+        summary.update({"kind": kind, "dataset": name, "model": model_ref, "results": table_path, "created_at": stamp})
+        best_path = os.path.join(TUNING_DIR, f"best_{name}.json")
+        with open(best_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        os.replace(best_path + ".tmp", best_path)
+        print(f"최고 설정: {summary}")
+    return table_path
+
+def best_params(name, defaults):
+    # 학습 스크립트용: 탐색 결과가 있으면 그 설정으로 defaults를 덮어씀
+    path = os.path.join(TUNING_DIR, f"best_{name}.json")
+    if not os.path.exists(path):
+        return dict(defaults)
+    with open(path, "r", encoding="utf-8") as f:
+        best = json.load(f)
+    params = dict(defaults)
+    params.update({key: best[key] for key in defaults if key in best and key != "iterations"})
+    # 반복 수는 전체 데이터 단계에서 고른 것만 씀 (적은 데이터로 멈춘 반복 수는 전체 데이터에는 너무 작음)
+    if "iterations" in defaults and best.get("iterations") and best.get("fraction", 0) >= 1:
+        params["iterations"] = int(best["iterations"])
+    return params
+
+def run_dir_for(kind, name):
+    path = os.path.join(TUNING_DIR, f"run_{kind}_{name}_{os.getpid()}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def tune_catboost(dataset, budget=BUDGET, n_trials=N_TRIALS, workers=WORKERS, seed=RANDOM_STATE):
+    import pool_cache
+    with metrics.stage("tune_models.catboost") as m:
+        # Pool이 없거나 오래됐으면 여기서 한 번만 만들고, 시도들은 디스크의 Pool을 읽기만 함
+        _, _, meta = pool_cache.load(dataset)
+        rng = np.random.default_rng(seed)
+        configs = [{"depth": 6, "learning_rate": 0.05, "l2_leaf_reg": 3.0}]
+        configs += [sample_catboost(rng) for _ in range(n_trials - 1)]
+        run_dir = run_dir_for("catboost", dataset)
+        results = successive_halving(catboost_trial, configs, dataset, run_dir, budget, workers, model_ext=".cbm")
+        best = best_result(results)
+        save_results("catboost", dataset, results, best, run_dir, configs[best["trial"]] if best else None)
+        m.rows(rows_in=meta["rows"])
+        m.set(trials=len(configs), runs=len(results), best_logloss=best["score"] if best else None)
+        return best
+
+def tune_kmeans(budget=BUDGET, min_k=3, max_k=10, workers=WORKERS):
+    import schema
+    import dataset_store
+    import cluster_roles
+    from item_encoding import SLOT_COLS, load_vocab, update_vocab, to_slot_format
+    with metrics.stage("tune_models.kmeans") as m:
+        df = schema.compact(to_slot_format(dataset_store.read("champion_vectors")))
+        vocab, _ = update_vocab(load_vocab(), df[SLOT_COLS].to_numpy())
+        run_dir = run_dir_for("kmeans", "champion_vectors")
+        # 특징 행렬은 한 번만 만들어 두고 작업자들은 파일에서 읽음
+        features_path = os.path.join(run_dir, "features.npz")
+        sparse.save_npz(features_path, cluster_roles.build_features(df, vocab))
+        configs = [{"n_clusters": k} for k in range(min_k, max_k + 1)]
+        results = successive_halving(kmeans_trial, configs, features_path, run_dir, budget, workers)
+        best = best_result(results)
+        save_results("kmeans", "champion_vectors", results, best, run_dir)
+        m.rows(rows_in=len(df))
+        m.set(trials=len(configs), runs=len(results), best_n_clusters=best["n_clusters"] if best else None)
+        if best is not None and best["n_clusters"] != cluster_roles.N_CLUSTERS:
+            print(f"참고: 지금 역할 수는 {cluster_roles.N_CLUSTERS}개입니다. 바꾸려면 cluster_roles.N_CLUSTERS와 "
+                  f"team_features.N_ROLES를 같이 바꾸고 전체 재학습해야 합니다.")
+        return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("kind", choices=["catboost", "kmeans"])
+    parser.add_argument("--dataset", default="team_vectors", help="catboost: team_vectors 또는 team_vectors_v3")
+    parser.add_argument("--budget", type=float, default=BUDGET, help="전체 시간 예산(초)")
+    parser.add_argument("--trials", type=int, default=N_TRIALS)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--min-k", type=int, default=3)
+    parser.add_argument("--max-k", type=int, default=10)
+    args = parser.parse_args()
+    if args.kind == "catboost":
+        tune_catboost(args.dataset, args.budget, args.trials, args.workers)
+    else:
+        tune_kmeans(args.budget, args.min_k, args.max_k, args.workers)
@@ -1,66 +1,269 @@
 import os
+import sys
 import json
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+from match_store import list_segments, iter_segment
+from item_encoding import SLOT_COLS, load_vocab, save_vocab, update_vocab, item_matrix, to_slot_format
+import dataset_store
+import schema
+import metrics
 
-def extract_features(matches):
-    rows = []
+DATA_DIR = "LOLCLUSTER/data"
+OUTPUT_DIR = "LOLCLUSTER/champion_vectors"
+DATASET = "champion_vectors"
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, "vectorize_manifest.json")
+KEY_COLS = ["match_id", "team_id", "champion"]
+
+# 참가자마다 뽑는 필드: (컬럼 이름, match-v5 키, dtype)
+PARTICIPANT_FIELDS = [
+    ("team_id", "teamId", np.int16),
+    ("champion", "championName", object),
+    ("win", "win", bool),
+    ("kills", "kills", np.int16),
+    ("deaths", "deaths", np.int16),
+    ("assists", "assists", np.int16),
+    ("damage", "totalDamageDealtToChampions", np.int32),
+    ("taken", "totalDamageTaken", np.int32),
+    ("heal", "totalHeal", np.int32),
+]
+# 매치 단위 정보: 패치(gameVersion 앞 두 자리)와 생성 시각(gameCreation, ms). 데이터셋은 이 값으로 파티션을 나눔
+COLUMNS = ["match_id"] + [col for col, _, _ in PARTICIPANT_FIELDS] + SLOT_COLS + schema.MATCH_COLS
+# 0이나 1이면 프로세스 풀 없이 현재 프로세스에서 파싱
+WORKERS = int(os.getenv("VECTORIZE_WORKERS", str(os.cpu_count() or 1)))
+# 새로 읽을 바이트가 이보다 적으면 프로세스 풀 없이 파싱 (루프마다 조금씩 들어오는 평소 상황)
+PARALLEL_MIN_BYTES = int(os.getenv("VECTORIZE_PARALLEL_MIN_BYTES", str(16 << 20)))
+
+def patch_of(version):
+    # "14.10.589.1234" → "14.10". 없거나 형식이 다르면 None
+    pieces = str(version or "").split(".")
+    if len(pieces) < 2 or not (pieces[0].isdigit() and pieces[1].isdigit()):
+        return None
+    return sys.intern(f"{int(pieces[0])}.{int(pieces[1])}")
+
+def extract_columns(matches):
+    # 필요한 필드만 뽑아서 컬럼별 NumPy 배열로 만듦 (원본 dict는 바로 버릴 수 있음)
+    # 같은 match_id/챔피언 이름은 같은 문자열 객체를 가리키게 해서 프로세스 간 전달(pickle)도 작게 함
+    values = {col: [] for col in COLUMNS}
     for match in matches:
+        match_id = sys.intern(str(match['metadata']['matchId']))
+        patch = patch_of(match['info'].get('gameVersion'))
+        created = int(match['info'].get('gameCreation') or 0)
         for p in match['info']['participants']:
-            row = {
-                "match_id": str(match['metadata']['matchId']),
-                "team_id": p['teamId'],
-                "champion": p['championName'],
-                "win": p['win'],
-                "kills": p['kills'],
-                "deaths": p['deaths'],
-                "assists": p['assists'],
-                "damage": p['totalDamageDealtToChampions'],
-                "taken": p['totalDamageTaken'],
-                "heal": p['totalHeal'],
-                "items": [p[f"item{i}"] for i in range(6)]
-            }
-            rows.append(row)
-    return pd.DataFrame(rows)
+            values["match_id"].append(match_id)
+            values["patch"].append(patch)
+            values["game_creation"].append(created)
+            for col, key, _ in PARTICIPANT_FIELDS:
+                values[col].append(p[key])
+            for col in SLOT_COLS:
+                values[col].append(p.get(col, 0))
+    values["champion"] = [sys.intern(name) for name in values["champion"]]
+    dtypes = {col: dtype for col, _, dtype in PARTICIPANT_FIELDS}
+    dtypes.update({"patch": object, "game_creation": np.int64})
+    columns = {"match_id": np.array(values["match_id"], dtype=object)}
+    for col in COLUMNS[1:]:
+        columns[col] = np.array(values[col], dtype=dtypes.get(col, np.int32))
+    return columns
+
+def columns_to_frame(parts):
+    if not parts:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.DataFrame({col: np.concatenate([part[col] for part in parts]) for col in COLUMNS})
+
+def extract_features(matches):
+    return columns_to_frame([extract_columns(matches)])
+
+def update_item_vocab(df):
+    # 처음 보는 아이템은 어휘 뒤에 추가 (기존 아이템의 열 번호는 그대로)
+    vocab, new_items = update_vocab(load_vocab(), df[SLOT_COLS].to_numpy())
+    if new_items:
+        save_vocab(vocab)
+        print(f"새 아이템 {len(new_items)}개 어휘에 추가 (총 {len(vocab)}개)")
+    return vocab
+
+def update_champion_dict(df):
+    # 챔피언 사전도 아이템 어휘처럼 뒤에만 추가
+    champions, new_names = schema.update_champions(schema.load_champions(), df["champion"].to_numpy())
+    if new_names:
+        schema.save_champions(champions)
+        print(f"새 챔피언 {len(new_names)}개 사전에 추가 (총 {len(champions)}개)")
+    return champions
 
 def encode_items(df):
-    all_items = sorted({item for items in df['items'] for item in items})
-    for item in all_items:
-        df[f"item_{item}"] = df['items'].apply(lambda x: int(item in x))
-    df.drop(columns=['items'], inplace=True)
-    return df
+    # item0~item5에서 바로 희소 원-핫 CSR 행렬을 만듦
+    return item_matrix(df, update_item_vocab(df))
+
+# manifest: {파일명: {"size": 바이트 크기, "mtime": 수정 시각, "matches": 처리한 매치 수}}
+# 세그먼트 파일은 {"offset": 처리한 바이트 위치}만 기록하고 그 뒤부터 이어서 읽음
+def load_manifest():
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                print(f"경고: {MANIFEST_PATH} 손상됨. 전체 재처리.")
+    return {}
+
+def save_manifest(manifest):
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def list_tasks(manifest):
+    # 새 데이터가 있는 파일마다 작업 하나: (종류, 파일명, 시작 위치)
+    tasks = []
+    for filename in sorted(os.listdir(DATA_DIR)):
+        if not (filename.endswith(".json") and filename.startswith("matches_")):
+            continue
+        stat = os.stat(os.path.join(DATA_DIR, filename))
+        entry = manifest.get(filename)
+        # save_batch는 파일 끝에만 추가하므로 크기/시각이 같으면 새 매치가 없음
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            continue
+        tasks.append(("legacy", filename, entry["matches"] if entry else 0))
 
-def run():
-    all_matches = []
-    data_dir = "LOLCLUSTER/data"
-    for filename in os.listdir(data_dir):
-        if filename.endswith(".json") and filename.startswith("matches_"):
-            with open(os.path.join(data_dir, filename), "r", encoding="utf-8") as f:
-                try:
-                    content = json.load(f)
-                    if isinstance(content, list):
-                        all_matches.extend(content)
-                except json.JSONDecodeError:
-                    print(f"무시: {filename} - JSON 파싱 실패")
-
-    if not all_matches:
-        print(" 수집된 매치 데이터가 없습니다.")
+    for filename in list_segments(DATA_DIR):
+        size = os.path.getsize(os.path.join(DATA_DIR, filename))
+        offset = manifest.get(filename, {}).get("offset", 0)
+        if offset > size:
+            offset = 0
+        if offset == size:
+            continue
+        tasks.append(("segment", filename, offset))
+    return tasks
+
+def parse_task(task, data_dir=DATA_DIR):
+    # 프로세스 풀 작업자에서 실행: 파일 하나를 읽어 (파일명, 컬럼 배열, manifest 항목, 매치 수)를 돌려줌
+    kind, filename, start = task
+    path = os.path.join(data_dir, filename)
+    if kind == "legacy":
+        stat = os.stat(path)
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                content = json.load(f)
+            except json.JSONDecodeError:
+                print(f"무시: {filename} - JSON 파싱 실패")
+                return filename, None, None, 0
+        if not isinstance(content, list):
+            return filename, None, None, 0
+        done = start if start <= len(content) else 0
+        matches = content[done:]
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime, "matches": len(content)}
+        return filename, extract_columns(matches), entry, len(matches)
+
+    # 세그먼트는 매치를 하나씩 풀면서 천 개 단위로 컬럼 배열로 바꿔 원본 dict를 오래 들고 있지 않음
+    offset = start
+    parts = []
+    batch = []
+    count = 0
+    for offset, match in iter_segment(path, start):
+        batch.append(match)
+        if len(batch) >= 1000:
+            parts.append(extract_columns(batch))
+            count += len(batch)
+            batch = []
+    if batch:
+        parts.append(extract_columns(batch))
+        count += len(batch)
+    columns = {col: np.concatenate([part[col] for part in parts]) for col in COLUMNS} if parts else None
+    return filename, columns, {"offset": offset}, count
+
+def task_bytes(task):
+    kind, filename, start = task
+    size = os.path.getsize(os.path.join(DATA_DIR, filename))
+    return size if kind == "legacy" else size - start
+
+# 프로세스 풀은 처음 필요할 때 한 번 만들고 계속 씀.
+# spawn 작업자는 시작할 때 __main__(main.py면 sklearn/catboost 단계까지)을 다시 import 하므로 루프마다 새로 띄우지 않음
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown)
+        return _pool
+
+def iter_parsed(tasks, workers=WORKERS):
+    # 파일 단위로 병렬 파싱. 크롤러 스레드가 같이 도는 프로세스에서 fork하지 않도록 spawn을 씀
+    if workers <= 1 or len(tasks) <= 1 or sum(task_bytes(task) for task in tasks) < PARALLEL_MIN_BYTES:
+        for task in tasks:
+            yield parse_task(task)
         return
+    yield from get_pool(workers).map(parse_task, tasks, [DATA_DIR] * len(tasks))
 
-    df = extract_features(all_matches)
-    df = encode_items(df)
-    df["match_id"] = df["match_id"].astype(str) 
+def collect_new_rows(manifest):
+    parts = []
+    updated = {}
+    n_matches = 0
+    for filename, columns, entry, count in iter_parsed(list_tasks(manifest)):
+        if entry is None:
+            continue
+        updated[filename] = entry
+        n_matches += count
+        if columns is not None:
+            parts.append(columns)
+    return columns_to_frame(parts), updated, n_matches
+
+def merge_previous(df):
+    prev = to_slot_format(dataset_store.read(DATASET))
+    update_item_vocab(prev)
+    update_champion_dict(prev)
+    df = pd.concat([prev, df], ignore_index=True)
+    # 새로 뽑은 행을 남겨서 예전 part에 없던 패치/생성 시각이 채워지게 함
+    df.drop_duplicates(subset=KEY_COLS, keep="last", inplace=True)
+    return df
+
+@metrics.instrument("vectorize_champions")
+def run(incremental=True, export_csv=False):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    has_output = dataset_store.exists(DATASET)
+    # 예전 CSV만 있으면 parquet 데이터셋으로 한 번 전체 변환
+    manifest = load_manifest() if incremental and dataset_store.has_dataset(DATASET) else {}
+    df, updated, n_matches = collect_new_rows(manifest)
+
+    if df.empty:
+        if updated:
+            manifest.update(updated)
+            save_manifest(manifest)
+        if has_output:
+            print("새로운 매치가 없습니다. 벡터화 생략.")
+        else:
+            print(" 수집된 매치 데이터가 없습니다.")
+        return
 
-    os.makedirs("LOLCLUSTER/champion_vectors", exist_ok=True)
-    output_path = "LOLCLUSTER/champion_vectors/champion_vectors.csv"
+    metrics.note(matches=n_matches)
+    update_item_vocab(df)
+    update_champion_dict(df)
+    df["match_id"] = df["match_id"].astype(str)
+    df.drop_duplicates(subset=KEY_COLS, inplace=True)
 
-    if os.path.exists(output_path):
-        prev = pd.read_csv(output_path)
-        prev["match_id"] = prev["match_id"].astype(str)  
-        df = pd.concat([prev, df], ignore_index=True)
-        df.drop_duplicates(subset=["match_id", "team_id", "champion"], inplace=True)
+    if manifest:
+        dataset_store.append(DATASET, schema.compact(df), partitioned=True)
+        print(f"champion_vectors 추가 완료: {len(df)}개")
+        if any("patch=" not in name for name in dataset_store.part_stamps(DATASET)):
+            print("참고: 패치 정보가 없는 예전 part는 기간 선택(--patches/--since)에서 빠집니다. --full로 다시 만들면 나뉩니다.")
+    else:
+        if has_output:
+            df = merge_previous(df)
+        df = schema.compact(df)
+        dataset_store.write(DATASET, df, partitioned=True)
+        print(f"champion_vectors 저장 완료: {len(df)}개")
 
-    df.to_csv(output_path, index=False)
-    print(f"champion_vectors.csv 저장 완료: {len(df)}개")
+    metrics.rows(rows_out=len(df))
+    manifest.update(updated)
+    save_manifest(manifest)
+    if export_csv:
+        dataset_store.export_csv(DATASET)
 
 if __name__ == "__main__":
-    run()
+    run(incremental="--full" not in sys.argv, export_csv="--csv" in sys.argv)
@@ -0,0 +1,319 @@
+import time
+import pickle
+import asyncio
+import argparse
+from collections import OrderedDict
+import numpy as np
+import schema
+import model_registry
+from team_features import N_ROLES, TEAM_SIZE
+
+# 레지스트리의 team_model CURRENT 버전(역할 수 모델)으로 승률을 예측하는 엔진 + 로컬 HTTP/CLI 서비스.
+# - 모델은 레지스트리 CURRENT를 따라감 (승격/롤백하면 재시작 없이 다음 요청부터 새 버전, 그때 LRU 캐시도 비움)
+# - 챔피언→역할 표는 한 번만 읽음 (역할은 최신 champion_with_roles에서 챔피언별 최빈값)
+# - 같은 역할 구성은 LRU 캐시에서 바로 돌려줌
+# - 서버에서는 동시에 들어온 요청을 모아 predict_proba 한 번으로 처리함
+#   python scripts/win_predictor.py predict Ahri,Garen,Jinx,Thresh,Zed Lux,Ashe,Leona,Darius,Sona
+#   python scripts/win_predictor.py serve --port 8090   (POST /predict, /predict_batch, /recommend, /complete)
+#   python scripts/win_predictor.py bench
+MODEL_NAME = "team_model"
+FEATURES = [f"t1_role_{i}" for i in range(N_ROLES)] + [f"t2_role_{i}" for i in range(N_ROLES)]
+CACHE_SIZE = 4096
+# 묶음 하나에 담는 최대 요청 수 / 첫 요청 후 더 기다리는 시간
+MAX_BATCH = 256
+BATCH_WAIT = 0.002
+
+def check_features(model, path):
+    names = list(getattr(model, "feature_names_", None) or [])
+    if names and names != FEATURES:
+        raise ValueError(f"역할 수 모델이 아닙니다: {path} (입력 {len(names)}개)")
+    return model
+
+def load_model(path=None):
+    # path: 없으면 레지스트리 CURRENT, v000003 같은 버전 이름, 또는 .cbm/.pkl 파일 경로
+    if path is None or path in model_registry.list_versions(MODEL_NAME):
+        model, _ = model_registry.load(MODEL_NAME, path)
+        path = f"{MODEL_NAME}/{path or model_registry.current_version(MODEL_NAME)}"
+    elif path.endswith(".cbm"):
+        from catboost import CatBoostClassifier
+        model = CatBoostClassifier()
+        model.load_model(path, format="cbm")
+    else:
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+    return check_features(model, path)
+
+def load_champion_roles():
+    # 챔피언별로 가장 많이 배정된 역할 번호
+    df = schema.read("champion_with_roles", columns=["champion", "role_cluster"])
+    counts = df.groupby(["champion", "role_cluster"], observed=True).size().reset_index(name="n")
+    counts = counts.sort_values(["champion", "n", "role_cluster"], ascending=[True, False, True])
+    top = counts.drop_duplicates("champion")
+    return dict(zip(top["champion"].astype(str), top["role_cluster"].astype(int)))
+
+class Predictor:
+    def __init__(self, model=None, roles=None, cache_size=CACHE_SIZE):
+        # model을 안 주면 레지스트리 CURRENT를 따라감
+        self.fixed_model = model
+        self.current = model_registry.CurrentModel(MODEL_NAME) if model is None else None
+        self.version = None
+        self.roles = roles if roles is not None else load_champion_roles()
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # 시작할 때 한 번 읽어서 모델이 없거나 형식이 다르면 바로 실패하게 함
+        self.model
+
+    @property
+    def model(self):
+        if self.current is None:
+            return self.fixed_model
+        model = self.current.model
+        if self.current.version != self.version:
+            # 다른 버전의 예측이 섞이지 않게 캐시를 비움
+            check_features(model, f"{MODEL_NAME}/{self.current.version}")
+            if self.version is not None:
+                print(f"모델 버전 변경: {self.version} → {self.current.version}")
+            self.cache.clear()
+            self.version = self.current.version
+        return model
+
+    def role_counts(self, team):
+        if len(team) != TEAM_SIZE:
+            raise ValueError(f"팀은 {TEAM_SIZE}명이어야 합니다: {team}")
+        counts = [0] * N_ROLES
+        for champion in team:
+            role = self.roles.get(champion)
+            if role is None:
+                raise KeyError(f"모르는 챔피언: {champion}")
+            counts[role] += 1
+        return tuple(counts)
+
+    def predict_many(self, pairs):
+        # pairs: [(team1 챔피언 5개, team2 챔피언 5개)] → team1(100팀) 승리 확률 목록
+        keys = [self.role_counts(t1) + self.role_counts(t2) for t1, t2 in pairs]
+        model = self.model
+        probs = [self.cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(key for key, p in zip(keys, probs) if p is None))
+        self.hits += len(keys) - sum(p is None for p in probs)
+        self.misses += sum(p is None for p in probs)
+        for key in keys:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+        if missing:
+            result = model.predict_proba(np.array(missing, dtype=float))[:, 1]
+            for key, p in zip(missing, result):
+                self.cache[key] = float(p)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            fresh = dict(zip(missing, result))
+            probs = [p if p is not None else float(fresh[key]) for key, p in zip(keys, probs)]
+        return probs
+
+    def predict(self, team1, team2):
+        return self.predict_many([(team1, team2)])[0]
+
+class Batcher:
+    # 동시에 들어온 요청을 MAX_BATCH개 또는 BATCH_WAIT초까지 모아서 predict_many 한 번으로 처리
+    def __init__(self, predictor, max_batch=MAX_BATCH, wait=BATCH_WAIT):
+        self.predictor = predictor
+        self.max_batch = max_batch
+        self.wait = wait
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+
+    async def predict(self, team1, team2):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(((team1, team2), future))
+        return await future
+
+    async def loop(self):
+        while True:
+            items = [await self.queue.get()]
+            deadline = time.monotonic() + self.wait
+            while len(items) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            # 잘못된 요청 하나가 묶음 전체를 실패시키지 않게, 먼저 검사해서 걸러냄
+            valid = []
+            for pair, future in items:
+                try:
+                    self.predictor.role_counts(pair[0])
+                    self.predictor.role_counts(pair[1])
+                    valid.append((pair, future))
+                except (KeyError, ValueError) as e:
+                    future.set_exception(e)
+            if not valid:
+                continue
+            try:
+                probs = self.predictor.predict_many([pair for pair, _ in valid])
+            except Exception as e:
+                for _, future in valid:
+                    future.set_exception(e)
+                continue
+            for (_, future), p in zip(valid, probs):
+                future.set_result(p)
+
+def create_app(predictor, recommender=None):
+    from aiohttp import web
+    batcher = Batcher(predictor)
+
+    async def on_startup(app):
+        batcher.start()
+
+    async def on_cleanup(app):
+        await batcher.stop()
+
+    def bad_request(e):
+        return web.json_response({"error": e.args[0] if e.args else str(e)}, status=400)
+
+    async def predict(request):
+        body = await request.json()
+        try:
+            p = await batcher.predict(body["team1"], body["team2"])
+        except (KeyError, ValueError) as e:
+            return bad_request(e)
+        return web.json_response({"team1_win": p})
+
+    async def predict_batch(request):
+        body = await request.json()
+        try:
+            probs = predictor.predict_many([(m["team1"], m["team2"]) for m in body["matches"]])
+        except (KeyError, ValueError) as e:
+            return bad_request(e)
+        return web.json_response({"team1_win": probs})
+
+    async def recommend(request):
+        # {"ally": [...], "enemy": [...], "bans": [...], "k": 5, "side": 100}
+        body = await request.json()
+        method = recommender.complete if request.path == "/complete" else recommender.recommend
+        try:
+            result = method(body.get("ally", []), body.get("enemy", []), body.get("k", 5), body.get("bans", []), body.get("side", 100))
+        except (KeyError, ValueError) as e:
+            return bad_request(e)
+        return web.json_response({"result": result})
+
+    async def status(request):
+        return web.json_response({
+            "champions": len(predictor.roles), "cache": len(predictor.cache), "version": predictor.version,
+            "hits": predictor.hits, "misses": predictor.misses, "batches": batcher.batches,
+        })
+
+    app = web.Application()
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_post("/predict", predict)
+    app.router.add_post("/predict_batch", predict_batch)
+    if recommender is not None:
+        app.router.add_post("/recommend", recommend)
+        app.router.add_post("/complete", recommend)
+    app.router.add_get("/status", status)
+    return app
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):.3f}ms, p99 {np.percentile(ms, 99):.3f}ms"
+
+def bench(predictor, n=2000, batch_size=64, concurrency=64):
+    rng = np.random.default_rng(42)
+    champions = sorted(predictor.roles)
+    if len(champions) < 2 * TEAM_SIZE:
+        raise ValueError("벤치마크에 필요한 챔피언 수가 부족합니다.")
+
+    def random_pair():
+        picked = rng.choice(len(champions), 2 * TEAM_SIZE, replace=False)
+        names = [champions[i] for i in picked]
+        return names[:TEAM_SIZE], names[TEAM_SIZE:]
+
+    pairs = [random_pair() for _ in range(n)]
+
+    # 1) 단건 (캐시 없이 / 캐시 적중)
+    predictor.cache.clear()
+    samples = []
+    for t1, t2 in pairs:
+        predictor.cache.clear()
+        start = time.perf_counter()
+        predictor.predict(t1, t2)
+        samples.append(time.perf_counter() - start)
+    print(f"단건 (캐시 없음) {n}회: {percentiles(samples)}")
+    samples = []
+    for t1, t2 in pairs:
+        start = time.perf_counter()
+        predictor.predict(t1, t2)
+        samples.append(time.perf_counter() - start)
+    print(f"단건 (캐시 사용) {n}회: {percentiles(samples)}")
+
+    # 2) 묶음 호출
+    predictor.cache.clear()
+    samples = []
+    for i in range(0, n, batch_size):
+        predictor.cache.clear()
+        start = time.perf_counter()
+        predictor.predict_many(pairs[i:i + batch_size])
+        samples.append(time.perf_counter() - start)
+    print(f"묶음 {batch_size}개 × {len(samples)}회: {percentiles(samples)}")
+
+    # 3) 동시 요청 → Batcher가 모아서 처리 (요청별 대기 시간)
+    async def concurrent():
+        predictor.cache.clear()
+        batcher = Batcher(predictor)
+        batcher.start()
+        samples = []
+
+        async def one(t1, t2):
+            start = time.perf_counter()
+            await batcher.predict(t1, t2)
+            samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i in range(0, n, concurrency):
+            await asyncio.gather(*(one(t1, t2) for t1, t2 in pairs[i:i + concurrency]))
+        elapsed = time.perf_counter() - start
+        await batcher.stop()
+        print(f"동시 {concurrency}개 요청 {n}회 (묶음 {batcher.batches}번, {n / elapsed:.0f} req/s): {percentiles(samples)}")
+
+    asyncio.run(concurrent())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("predict")
+    p.add_argument("team1", help="쉼표로 구분한 챔피언 5개")
+    p.add_argument("team2", help="쉼표로 구분한 챔피언 5개")
+    p = sub.add_parser("serve")
+    p.add_argument("--port", type=int, default=8090)
+    p = sub.add_parser("bench")
+    p.add_argument("-n", type=int, default=2000)
+    p.add_argument("--batch-size", type=int, default=64)
+    p.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--model", default=None, help="레지스트리 버전(v000003) 또는 .cbm/.pkl 경로 (기본: CURRENT)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        from aiohttp import web
+        from draft_recommender import Recommender
+        recommender = Recommender(load_model(args.model) if args.model else None)
+        web.run_app(create_app(recommender.predictor, recommender), port=args.port)
+        raise SystemExit(0)
+
+    predictor = Predictor(load_model(args.model) if args.model else None)
+    if args.command == "predict":
+        p = predictor.predict(args.team1.split(","), args.team2.split(","))
+        print(f"team1 승률: {p:.4f}")
+    else:
+        bench(predictor, args.n, args.batch_size, args.concurrency)
@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+# 학습 행의 챔피언/상성 특징에서 그 판 자신의 결과는 저장소에 들어간 매치일 때만 빠지는지 확인.
+#   python -m pytest tests/test_champion_features.py   또는   python tests/test_champion_features.py
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+sys.path.insert(0, SCRIPTS)
+
+def match_rows(match_id):
+    # 100팀(C0~C4)이 이기고 200팀(C5~C9)이 지는 10명짜리 매치
+    return pd.DataFrame({
+        "match_id": [match_id] * 10,
+        "team_id": [100] * 5 + [200] * 5,
+        "champion": [f"C{i}" for i in range(10)],
+        "win": [True] * 5 + [False] * 5,
+    })
+
+def test_own_result_removed_only_for_counted_matches():
+    import champion_features
+    from team_features import Teams
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # 챔피언 사전은 작업 디렉터리 기준 경로라서 빈 디렉터리에서 돌림
+        os.chdir(tmp)
+        try:
+            store = champion_features.empty_store()
+            champion_features.add_matches(store, match_rows("M1"))
+            champion_features.save_store(store, os.path.join(tmp, "features.npz"))
+            features = champion_features.ChampionFeatures(champion_features.load_store(os.path.join(tmp, "features.npz")))
+
+            # M1은 저장소에 들어간 판, M2는 같은 조합이지만 아직 들어가지 않은 판 (홀드아웃/새 행)
+            teams = Teams(pd.concat([match_rows("M1"), match_rows("M2")], ignore_index=True))
+            result = champion_features.teams_features(features, teams)
+        finally:
+            os.chdir(cwd)
+
+    counted = teams.match_id == "M1"
+    blue = teams.team_id == 100
+    assert list(features.counted(teams.match_id)) == list(counted)
+    # 들어간 판: 자기 결과를 빼면 남는 판이 없으므로 사전값 0.5
+    np.testing.assert_allclose(result[counted].to_numpy(), 0.5)
+    # 안 들어간 판: 빼지 않고 M1의 결과를 그대로 씀 (이긴 쪽 6/11, 진 쪽 5/11)
+    prior = champion_features.PRIOR_GAMES
+    np.testing.assert_allclose(result[~counted & blue].to_numpy(), (1 + 0.5 * prior) / (1 + prior))
+    np.testing.assert_allclose(result[~counted & ~blue].to_numpy(), (0.5 * prior) / (1 + prior))
+
+if __name__ == "__main__":
+    test_own_result_removed_only_for_counted_matches()
+    print("ok")
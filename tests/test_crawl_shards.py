@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import subprocess
+import urllib.request
+
+# 크롤러 shard 두 개를 stub 서버에 같이 돌려서 같은 매치를 두 번 조회하지 않는지 확인.
+# 제한을 빡빡하게 하고 lease를 짧게 줘서, 큐에 넣을 때 선점하던 예전 방식이면 중복 조회가 생기는 조건으로 돌림
+#   python -m pytest tests/test_crawl_shards.py   또는   python tests/test_crawl_shards.py
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+sys.path.insert(0, SCRIPTS)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_server(base, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            return json.load(urllib.request.urlopen(f"{base}/stub/status"))
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("stub 서버가 뜨지 않았습니다")
+
+def test_two_shards_fetch_each_match_once():
+    from match_store import MatchStore, list_segments, iter_segment
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(SCRIPTS, "riot_stub_server.py"), "--port", str(port),
+         "--players", "150", "--app-limit", "40:1,100000:120", "--latency", "0.01"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_server(base)
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = os.path.join(tmp, "data")
+            config = os.path.join(tmp, "shards.json")
+            with open(config, "w", encoding="utf-8") as f:
+                json.dump([
+                    {"name": "s1", "region": "asia", "queue": 450, "seeds": ["a#1"], "api_base": base, "workers": 5},
+                    {"name": "s2", "region": "asia", "queue": 450, "seeds": ["b#2", "c#3"], "api_base": base, "workers": 5},
+                ], f)
+            env = {**os.environ, "RIOT_API_KEY": "test", "CRAWLER_DATA_DIR": data_dir, "CACHE_MODE": "off",
+                   "CRAWLER_CLAIM_LEASE": "3", "METRICS_PATH": os.path.join(tmp, "metrics.jsonl")}
+            result = subprocess.run(
+                [sys.executable, os.path.join(SCRIPTS, "crawl_shards.py"), config],
+                env=env, cwd=tmp, capture_output=True, text=True, timeout=600,
+            )
+            assert result.returncode == 0, result.stdout[-2000:]
+
+            status = wait_server(base)
+            assert status["duplicate_details"] == 0, status
+
+            match_ids = []
+            for name in list_segments(data_dir):
+                match_ids += [m["metadata"]["matchId"] for _, m in iter_segment(os.path.join(data_dir, name))]
+            assert match_ids, "수집된 매치가 없습니다"
+            assert len(match_ids) == len(set(match_ids))
+            # 두 shard가 모두 일했는지
+            assert len(MatchStore(data_dir, shard="s1")) > 0 and len(MatchStore(data_dir, shard="s2")) > 0
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == "__main__":
+    test_two_shards_fetch_each_match_once()
+    print("ok")